@@ -15,6 +15,7 @@ class RequestContext(BaseModel):
     jwt: dict = None
     user_id: str = None
     authenticated: bool = True
+    read_only: bool = False
 
 
 _request_context_cache = {}
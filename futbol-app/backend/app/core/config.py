@@ -17,12 +17,14 @@ class CommonSettings(BaseSettings):
     ENVIRONMENT: str = Field(default="local")
 
     ENABLE_ACCESS_CONTROL: bool = Field(default=False)
+    SERVER_TIMING_ENABLED: bool = Field(default=False)  ## Server-Timing header and Axiom fields
 
 
 class DatabaseSettings(BaseSettings):
     DB_NAME: str = Field(default="echo-backend")
     DB_URL: str = Field(default="sqlite:///sql.db")
     DB_POOL_SIZE: int = Field(default=30)
+    DB_REPLICA_URLS: list[str] = Field(default=[])  ## Read replicas, JSON list in the env
     DB_POOL_PRE_PING: bool = Field(default=False)
     REPOSITORY_NAME: str = Field(default="SQL")  ## For the new entities
     POOL_RECYCLE_MINUTES: int = Field(default=10)
@@ -30,6 +32,14 @@ class DatabaseSettings(BaseSettings):
     DB_ADMIN_ROLE: str = Field(default="postgres")
     DB_AUTH_ROLE: str = Field(default="echo_backend")
     DB_STATEMENT_TIMEOUT_MS: int = Field(default=20000)
+    ## Off behind a transaction mode pooler (pgbouncer, Supabase port 6543)
+    DB_SESSION_LEVEL_DEFAULTS: bool = Field(default=True)
+
+    DB_N_PLUS_ONE_THRESHOLD: int = Field(default=5)  ## Repetitions of a statement to flag it
+    DB_QUERY_STATS_HEADER: bool | None = Field(default=None)  ## Default: all but production
+
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = Field(default=60)
+    PAGINATION_COUNT_CACHE_SIZE: int = Field(default=1024)
 
 
 class CORSSettings(BaseSettings):
@@ -65,6 +75,12 @@ class CredentialsSettings(BaseSettings):
     AXIOM_API_KEY: str = ""
     AXIOM_ORG_ID: str = ""
     AXIOM_DATASET_NAME: str = "echo-backend"
+    AXIOM_QUEUE_SIZE: int = 10000  ## Events waiting to be shipped, the new ones are dropped when full
+    AXIOM_BATCH_SIZE: int = 500
+    AXIOM_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AXIOM_TIMEOUT_SECONDS: float = 5.0
+    AXIOM_BODY_SAMPLE_RATE: float = 1.0  ## Share of the JSON requests with their body logged
+    AXIOM_MAX_BODY_SIZE: int = 16384  ## Bytes of the body logged, 0 to not log them
     SUPABASE_URL: str
     SUPABASE_PRIVATE_KEY: str
 
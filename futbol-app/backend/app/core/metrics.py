@@ -0,0 +1,29 @@
+"""Process wide counters to expose internal decisions (routing, caches...) as metrics"""
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = Metrics()
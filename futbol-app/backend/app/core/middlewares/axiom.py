@@ -1,19 +1,33 @@
+import json
+import logging
+import queue
+import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Callable
+from typing import Dict, List
 
 import requests
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.middlewares.server_timing import SERVER_TIMING_STATE_KEY
+
+logger = logging.getLogger(__name__)
+
+# Put in the queue by `AxiomShipper.close` to wake up the worker
+_CLOSE = object()
+# Put in the queue by `AxiomShipper.flush` to send the current batch without waiting
+_FLUSH = object()
 
 
 class AxiomClient:
-    def __init__(self, api_key, dataset_name) -> None:
+    def __init__(self, api_key, dataset_name, timeout: float | None = None) -> None:
         self.dataset_name = dataset_name
         self.url = f"https://api.axiom.co/v1/datasets/{dataset_name}/ingest"
+        self.timeout = timeout
         ## Create requests session with the API key as header
         self.session = requests.Session()
         self.session.headers = {
@@ -22,50 +36,271 @@ class AxiomClient:
         }
 
     def ingest_events(self, events):
-        return self.session.post(self.url, json=events)
+        return self.session.post(self.url, json=events, timeout=self.timeout)
+
+
+def _parse_body(event: Dict) -> Dict:
+    """The body copied by `AxiomMiddleware`: the parsed JSON, or the text when it can't be"""
+    body = event.pop("body", None)
+    if not isinstance(body, (bytes, bytearray)):
+        # Already JSON safe (or no body)
+        event["body"] = body or {}
+        return event
+
+    event["body"] = {}
+    if not body:
+        return event
+
+    try:
+        if not event.get("body_truncated"):
+            event["body"] = json.loads(body)
+            return event
+    except ValueError:
+        pass
+    event["body_text"] = body.decode(errors="replace")
+    return event
+
+
+class AxiomShipper:
+    """
+    Ships the events to Axiom from a background thread, so the requests don't wait for it.
+
+    The events wait in a bounded queue and are sent in batches of up to `batch_size`, at most
+    `flush_interval` seconds after the first one of the batch was queued. When Axiom can't keep
+    up and the queue is full the new events are dropped (`axiom.events.dropped`) instead of
+    growing the memory or blocking the request. `close` sends what is left in the queue.
+
+    In AWS Lambda (`app.lambda_deploy`) the process is frozen as soon as the invocation returns
+    and there's no shutdown event, so the handler calls `flush` at the end of every invocation
+    to send the events of the request before returning.
+
+    The events have the format of `AxiomMiddleware`, their raw `body` is parsed in the
+    background thread before they are sent (see `_parse_body`), out of the request path.
+    """
 
-    def no_response_ingest_events(self, events):
-        with ThreadPoolExecutor() as executor:
-            executor.submit(self.ingest_events, events)
+    def __init__(
+        self,
+        client: AxiomClient,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Events queued and not sent (or failed) yet, `flush` waits for it to be 0
+        self._pending = 0
+        self._sent = threading.Condition()
 
+    def enqueue(self, event: Dict) -> bool:
+        """Queue the event without blocking, returns False if it was dropped"""
+        if self._closed.is_set():
+            metrics.increment("axiom.events.dropped")
+            return False
+
+        self._start()
+        with self._sent:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._mark_done(1)
+            metrics.increment("axiom.events.dropped")
+            return False
+
+        metrics.increment("axiom.events.queued")
+        return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """
+        Send the queued events now and wait (up to `timeout` seconds) until they are shipped
+        (or failed), returns False if some of them are still waiting
+        """
+        if self._thread is None:
+            return True
+
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass  # The worker is busy draining it, the batches are sent without waiting
+        with self._sent:
+            flushed = self._sent.wait_for(lambda: self._pending == 0, timeout)
+        if not flushed:
+            logger.warning("Axiom shipper flushed with %s events not sent", self._pending)
+        return flushed
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Stop accepting events and wait (up to `timeout` seconds) for the queue to be sent"""
+        self._closed.set()
+        if self._thread is None:
+            return
+
+        try:
+            self._queue.put_nowait(_CLOSE)
+        except queue.Full:
+            pass  # The worker is busy draining it, it checks `_closed` after every batch
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Axiom shipper closed with %s events not sent", self.depth())
 
-class AxiomMiddleware(BaseHTTPMiddleware):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.client = AxiomClient(settings.AXIOM_API_KEY, settings.AXIOM_DATASET_NAME)
+    def _start(self) -> None:
+        # Started on the first event, so it is running in the process (worker) that serves
+        # the requests and nothing is started when the middleware is not used
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="axiom-shipper", daemon=True)
+                self._thread.start()
 
-    async def dispatch(self, request: Request, call_next: Callable):
-        body = {}
-        if request.headers.get("Content-Type") == "application/json":
+    def _run(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            if batch := self._next_batch():
+                self._send(batch)
+
+    def _next_batch(self) -> List[Dict]:
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while item is not _CLOSE and item is not _FLUSH:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            # Past the deadline only what is already queued is added to the batch
+            timeout = deadline - time.monotonic()
             try:
-                body = await request.json()
-            except Exception as e:
-                print(e)
-
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        user_id = getattr(request.state, "user_id", "No Auth")
-        user_email = getattr(request.state, "email", "No Auth")
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch
+
+    def _mark_done(self, count: int) -> None:
+        with self._sent:
+            self._pending -= count
+            self._sent.notify_all()
+
+    def _send(self, batch: List[Dict]) -> None:
         try:
-            self.client.ingest_events(
-                events=[
-                    {
-                        "user_id": user_id,
-                        "email": user_email,
-                        "environment": settings.ENVIRONMENT,
-                        "_time": datetime.now(tz=timezone.utc).isoformat(),
-                        "host": request.client.host,
-                        "method": request.method,
-                        "path": request.url.path,
-                        "url": str(request.url),
-                        "request_duration": process_time,
-                        "body": body,
-                        "status_code": response.status_code,
-                    }
-                ],
-            )
+            batch = [_parse_body(event) for event in batch]
+            response = self.client.ingest_events(batch)
+            response.raise_for_status()
         except Exception as e:
-            print(e)
+            logger.warning("Failed to ship %s events to Axiom: %s", len(batch), e)
+            metrics.increment("axiom.batches.failed")
+            metrics.increment("axiom.events.failed", len(batch))
+            return
+        finally:
+            self._mark_done(len(batch))
+
+        metrics.increment("axiom.batches.sent")
+        metrics.increment("axiom.events.sent", len(batch))
+
+
+axiom_shipper = AxiomShipper(
+    AxiomClient(
+        settings.AXIOM_API_KEY,
+        settings.AXIOM_DATASET_NAME,
+        timeout=settings.AXIOM_TIMEOUT_SECONDS,
+    ),
+    queue_size=settings.AXIOM_QUEUE_SIZE,
+    batch_size=settings.AXIOM_BATCH_SIZE,
+    flush_interval=settings.AXIOM_FLUSH_INTERVAL_SECONDS,
+)
+
 
-        return response
+class AxiomMiddleware:
+    """
+    Request telemetry as a raw ASGI middleware, the request and response messages pass through
+    untouched.
+
+    The JSON bodies of a `body_sample_rate` share of the requests are copied as they are
+    received, up to `max_body_size` bytes, and parsed by the shipper thread (see `_parse_body`),
+    so the body is never buffered or parsed twice in the request path. `request_duration` is
+    the time until the response starts (`http.response.start`) and `response_duration` until its
+    last byte is sent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        shipper: AxiomShipper = axiom_shipper,
+        body_sample_rate: float = settings.AXIOM_BODY_SAMPLE_RATE,
+        max_body_size: int = settings.AXIOM_MAX_BODY_SIZE,
+    ) -> None:
+        self.app = app
+        self.shipper = shipper
+        self.body_sample_rate = body_sample_rate
+        self.max_body_size = max_body_size
+
+    def _capture_body(self, scope: Scope) -> bool:
+        if self.max_body_size <= 0 or random.random() >= self.body_sample_rate:
+            return False
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                return value.startswith(b"application/json")
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        response_start_time = None
+        status_code = 500
+        chunks: List[bytes] = []
+        body_size = 0
+        capture_body = self._capture_body(scope)
+
+        async def receive_and_copy() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request" and body_size < self.max_body_size:
+                chunk = message.get("body", b"")
+                chunks.append(chunk[: self.max_body_size - body_size])
+                body_size += len(chunk)
+            return message
+
+        async def send_and_time(message: Message) -> None:
+            nonlocal response_start_time, status_code
+            if message["type"] == "http.response.start":
+                response_start_time = time.perf_counter()
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_copy if capture_body else receive, send_and_time)
+        finally:
+            end_time = time.perf_counter()
+            state = scope.get("state", {})
+            self.shipper.enqueue(
+                {
+                    "user_id": state.get("user_id", "No Auth"),
+                    "email": state.get("email", "No Auth"),
+                    "environment": settings.ENVIRONMENT,
+                    "_time": datetime.now(tz=timezone.utc).isoformat(),
+                    "host": scope["client"][0] if scope.get("client") else None,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "url": str(URL(scope=scope)),
+                    "request_duration": ((response_start_time or end_time) - start_time) * 1000,
+                    "response_duration": (end_time - start_time) * 1000,
+                    # Raw bytes, `AxiomShipper` turns them into JSON in its thread
+                    "body": b"".join(chunks) if capture_body else None,
+                    "body_truncated": body_size > self.max_body_size,
+                    "status_code": status_code,
+                    # Only when ServerTimingMiddleware is enabled
+                    "server_timing": state.get(SERVER_TIMING_STATE_KEY),
+                }
+            )
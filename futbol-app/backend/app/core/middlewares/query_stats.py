@@ -0,0 +1,80 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database.query_stats import QueryStats, request_observers, track_queries
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_HEADER = "X-DB-Queries"
+
+
+def _default_add_header() -> bool:
+    if settings.DB_QUERY_STATS_HEADER is not None:
+        return settings.DB_QUERY_STATS_HEADER
+    return settings.ENVIRONMENT not in ("prod", "production")
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the statements of every request (see `app.database.query_stats`), logs the likely
+    N+1s (a statement repeated `DB_N_PLUS_ONE_THRESHOLD` times) and, outside production, sends
+    the figures in the `X-DB-Queries` response header.
+
+    The header has the statements executed until the response starts, the log and the observers
+    get the ones of the whole request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        add_header: bool | None = None,
+        n_plus_one_threshold: int = settings.DB_N_PLUS_ONE_THRESHOLD,
+    ) -> None:
+        self.app = app
+        self.add_header = _default_add_header() if add_header is None else add_header
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.add_header:
+                    MutableHeaders(scope=message).append(QUERY_STATS_HEADER, stats.header_value())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats if self.add_header else send)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        metrics.increment("db.requests.statements", stats.statements)
+        if repeated := stats.repeated(self.n_plus_one_threshold):
+            metrics.increment("db.requests.n_plus_one")
+            logger.warning(
+                "Likely N+1 in %s %s: %s statements in %.1f ms, repeated %s",
+                scope["method"],
+                scope["path"],
+                stats.statements,
+                stats.duration_ms,
+                {shape[:200]: count for shape, count in repeated.items()},
+            )
+        else:
+            logger.debug(
+                "%s %s: %s statements in %.1f ms",
+                scope["method"],
+                scope["path"],
+                stats.statements,
+                stats.duration_ms,
+            )
+
+        for observer in list(request_observers):
+            observer(stats)
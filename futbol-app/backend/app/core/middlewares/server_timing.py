@@ -0,0 +1,52 @@
+import time
+from contextlib import ExitStack
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.server_timing import track_timings
+from app.database.query_stats import current_query_stats, track_queries
+
+SERVER_TIMING_HEADER = "Server-Timing"
+# Key of `scope["state"]` with the timings, for the Axiom event
+SERVER_TIMING_STATE_KEY = "server_timing"
+
+
+class ServerTimingMiddleware:
+    """
+    Times the phases of every request (see `app.core.server_timing`) and sends them in the
+    `Server-Timing` header. They are also left in the request state for `AxiomMiddleware`.
+
+    It reuses the statement stats of `QueryStatsMiddleware` when it wraps this one.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        with ExitStack() as stack:
+            stats = current_query_stats() or stack.enter_context(track_queries())
+            timings = stack.enter_context(track_timings())
+            statements_before = stats.statements
+            db_before = stats.duration_ms
+
+            async def send_with_timings(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    db = stats.duration_ms - db_before
+                    timings.add("db", db, f"{stats.statements - statements_before} statements")
+                    if "repository" in timings.durations:
+                        timings.add("orm", max(timings.durations["repository"] - db, 0.0))
+                    timings.add("total", (time.perf_counter() - start_time) * 1000)
+
+                    MutableHeaders(scope=message).append(
+                        SERVER_TIMING_HEADER, timings.header_value()
+                    )
+                    scope.setdefault("state", {})[SERVER_TIMING_STATE_KEY] = timings.as_fields()
+                await send(message)
+
+            await self.app(scope, receive, send_with_timings)
@@ -0,0 +1,151 @@
+"""
+Phases of a request for the `Server-Timing` header (see `ServerTimingMiddleware`).
+
+The timings of the current request live in a context variable, so the phases are recorded from
+any layer (and from the threadpool, which inherits the context) with `phase` or `timed`, which
+do nothing when the request is not being timed. The routes of `TimedRoute` record:
+
+- `handler`: the endpoint function, including the repositories.
+- `repository`: the repository methods (see `SQLAlchemyRepository.read_only` and
+  `handle_commit_errors`).
+- `validation` and `serialization`: the response model validation and dump.
+- `encoding`: the JSON encoding of the response.
+
+`ServerTimingMiddleware` adds `db` (statement execution, from `app.database.query_stats`), `orm`
+(what the repositories spent outside the database: building the queries, fetching the rows and
+loading the ORM instances) and `total` (until the response starts).
+"""
+
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Callable, Dict, Iterator
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+from starlette.routing import request_response
+
+
+class ServerTimings:
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+        self.descriptions: Dict[str, str] = {}
+        self._active: set[str] = set()
+
+    def add(self, name: str, duration_ms: float, description: str | None = None) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration_ms
+        if description:
+            self.descriptions[name] = description
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # A phase inside itself (a repository method calling another one) is only counted once
+        if name in self._active:
+            yield
+            return
+
+        self._active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active.discard(name)
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def header_value(self) -> str:
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = f"{name};dur={duration:.1f}"
+            if description := self.descriptions.get(name):
+                metric += f';desc="{description}"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+    def as_fields(self) -> Dict[str, float]:
+        return {f"{name}_ms": round(duration, 3) for name, duration in self.durations.items()}
+
+
+_current_timings: ContextVar[ServerTimings | None] = ContextVar("server_timings", default=None)
+
+
+def current_timings() -> ServerTimings | None:
+    return _current_timings.get()
+
+
+@contextmanager
+def track_timings() -> Iterator[ServerTimings]:
+    timings = ServerTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time of the block to the `name` phase of the request (if it's being timed)"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    with timings.phase(name):
+        yield
+
+
+def timed(name: str) -> Callable:
+    """Decorator version of `phase`, for sync and async functions"""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with phase(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@lru_cache
+def _timed_response_class(response_class: type[Response]) -> type[Response]:
+    class TimedResponse(response_class):
+        def render(self, content) -> bytes:
+            with phase("encoding"):
+                return super().render(content)
+
+    TimedResponse.__name__ = response_class.__name__
+    return TimedResponse
+
+
+class TimedRoute(APIRoute):
+    """`APIRoute` that records the `handler`, `validation`, `serialization` and `encoding` phases"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.dependant.call = timed("handler")(self.dependant.call)
+        if field := self.secure_cloned_response_field:
+            field.validate = timed("validation")(field.validate)
+            field.serialize = timed("serialization")(field.serialize)
+
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            self.response_class = DefaultPlaceholder(_timed_response_class(response_class.value))
+        else:
+            self.response_class = _timed_response_class(response_class)
+
+        # The handler built by `APIRoute.__init__` has the original response class
+        self.app = request_response(self.get_route_handler())
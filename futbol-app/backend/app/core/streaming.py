@@ -0,0 +1,93 @@
+"""Helpers to stream big collections as NDJSON/CSV responses"""
+
+import csv
+import io
+import json
+from enum import Enum
+from typing import Iterable, Iterator, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+STREAM_CHUNK_SIZE = 500
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.CSV: "text/csv",
+}
+
+
+def _chunked(lines: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """Join the lines so we don't send a body message per row"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def ndjson_lines(items: Iterable[BaseModel]) -> Iterator[str]:
+    for item in items:
+        yield item.model_dump_json() + "\n"
+
+
+def csv_lines(items: Iterable[BaseModel], schema: Type[BaseModel]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(schema.model_fields.keys()))
+
+    def _flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return line
+
+    writer.writeheader()
+    yield _flush()
+
+    for item in items:
+        row = {
+            key: json.dumps(value) if isinstance(value, (dict, list)) else value
+            for key, value in item.model_dump(mode="json").items()
+        }
+        writer.writerow(row)
+        yield _flush()
+
+
+def stream_response(
+    items: Iterable[BaseModel],
+    schema: Type[BaseModel],
+    stream_format: StreamFormat = StreamFormat.NDJSON,
+    filename: str | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> StreamingResponse:
+    """
+    Build a chunked response from an iterable of pydantic models.
+
+    The items are consumed lazily while the response is being sent, so when they come from a
+    server side cursor (see `SQLAlchemyRepository.stream_all`) the memory usage doesn't depend
+    on the number of rows.
+    """
+    if stream_format == StreamFormat.CSV:
+        lines = csv_lines(items, schema)
+    else:
+        lines = ndjson_lines(items)
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{stream_format.value}"'
+
+    return StreamingResponse(
+        _chunked(lines, chunk_size),
+        media_type=MEDIA_TYPES[stream_format],
+        headers=headers,
+    )
@@ -1,12 +1,42 @@
 import json
+import random
+from contextlib import contextmanager
+from typing import List
 
+from fastapi import Request
+from fastapi_injector import Injected
 from injector import Inject
-from sqlalchemy import MetaData, create_engine, event, text
-from sqlalchemy.engine import Engine
-from sqlalchemy.orm import DeclarativeBase, scoped_session, sessionmaker
+from sqlalchemy import Delete, Insert, MetaData, Select, Update, create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_scoped_session,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session, scoped_session, sessionmaker
 
 from app.context import get_request_context, req_or_thread_id
 from app.core.config import settings
+from app.core.metrics import metrics
+
+REPLICA_ENGINES_KEY = "replica_engines"
+USE_REPLICA_KEY = "use_replica"
+# Replica picked by the session, all its reads go to the same one
+SESSION_REPLICA_KEY = "session_replica"
+STICKY_PRIMARY_KEY = "sticky_primary"
+DB_ROLES_KEY = "db_roles"
+# Settings held by a connection (in `Connection.info`, which lives as long as the DBAPI
+# connection): the defaults set when it's opened and the ones of its current transaction
+CONNECTION_CONFIG_KEY = "connection_config"
+TRANSACTION_CONFIG_KEY = "transaction_config"
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 meta = MetaData(
     naming_convention={
@@ -27,8 +57,44 @@ class Base(DeclarativeBase):
         return self.__tablename__.capitalize()
 
 
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def set_connection_defaults(dbapi_connection, connection_record) -> None:
+    """
+    Set the settings shared by every transaction (the statement timeout and the admin role) at
+    the session level when the connection is opened, so the transactions that don't need
+    anything else have no setup at all (see `apply_session_config`).
+
+    It assumes every connection of the pool is its own server session, as with a direct
+    connection or a session mode pooler. Behind a transaction mode pooler (pgbouncer, Supabase
+    on port 6543) the next transaction may run on another server connection, without these
+    settings or with the ones of another client. Turn `DB_SESSION_LEVEL_DEFAULTS` off there:
+    this hook is not installed and every transaction sets everything locally.
+
+    It runs on the raw DBAPI connection, the values come from the settings and are inlined to
+    not depend on the paramstyle of the driver.
+    """
+    defaults = {
+        "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+        "role": settings.DB_ADMIN_ROLE,
+    }
+    cursor = dbapi_connection.cursor()
+    cursor.execute(
+        "SELECT "
+        + ", ".join(
+            f"set_config({_quote_literal(name)}, {_quote_literal(value)}, false)"
+            for name, value in defaults.items()
+        )
+    )
+    cursor.close()
+    dbapi_connection.commit()
+    connection_record.info[CONNECTION_CONFIG_KEY] = defaults
+
+
 def create_sqlalchemy_engine(*, db_url: str, pool_size: int) -> Engine:
-    return create_engine(
+    engine = create_engine(
         db_url,
         pool_pre_ping=settings.DB_POOL_PRE_PING,
         pool_recycle=settings.POOL_RECYCLE_MINUTES * 60,
@@ -36,6 +102,146 @@ def create_sqlalchemy_engine(*, db_url: str, pool_size: int) -> Engine:
         pool_size=pool_size,
         max_overflow=100,
     )
+    if engine.dialect.name == "postgresql" and settings.DB_SESSION_LEVEL_DEFAULTS:
+        event.listen(engine, "connect", set_connection_defaults)
+    return engine
+
+
+def to_async_db_url(db_url: str) -> str:
+    """Same database url but using the asyncio driver (asyncpg for postgres)"""
+    url = make_url(db_url)
+    if drivername := ASYNC_DRIVERS.get(url.drivername):
+        url = url.set(drivername=drivername)
+    return url.render_as_string(hide_password=False)
+
+
+def create_async_sqlalchemy_engine(*, db_url: str, pool_size: int) -> AsyncEngine:
+    engine = create_async_engine(
+        to_async_db_url(db_url),
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.POOL_RECYCLE_MINUTES * 60,
+        echo=settings.DEBUG_MODE,
+        pool_size=pool_size,
+        max_overflow=100,
+    )
+    if engine.dialect.name == "postgresql" and settings.DB_SESSION_LEVEL_DEFAULTS:
+        event.listen(engine.sync_engine, "connect", set_connection_defaults)
+    return engine
+
+
+def session_config_params(admin_db_role: str, auth_db_role: str) -> dict:
+    """Values of the settings applied at the beginning of every transaction"""
+    req_ctx = get_request_context()
+
+    db_role = admin_db_role
+    if settings.ENABLE_ACCESS_CONTROL and req_ctx.authenticated:
+        db_role = auth_db_role
+
+    return {
+        "jwt": json.dumps(req_ctx.jwt),
+        "role": db_role,
+        "timeout": settings.DB_STATEMENT_TIMEOUT_MS,
+    }
+
+
+def apply_session_config(connection, admin_db_role: str, auth_db_role: str) -> None:
+    """
+    Apply the settings of the request to the current transaction, in a single statement and
+    only the ones the connection doesn't already hold.
+
+    The statement timeout and the admin role are usually the defaults of the connection (see
+    `set_connection_defaults`), so only the requests with RLS (another role) need the role
+    and the JWT claims, which are local to the transaction. Without those defaults
+    (`DB_SESSION_LEVEL_DEFAULTS` off) all of them are set in every transaction. The saved
+    round trips are counted in `db.session_config.skipped`.
+    """
+    params = session_config_params(admin_db_role, auth_db_role)
+    wanted = {"statement_timeout": str(params["timeout"]), "role": params["role"]}
+    if params["role"] != admin_db_role:
+        wanted["request.jwt.claims"] = params["jwt"]
+
+    held = {
+        **connection.info.get(CONNECTION_CONFIG_KEY, {}),
+        **connection.info.get(TRANSACTION_CONFIG_KEY, {}),
+    }
+    pending = {name: value for name, value in wanted.items() if held.get(name) != value}
+    if not pending:
+        metrics.increment("db.session_config.skipped")
+        return
+
+    # asyncpg uses prepared statements (a single statement per execute and no parameters in
+    # `SET`), so everything is applied with `set_config`
+    statement = text(
+        "SELECT "
+        + ", ".join(f"set_config(:name_{i}, :value_{i}, true)" for i in range(len(pending)))
+    ).bindparams(
+        **{f"name_{i}": name for i, name in enumerate(pending)},
+        **{f"value_{i}": value for i, value in enumerate(pending.values())},
+    )
+    connection.execute(statement)
+    connection.info[TRANSACTION_CONFIG_KEY] = {
+        **connection.info.get(TRANSACTION_CONFIG_KEY, {}),
+        **pending,
+    }
+    metrics.increment("db.session_config.applied")
+
+
+class ReplicaEngines(list):
+    """Engines of the read replicas, empty when there are no replicas configured"""
+
+
+class AsyncReplicaEngines(list):
+    """asyncio engines of the read replicas, empty when there are no replicas configured"""
+
+
+class ReplicaRouting:
+    """
+    Mixin of the sessions that send the reads to a replica when they are allowed to.
+
+    A SELECT goes to a replica if the session is inside the `replica()` block of its database
+    resource (read only repository methods) or the request is read only (GET endpoints).
+    Everything else goes to the primary, and once the session writes something all its
+    statements stick to the primary so the request reads its own writes.
+
+    The replica is picked once per session (until it's closed), so the reads of a request don't
+    mix replicas with different lag and only hold a connection of one of them.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replicas = self.info.get(REPLICA_ENGINES_KEY)
+        if not replicas:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info[STICKY_PRIMARY_KEY] = True
+            metrics.increment("db.routing.primary.write")
+        elif self.info.get(STICKY_PRIMARY_KEY):
+            metrics.increment("db.routing.primary.sticky")
+        elif isinstance(clause, Select) and (
+            self.info.get(USE_REPLICA_KEY) or get_request_context().read_only
+        ):
+            metrics.increment("db.routing.replica")
+            if SESSION_REPLICA_KEY not in self.info:
+                self.info[SESSION_REPLICA_KEY] = random.choice(replicas)
+            return self.info[SESSION_REPLICA_KEY]
+        else:
+            metrics.increment("db.routing.primary.read")
+
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+    def close(self) -> None:
+        super().close()
+        self.info.pop(SESSION_REPLICA_KEY, None)
+
+
+class RoutingSession(ReplicaRouting, Session):
+    """Session of `DatabaseResource`"""
+
+
+def route_reads_to_replica(request: Request):
+    """Dependency that marks the safe (GET/HEAD) requests as read only"""
+    req_ctx = get_request_context()
+    req_ctx.read_only = request.method in ("GET", "HEAD")
 
 
 class DatabaseResource:
@@ -44,15 +250,23 @@ class DatabaseResource:
     def __init__(
         self,
         engine: Inject[Engine],
+        replica_engines: Inject[ReplicaEngines] = None,
         admin_db_role: str = settings.DB_ADMIN_ROLE,
         auth_db_role: str = settings.DB_AUTH_ROLE,
     ):
         self.engine = engine
+        self.replica_engines: List[Engine] = list(replica_engines or [])
         self.admin_db_role = admin_db_role
         self.auth_db_role = auth_db_role
 
         self.session_factory = scoped_session(
-            sessionmaker(autocommit=False, autoflush=False, bind=self.engine),
+            sessionmaker(
+                class_=RoutingSession,
+                autocommit=False,
+                autoflush=False,
+                bind=self.engine,
+                info={REPLICA_ENGINES_KEY: self.replica_engines},
+            ),
             scopefunc=req_or_thread_id,
         )
         self.session = self.session_factory
@@ -60,35 +274,33 @@ class DatabaseResource:
         self._add_session_event_listener()
 
     def _add_session_event_listener(self):
-        """Attach a listener to run SQL when a session starts"""
+        """Attach a listener to apply the settings of the request when a transaction starts"""
 
         @event.listens_for(self.session_factory, "after_begin")
         def set_custom_config(session, transaction, connection):
-            req_ctx = get_request_context()
-
-            db_role = self.admin_db_role
-            if settings.ENABLE_ACCESS_CONTROL and req_ctx.authenticated:
-                db_role = self.auth_db_role
-
-            custom_sql = text(
-                """
-                SELECT set_config(
-                    'request.jwt.claims',
-                    :jwt,
-                    true
-                );
+            # A new transaction, the local settings of the previous one are gone
+            connection.info.pop(TRANSACTION_CONFIG_KEY, None)
+            apply_session_config(connection, self.admin_db_role, self.auth_db_role)
 
-                SET LOCAL statement_timeout=:timeout;
+    def apply_session_config(self) -> None:
+        """
+        Apply again the settings of the request to the current transaction (if there's one),
+        after the request context changed (e.g. `DisableRLS`)
+        """
+        session = self.session()
+        if session.in_transaction():
+            apply_session_config(session.connection(), self.admin_db_role, self.auth_db_role)
 
-                SET LOCAL ROLE :role;
-            """
-            ).bindparams(
-                jwt=json.dumps(req_ctx.jwt),
-                role=db_role,
-                timeout=settings.DB_STATEMENT_TIMEOUT_MS,
-            )
-
-            connection.execute(custom_sql)
+    @contextmanager
+    def replica(self):
+        """Allow the SELECTs executed inside the block to go to a read replica"""
+        session = self.session()
+        previous = session.info.get(USE_REPLICA_KEY, False)
+        session.info[USE_REPLICA_KEY] = True
+        try:
+            yield session
+        finally:
+            session.info[USE_REPLICA_KEY] = previous
 
     def create_database(self) -> None:
         Base.metadata.create_all(self.engine)
@@ -105,6 +317,86 @@ class DatabaseResource:
         self.session.remove()
 
 
+class AsyncRequestSession(ReplicaRouting, Session):
+    """
+    Sync session wrapped by the `AsyncSession`s of `AsyncDatabaseResource`, with the same replica
+    routing as `RoutingSession` (the replicas are the `sync_engine` of the asyncio ones, like the
+    primary bind of the `AsyncSession`).
+
+    It doesn't extend `RoutingSession`: the session events of `DatabaseResource` are listened on
+    that class and would run on these sessions too.
+    """
+
+
+@event.listens_for(AsyncRequestSession, "after_begin")
+def set_async_custom_config(session, transaction, connection):
+    """Same setup as `DatabaseResource`, with the roles of the `AsyncDatabaseResource`"""
+    admin_db_role, auth_db_role = session.info[DB_ROLES_KEY]
+    connection.info.pop(TRANSACTION_CONFIG_KEY, None)
+    apply_session_config(connection, admin_db_role, auth_db_role)
+
+
+class AsyncDatabaseResource:
+    """
+    Class to handle the asyncio database sessions.
+
+    It's a singleton, the sessions are scoped by request (or thread) like the ones of
+    `DatabaseResource`, and `close_async_session` removes them at the end of the request.
+    """
+
+    def __init__(
+        self,
+        engine: Inject[AsyncEngine],
+        replica_engines: Inject[AsyncReplicaEngines] = None,
+        admin_db_role: str = settings.DB_ADMIN_ROLE,
+        auth_db_role: str = settings.DB_AUTH_ROLE,
+    ):
+        self.engine = engine
+        self.replica_engines: List[AsyncEngine] = list(replica_engines or [])
+        self.session_factory = async_scoped_session(
+            async_sessionmaker(
+                bind=self.engine,
+                class_=AsyncSession,
+                sync_session_class=AsyncRequestSession,
+                autoflush=False,
+                # Expired attributes can't be lazy loaded once we are out of the session
+                expire_on_commit=False,
+                info={
+                    DB_ROLES_KEY: (admin_db_role, auth_db_role),
+                    REPLICA_ENGINES_KEY: [
+                        replica.sync_engine for replica in self.replica_engines
+                    ],
+                },
+            ),
+            scopefunc=req_or_thread_id,
+        )
+        self.session = self.session_factory
+
+    @contextmanager
+    def replica(self):
+        """Allow the SELECTs executed inside the block to go to a read replica"""
+        session = self.session()
+        previous = session.info.get(USE_REPLICA_KEY, False)
+        session.info[USE_REPLICA_KEY] = True
+        try:
+            yield session
+        finally:
+            session.info[USE_REPLICA_KEY] = previous
+
+    async def remove(self) -> None:
+        await self.session.remove()
+
+
+async def close_async_session(
+    async_db: AsyncDatabaseResource = Injected(AsyncDatabaseResource),
+):
+    """Dependency that closes the asyncio session of the request (if it was used)"""
+    try:
+        yield
+    finally:
+        await async_db.remove()
+
+
 # Crear la instancia de engine y DatabaseResource
 engine = create_sqlalchemy_engine(
     db_url=settings.DB_URL,
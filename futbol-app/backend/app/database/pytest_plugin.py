@@ -0,0 +1,17 @@
+"""
+Fixtures for the tests, enabled with `pytest_plugins = ["app.database.pytest_plugin"]`.
+
+    def test_get_jugadores(client, query_budget):
+        with query_budget(4, max_repeated=1):
+            client.get("/jugadores")
+"""
+
+import pytest
+
+from app.database.query_stats import query_budget as _query_budget
+
+
+@pytest.fixture
+def query_budget():
+    """`app.database.query_stats.query_budget`, fails the test when the budget is exceeded"""
+    return _query_budget
@@ -0,0 +1,113 @@
+"""
+Statements executed per request, from the SQLAlchemy engine events.
+
+`track_queries` sets the `QueryStats` of the current context, and every statement executed
+inside it (by any engine, including the threads of the threadpool and the greenlets of the
+asyncio engine, which inherit the context) is added to it: the count, the time and the
+repetitions of every statement shape. The shape is the SQL text with the parameters as
+placeholders, so the lazy loads or lookups of an N+1 are the same shape repeated.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+_QUERY_START_KEY = "_query_stats_start"
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    duration_ms: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.statements += 1
+        self.duration_ms += duration_ms
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int = settings.DB_N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """The shapes executed at least `threshold` times, likely an N+1"""
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+    def max_repetitions(self) -> int:
+        return max(self.shapes.values(), default=0)
+
+    def header_value(self) -> str:
+        return (
+            f"statements={self.statements}, time={self.duration_ms:.1f}ms, "
+            f"max_repeated={self.max_repetitions()}"
+        )
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# Called with the stats of every request tracked by `QueryStatsMiddleware`
+request_observers: List[Callable[[QueryStats], None]] = []
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def query_budget(
+    max_statements: int, max_repeated: int | None = None
+) -> Iterator[List[QueryStats]]:
+    """
+    Fail if the statements executed inside the block, or the ones of any request served
+    meanwhile, go over `max_statements` (or repeat a shape more than `max_repeated` times).
+
+    Yields the stats checked: the ones of the block and then one per request.
+    """
+    checked: List[QueryStats] = []
+    with track_queries() as stats:
+        checked.append(stats)
+        request_observers.append(checked.append)
+        try:
+            yield checked
+        finally:
+            request_observers.remove(checked.append)
+
+    for stats in checked:
+        assert stats.statements <= max_statements, (
+            f"{stats.statements} statements executed, the budget is {max_statements}: "
+            f"{dict(stats.shapes.most_common(5))}"
+        )
+        if max_repeated is not None:
+            assert stats.max_repetitions() <= max_repeated, (
+                f"Statement repeated more than {max_repeated} times: "
+                f"{stats.repeated(max_repeated + 1)}"
+            )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        setattr(context, _QUERY_START_KEY, time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, _QUERY_START_KEY, None)
+    if stats is not None and start is not None:
+        stats.record(statement, (time.perf_counter() - start) * 1000)
@@ -9,11 +9,26 @@ from fastapi_injector import (
     attach_injector,
 )
 from fastapi_injector.exceptions import RequestScopeError
-from injector import Injector, InstanceProvider, Provider, ScopeDecorator, singleton
+from injector import (
+    CallableProvider,
+    Injector,
+    InstanceProvider,
+    Provider,
+    ScopeDecorator,
+    singleton,
+)
 from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from app.context import RequestContext, req_or_thread_id
-from app.database.base import DatabaseResource, create_sqlalchemy_engine
+from app.database.base import (
+    AsyncDatabaseResource,
+    AsyncReplicaEngines,
+    DatabaseResource,
+    ReplicaEngines,
+    create_async_sqlalchemy_engine,
+    create_sqlalchemy_engine,
+)
 from app.dependency_registry import registry
 
 T = TypeVar("T")
@@ -51,10 +66,13 @@ class RequestOrThreadScope(RequestScope):
 class DependencyInjector(Injector):
     """Dependency injector for the app"""
 
-    def __init__(self, db_url: str, pool_size: int = 5) -> None:
+    def __init__(
+        self, db_url: str, pool_size: int = 5, replica_urls: list[str] | None = None
+    ) -> None:
         super().__init__()
         self.db_url = db_url
         self.pool_size = pool_size
+        self.replica_urls = replica_urls or []
 
     def apply_bindings(self):
         """Apply the bindings for the injector. Each class is auto-binded implicitly"""
@@ -64,6 +82,35 @@ class DependencyInjector(Injector):
             to=create_sqlalchemy_engine(db_url=self.db_url, pool_size=self.pool_size),
             scope=singleton,
         )
+        self.binder.bind(
+            ReplicaEngines,
+            to=ReplicaEngines(
+                create_sqlalchemy_engine(db_url=url, pool_size=self.pool_size)
+                for url in self.replica_urls
+            ),
+            scope=singleton,
+        )
+        # Created on first use, so the sync only entrypoints (scripts, workers) never load asyncpg
+        self.binder.bind(
+            AsyncEngine,
+            to=CallableProvider(
+                lambda: create_async_sqlalchemy_engine(
+                    db_url=self.db_url, pool_size=self.pool_size
+                )
+            ),
+            scope=singleton,
+        )
+        self.binder.bind(
+            AsyncReplicaEngines,
+            to=CallableProvider(
+                lambda: AsyncReplicaEngines(
+                    create_async_sqlalchemy_engine(db_url=url, pool_size=self.pool_size)
+                    for url in self.replica_urls
+                )
+            ),
+            scope=singleton,
+        )
+        self.binder.bind(AsyncDatabaseResource, to=AsyncDatabaseResource, scope=singleton)
 
         req_or_thread_scope = RequestOrThreadScope(self)
         self.binder.bind(RequestScope, to=req_or_thread_scope, scope=singleton)
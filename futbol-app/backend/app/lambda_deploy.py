@@ -1,6 +1,8 @@
 import lambdawarmer
 from mangum import Mangum
 
+from app.core.config import settings
+from app.core.middlewares.axiom import axiom_shipper
 from app.main import create_app
 
 # Serverless deploy
@@ -9,4 +11,9 @@ api = Mangum(create_app(add_middlewares=True), lifespan="off")
 
 @lambdawarmer.warmer(delay=250)
 def handler(event, context):
-    return api(event, context)
+    try:
+        return api(event, context)
+    finally:
+        # The environment is frozen after returning (and there's no shutdown event with
+        # `lifespan="off"`), the events of the request are sent before
+        axiom_shipper.flush(timeout=settings.AXIOM_TIMEOUT_SECONDS)
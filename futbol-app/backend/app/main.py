@@ -4,7 +4,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
 
 from app.core.config import settings
-from app.core.middlewares.axiom import AxiomMiddleware
+from app.core.middlewares.axiom import AxiomMiddleware, axiom_shipper
+from app.core.middlewares.query_stats import QUERY_STATS_HEADER, QueryStatsMiddleware
+from app.core.middlewares.server_timing import SERVER_TIMING_HEADER, ServerTimingMiddleware
+from app.repositories.sql_repository import warm_up_response_models
 
 from .dependencies import DependencyInjector
 from .routers import get_app_router, get_internal_app_router
@@ -17,12 +20,15 @@ def create_app(
     if dp_injector is None:
         dp_injector = DependencyInjector(
             db_url=settings.DB_URL,
-            pool_size=settings.DB_POOL_SIZE
+            pool_size=settings.DB_POOL_SIZE,
+            replica_urls=settings.DB_REPLICA_URLS,
         )
 
     app = FastAPI()
     internal_app = FastAPI()
 
+    app.add_event_handler("startup", warm_up_response_models)
+
     dp_injector.setup_injections(app)
     dp_injector.setup_injections(internal_app)
 
@@ -32,8 +38,11 @@ def create_app(
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["content-disposition"],
+        expose_headers=["content-disposition", QUERY_STATS_HEADER, SERVER_TIMING_HEADER],
     )
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
 
     router = APIRouter()
     app_router = get_app_router()
@@ -55,6 +64,9 @@ def create_app(
             profiles_sample_rate=settings.SENTRY_PROFILES_SAMPLE_RATE,
         )
         app.add_middleware(AxiomMiddleware)
+        app.add_event_handler(
+            "shutdown", lambda: axiom_shipper.close(timeout=settings.AXIOM_TIMEOUT_SECONDS)
+        )
 
     app.include_router(app_router)
     app.include_router(router)
@@ -0,0 +1,157 @@
+"""agregar_resumen_jugadores
+
+Revision ID: 4f2a9c7d1e35
+Revises: cedd18261dc4
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c7d1e35'
+down_revision: Union[str, None] = 'cedd18261dc4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of `app.modules.estadisticas.triggers` at this revision, so the migration
+# doesn't change when the module does
+CREATE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION actualizar_resumen_jugadores() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE resumen_jugadores AS r SET
+            partidos = r.partidos - d.partidos,
+            titularidades = r.titularidades - d.titularidades,
+            goles = r.goles - d.goles,
+            asistencias = r.asistencias - d.asistencias,
+            tarjetas_amarillas = r.tarjetas_amarillas - d.tarjetas_amarillas,
+            tarjetas_rojas = r.tarjetas_rojas - d.tarjetas_rojas,
+            minutos_jugados = r.minutos_jugados - d.minutos_jugados
+        FROM (
+            SELECT
+                jugador_id,
+                count(*) AS partidos,
+                count(*) FILTER (WHERE titular) AS titularidades,
+                sum(goles) AS goles,
+                sum(asistencias) AS asistencias,
+                sum(tarjetas_amarillas) AS tarjetas_amarillas,
+                sum(tarjetas_rojas) AS tarjetas_rojas,
+                sum(minutos_jugados) AS minutos_jugados
+            FROM filas_anteriores
+            GROUP BY jugador_id
+        ) AS d
+        WHERE r.jugador_id = d.jugador_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumen_jugadores AS r (
+            jugador_id, partidos, titularidades, goles, asistencias,
+            tarjetas_amarillas, tarjetas_rojas, minutos_jugados
+        )
+        SELECT
+            jugador_id,
+            count(*) AS partidos,
+            count(*) FILTER (WHERE titular) AS titularidades,
+            sum(goles) AS goles,
+            sum(asistencias) AS asistencias,
+            sum(tarjetas_amarillas) AS tarjetas_amarillas,
+            sum(tarjetas_rojas) AS tarjetas_rojas,
+            sum(minutos_jugados) AS minutos_jugados
+        FROM filas_nuevas
+        GROUP BY jugador_id
+        ON CONFLICT (jugador_id) DO UPDATE SET
+            partidos = r.partidos + excluded.partidos,
+            titularidades = r.titularidades + excluded.titularidades,
+            goles = r.goles + excluded.goles,
+            asistencias = r.asistencias + excluded.asistencias,
+            tarjetas_amarillas = r.tarjetas_amarillas + excluded.tarjetas_amarillas,
+            tarjetas_rojas = r.tarjetas_rojas + excluded.tarjetas_rojas,
+            minutos_jugados = r.minutos_jugados + excluded.minutos_jugados;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM resumen_jugadores
+        WHERE partidos = 0 AND jugador_id IN (SELECT jugador_id FROM filas_anteriores);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_TRIGGERS_SQL = [
+    "CREATE TRIGGER resumen_jugadores_insert "
+    "AFTER INSERT ON estadisticas REFERENCING NEW TABLE AS filas_nuevas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_resumen_jugadores()",
+    "CREATE TRIGGER resumen_jugadores_update "
+    "AFTER UPDATE ON estadisticas "
+    "REFERENCING OLD TABLE AS filas_anteriores NEW TABLE AS filas_nuevas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_resumen_jugadores()",
+    "CREATE TRIGGER resumen_jugadores_delete "
+    "AFTER DELETE ON estadisticas REFERENCING OLD TABLE AS filas_anteriores "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_resumen_jugadores()",
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS resumen_jugadores_insert ON estadisticas",
+    "DROP TRIGGER IF EXISTS resumen_jugadores_update ON estadisticas",
+    "DROP TRIGGER IF EXISTS resumen_jugadores_delete ON estadisticas",
+]
+
+DROP_FUNCTION_SQL = "DROP FUNCTION IF EXISTS actualizar_resumen_jugadores()"
+
+
+def upgrade() -> None:
+    op.create_table('resumen_jugadores',
+    sa.Column('jugador_id', sa.Uuid(), nullable=False),
+    sa.Column('partidos', sa.Integer(), nullable=False),
+    sa.Column('titularidades', sa.Integer(), nullable=False),
+    sa.Column('goles', sa.Integer(), nullable=False),
+    sa.Column('asistencias', sa.Integer(), nullable=False),
+    sa.Column('tarjetas_amarillas', sa.Integer(), nullable=False),
+    sa.Column('tarjetas_rojas', sa.Integer(), nullable=False),
+    sa.Column('minutos_jugados', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['jugador_id'], ['jugadores.id'], name=op.f('resumen_jugadores_jugador_id_jugadores_fkey'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jugador_id', name=op.f('resumen_jugadores_pkey'))
+    )
+
+    op.execute(CREATE_FUNCTION_SQL)
+    for statement in CREATE_TRIGGERS_SQL:
+        op.execute(statement)
+
+    # Backfill, the table is locked so no write is missed between this and the triggers. It
+    # scans the whole table, without the statement_timeout of env.py
+    op.execute("SET LOCAL statement_timeout = 0")
+    op.execute("LOCK TABLE estadisticas IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        """
+        INSERT INTO resumen_jugadores (
+            jugador_id, partidos, titularidades, goles, asistencias,
+            tarjetas_amarillas, tarjetas_rojas, minutos_jugados
+        )
+        SELECT
+            jugador_id,
+            count(*),
+            count(*) FILTER (WHERE titular),
+            sum(goles),
+            sum(asistencias),
+            sum(tarjetas_amarillas),
+            sum(tarjetas_rojas),
+            sum(minutos_jugados)
+        FROM estadisticas
+        GROUP BY jugador_id
+        """
+    )
+
+
+def downgrade() -> None:
+    for statement in DROP_TRIGGERS_SQL:
+        op.execute(statement)
+    op.execute(DROP_FUNCTION_SQL)
+    op.drop_table('resumen_jugadores')
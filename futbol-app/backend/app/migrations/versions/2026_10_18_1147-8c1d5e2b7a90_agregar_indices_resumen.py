@@ -0,0 +1,45 @@
+"""agregar_indices_resumen
+
+Revision ID: 8c1d5e2b7a90
+Revises: 4f2a9c7d1e35
+Create Date: 2026-10-18 11:47:05.918342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d5e2b7a90'
+down_revision: Union[str, None] = '4f2a9c7d1e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESUMEN_COLUMNS = [
+    'partidos',
+    'goles',
+    'asistencias',
+    'tarjetas_amarillas',
+    'tarjetas_rojas',
+    'minutos_jugados',
+]
+
+
+def upgrade() -> None:
+    for column in RESUMEN_COLUMNS:
+        op.create_index(f'ix_resumen_jugadores_{column}', 'resumen_jugadores', [column, 'jugador_id'], unique=False)
+    op.create_index('ix_resumen_jugadores_tarjetas', 'resumen_jugadores', [sa.text('(tarjetas_amarillas + tarjetas_rojas)'), 'jugador_id'], unique=False)
+    op.create_index('ix_estadisticas_partido_id', 'estadisticas', ['partido_id'], unique=False, postgresql_include=['jugador_id', 'goles', 'asistencias', 'tarjetas_amarillas', 'tarjetas_rojas', 'minutos_jugados', 'titular'])
+    op.create_index('ix_partidos_fecha', 'partidos', ['fecha'], unique=False)
+    op.create_index('ix_partidos_tipo_fecha', 'partidos', ['tipo', 'fecha'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_partidos_tipo_fecha', table_name='partidos')
+    op.drop_index('ix_partidos_fecha', table_name='partidos')
+    op.drop_index('ix_estadisticas_partido_id', table_name='estadisticas')
+    op.drop_index('ix_resumen_jugadores_tarjetas', table_name='resumen_jugadores')
+    for column in RESUMEN_COLUMNS:
+        op.drop_index(f'ix_resumen_jugadores_{column}', table_name='resumen_jugadores')
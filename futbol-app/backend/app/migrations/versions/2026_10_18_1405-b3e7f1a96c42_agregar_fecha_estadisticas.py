@@ -0,0 +1,87 @@
+"""agregar_fecha_estadisticas
+
+Revision ID: b3e7f1a96c42
+Revises: 8c1d5e2b7a90
+Create Date: 2026-10-18 14:05:48.127903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7f1a96c42'
+down_revision: Union[str, None] = '8c1d5e2b7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of `app.modules.estadisticas.triggers` at this revision, so the migration
+# doesn't change when the module does
+CREATE_FECHA_FUNCTIONS_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION copiar_fecha_partido() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.fecha := (SELECT fecha FROM partidos WHERE id = NEW.partido_id);
+        RETURN NEW;
+    END;
+    $$;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION propagar_fecha_partido() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE estadisticas SET fecha = NEW.fecha WHERE partido_id = NEW.id;
+        RETURN NULL;
+    END;
+    $$;
+    """,
+]
+
+CREATE_FECHA_TRIGGERS_SQL = [
+    "CREATE TRIGGER estadisticas_fecha BEFORE INSERT OR UPDATE OF partido_id ON estadisticas "
+    "FOR EACH ROW EXECUTE FUNCTION copiar_fecha_partido()",
+    "CREATE TRIGGER partidos_fecha AFTER UPDATE OF fecha ON partidos "
+    "FOR EACH ROW WHEN (OLD.fecha IS DISTINCT FROM NEW.fecha) "
+    "EXECUTE FUNCTION propagar_fecha_partido()",
+]
+
+DROP_FECHA_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS estadisticas_fecha ON estadisticas",
+    "DROP TRIGGER IF EXISTS partidos_fecha ON partidos",
+]
+
+DROP_FECHA_FUNCTIONS_SQL = [
+    "DROP FUNCTION IF EXISTS copiar_fecha_partido()",
+    "DROP FUNCTION IF EXISTS propagar_fecha_partido()",
+]
+
+
+def upgrade() -> None:
+    op.add_column('estadisticas', sa.Column('fecha', sa.DateTime(), nullable=True))
+
+    for statement in CREATE_FECHA_FUNCTIONS_SQL + CREATE_FECHA_TRIGGERS_SQL:
+        op.execute(statement)
+
+    # Backfill, the triggers keep it in sync from now on. It updates the whole table, without
+    # the statement_timeout of env.py
+    op.execute("SET LOCAL statement_timeout = 0")
+    op.execute(
+        """
+        UPDATE estadisticas AS e SET fecha = p.fecha
+        FROM partidos AS p
+        WHERE p.id = e.partido_id
+        """
+    )
+
+    op.create_index('ix_estadisticas_jugador_id_fecha', 'estadisticas', ['jugador_id', 'fecha', 'partido_id'], unique=False, postgresql_include=['goles', 'asistencias', 'tarjetas_amarillas', 'tarjetas_rojas', 'minutos_jugados', 'titular'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_estadisticas_jugador_id_fecha', table_name='estadisticas')
+    for statement in DROP_FECHA_TRIGGERS_SQL + DROP_FECHA_FUNCTIONS_SQL:
+        op.execute(statement)
+    op.drop_column('estadisticas', 'fecha')
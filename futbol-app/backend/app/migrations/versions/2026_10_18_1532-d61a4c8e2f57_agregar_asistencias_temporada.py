@@ -0,0 +1,225 @@
+"""agregar_asistencias_temporada
+
+Revision ID: d61a4c8e2f57
+Revises: b3e7f1a96c42
+Create Date: 2026-10-18 15:32:11.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd61a4c8e2f57'
+down_revision: Union[str, None] = 'b3e7f1a96c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of `app.modules.asistencias.triggers` at this revision, so the migration
+# doesn't change when the module does
+CREATE_CALCULAR_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION calcular_asistencias_temporada(
+    p_temporadas int[], p_jugadores uuid[] DEFAULT NULL
+) RETURNS TABLE (jugador_id uuid, temporada int, presentes varbit, registradas varbit)
+LANGUAGE sql STABLE AS $$
+    WITH partidos_temporada AS (
+        SELECT id, fecha, extract(year FROM fecha)::int AS temporada
+        FROM partidos
+        WHERE extract(year FROM fecha)::int = ANY(p_temporadas)
+    ),
+    asistencias_jugador AS (
+        -- One value per jugador and partido, even with repeated asistencias
+        SELECT a.jugador_id, a.partido_id, p.temporada, bool_or(a.presente) AS presente
+        FROM asistencias AS a
+        JOIN partidos_temporada AS p ON p.id = a.partido_id
+        WHERE p_jugadores IS NULL OR a.jugador_id = ANY(p_jugadores)
+        GROUP BY a.jugador_id, a.partido_id, p.temporada
+    ),
+    jugadores_temporada AS (
+        SELECT DISTINCT jugador_id, temporada FROM asistencias_jugador
+    )
+    SELECT
+        j.jugador_id,
+        j.temporada,
+        string_agg(
+            CASE WHEN a.presente THEN '1' ELSE '0' END, '' ORDER BY p.fecha, p.id
+        )::varbit,
+        string_agg(
+            CASE WHEN a.presente IS NULL THEN '0' ELSE '1' END, '' ORDER BY p.fecha, p.id
+        )::varbit
+    FROM jugadores_temporada AS j
+    JOIN partidos_temporada AS p ON p.temporada = j.temporada
+    LEFT JOIN asistencias_jugador AS a ON a.jugador_id = j.jugador_id AND a.partido_id = p.id
+    GROUP BY j.jugador_id, j.temporada;
+$$;
+"""
+
+CREATE_RECALCULAR_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION recalcular_asistencias_temporada(
+    p_temporadas int[], p_jugadores uuid[] DEFAULT NULL
+) RETURNS void
+LANGUAGE sql AS $$
+    SELECT pg_advisory_xact_lock(hashtext('asistencias_temporada'), temporada)
+    FROM (SELECT DISTINCT unnest(p_temporadas) AS temporada ORDER BY 1) AS t;
+
+    WITH calculadas AS (
+        SELECT * FROM calcular_asistencias_temporada(p_temporadas, p_jugadores)
+    ),
+    borradas AS (
+        DELETE FROM asistencias_temporada AS s
+        WHERE s.temporada = ANY(p_temporadas)
+            AND (p_jugadores IS NULL OR s.jugador_id = ANY(p_jugadores))
+            AND NOT EXISTS (
+                SELECT 1 FROM calculadas AS c
+                WHERE c.jugador_id = s.jugador_id AND c.temporada = s.temporada
+            )
+    )
+    INSERT INTO asistencias_temporada (jugador_id, temporada, presentes, registradas)
+    SELECT jugador_id, temporada, presentes, registradas FROM calculadas
+    ON CONFLICT (jugador_id, temporada) DO UPDATE SET
+        presentes = excluded.presentes,
+        registradas = excluded.registradas;
+$$;
+"""
+
+CREATE_ASISTENCIAS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION actualizar_asistencias_temporada() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM recalcular_asistencias_temporada(
+            ARRAY(
+                SELECT DISTINCT extract(year FROM p.fecha)::int
+                FROM filas_nuevas AS a JOIN partidos AS p ON p.id = a.partido_id
+            ),
+            ARRAY(SELECT DISTINCT jugador_id FROM filas_nuevas)
+        );
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM recalcular_asistencias_temporada(
+            ARRAY(
+                SELECT DISTINCT extract(year FROM p.fecha)::int
+                FROM filas_anteriores AS a JOIN partidos AS p ON p.id = a.partido_id
+            ),
+            ARRAY(SELECT DISTINCT jugador_id FROM filas_anteriores)
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_PARTIDOS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION actualizar_temporadas_partidos() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM recalcular_asistencias_temporada(
+            ARRAY(SELECT DISTINCT extract(year FROM fecha)::int FROM filas_nuevas)
+        );
+    ELSE
+        PERFORM recalcular_asistencias_temporada(
+            ARRAY(SELECT DISTINCT extract(year FROM fecha)::int FROM filas_anteriores)
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_FECHA_PARTIDO_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION actualizar_temporadas_fecha_partido() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM recalcular_asistencias_temporada(
+        ARRAY[extract(year FROM OLD.fecha)::int, extract(year FROM NEW.fecha)::int]
+    );
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_FUNCTIONS_SQL = [
+    CREATE_CALCULAR_FUNCTION_SQL,
+    CREATE_RECALCULAR_FUNCTION_SQL,
+    CREATE_ASISTENCIAS_FUNCTION_SQL,
+    CREATE_PARTIDOS_FUNCTION_SQL,
+    CREATE_FECHA_PARTIDO_FUNCTION_SQL,
+]
+
+CREATE_TRIGGERS_SQL = [
+    "CREATE TRIGGER asistencias_temporada_insert "
+    "AFTER INSERT ON asistencias REFERENCING NEW TABLE AS filas_nuevas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    "CREATE TRIGGER asistencias_temporada_update "
+    "AFTER UPDATE ON asistencias "
+    "REFERENCING OLD TABLE AS filas_anteriores NEW TABLE AS filas_nuevas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    "CREATE TRIGGER asistencias_temporada_delete "
+    "AFTER DELETE ON asistencias REFERENCING OLD TABLE AS filas_anteriores "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    "CREATE TRIGGER partidos_temporada_insert "
+    "AFTER INSERT ON partidos REFERENCING NEW TABLE AS filas_nuevas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_temporadas_partidos()",
+    "CREATE TRIGGER partidos_temporada_delete "
+    "AFTER DELETE ON partidos REFERENCING OLD TABLE AS filas_anteriores "
+    "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_temporadas_partidos()",
+    "CREATE TRIGGER partidos_temporada_fecha "
+    "AFTER UPDATE OF fecha ON partidos "
+    "FOR EACH ROW WHEN (OLD.fecha IS DISTINCT FROM NEW.fecha) "
+    "EXECUTE FUNCTION actualizar_temporadas_fecha_partido()",
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS asistencias_temporada_insert ON asistencias",
+    "DROP TRIGGER IF EXISTS asistencias_temporada_update ON asistencias",
+    "DROP TRIGGER IF EXISTS asistencias_temporada_delete ON asistencias",
+    "DROP TRIGGER IF EXISTS partidos_temporada_insert ON partidos",
+    "DROP TRIGGER IF EXISTS partidos_temporada_delete ON partidos",
+    "DROP TRIGGER IF EXISTS partidos_temporada_fecha ON partidos",
+]
+
+DROP_FUNCTIONS_SQL = [
+    "DROP FUNCTION IF EXISTS actualizar_temporadas_fecha_partido()",
+    "DROP FUNCTION IF EXISTS actualizar_temporadas_partidos()",
+    "DROP FUNCTION IF EXISTS actualizar_asistencias_temporada()",
+    "DROP FUNCTION IF EXISTS recalcular_asistencias_temporada(int[], uuid[])",
+    "DROP FUNCTION IF EXISTS calcular_asistencias_temporada(int[], uuid[])",
+]
+
+
+def upgrade() -> None:
+    op.create_table('asistencias_temporada',
+    sa.Column('jugador_id', sa.Uuid(), nullable=False),
+    sa.Column('temporada', sa.Integer(), nullable=False),
+    sa.Column('presentes', postgresql.BIT(varying=True), nullable=False),
+    sa.Column('registradas', postgresql.BIT(varying=True), nullable=False),
+    sa.ForeignKeyConstraint(['jugador_id'], ['jugadores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jugador_id', 'temporada')
+    )
+
+    for statement in CREATE_FUNCTIONS_SQL + CREATE_TRIGGERS_SQL:
+        op.execute(statement)
+
+    # Backfill, the triggers keep it in sync from now on. It scans every partido and
+    # asistencia, without the statement_timeout of env.py
+    op.execute("SET LOCAL statement_timeout = 0")
+    op.execute(
+        """
+        SELECT recalcular_asistencias_temporada(
+            ARRAY(SELECT DISTINCT extract(year FROM fecha)::int FROM partidos)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    for statement in DROP_TRIGGERS_SQL + DROP_FUNCTIONS_SQL:
+        op.execute(statement)
+    op.drop_table('asistencias_temporada')
@@ -0,0 +1,66 @@
+"""
+Operations on the attendance bitmaps of `asistencias_temporada`.
+
+The database returns a `BIT VARYING` as its text (`"10110"`, the first character is the first
+partido of the temporada). They are converted to Python ints with bit `i` for the `i`-th
+partido, so the counts and streaks are integer bit operations.
+"""
+
+import base64
+from typing import List, Sequence
+
+import numpy as np
+
+
+def to_int(bits: str | None) -> int:
+    """Bit `i` of the result is the `i`-th character of `bits`"""
+    return int(bits[::-1], 2) if bits else 0
+
+
+def count(bitmap: int) -> int:
+    return bitmap.bit_count()
+
+
+def longest_run(bitmap: int) -> int:
+    """
+    Longest run of consecutive set bits: every `bitmap & (bitmap >> 1)` shortens all the runs by
+    one, so it takes as many steps as the longest run.
+    """
+    length = 0
+    while bitmap:
+        bitmap &= bitmap >> 1
+        length += 1
+    return length
+
+
+def run_ending_at(bitmap: int, position: int) -> int:
+    """Length of the run of set bits that ends at `position` (0 if the bit is not set)"""
+    if position < 0:
+        return 0
+
+    mask = (1 << (position + 1)) - 1
+    # The highest unset bit up to `position` is where the run starts
+    return position + 1 - (~bitmap & mask).bit_length()
+
+
+def encode(bits: str | None) -> str:
+    """
+    Base64 of the bitmap packed in bytes (8 partidos per byte, the first partido is the most
+    significant bit of the first byte), the compact form sent to the frontend.
+    """
+    if not bits:
+        return ""
+
+    packed = int(bits, 2) << (-len(bits) % 8)
+    return base64.b64encode(packed.to_bytes((len(bits) + 7) // 8, "big")).decode()
+
+
+def column_sums(bitmaps: Sequence[str], size: int) -> List[int]:
+    """How many bitmaps have each position set (the bitmaps shorter than `size` are padded)"""
+    if not bitmaps:
+        return [0] * size
+
+    matrix = np.frombuffer(
+        "".join(bits.ljust(size, "0")[:size] for bits in bitmaps).encode(), dtype=np.uint8
+    ).reshape(len(bitmaps), size)
+    return (matrix - ord("0")).sum(axis=0).tolist()
@@ -3,6 +3,7 @@ from typing import Optional
 from uuid import UUID, uuid4
 
 from sqlalchemy import ForeignKey
+from sqlalchemy.dialects.postgresql import BIT
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database.base import Base
 from app.database.mixins import TimestampMixin
@@ -20,4 +21,23 @@ class Asistencia(TimestampMixin, Base):
 
     # Relaciones
     jugador: Mapped["Jugador"] = relationship("Jugador", back_populates="asistencias")
-    partido: Mapped["Partido"] = relationship("Partido", back_populates="asistencias") 
\ No newline at end of file
+    partido: Mapped["Partido"] = relationship("Partido", back_populates="asistencias") 
+
+class AsistenciaTemporada(Base):
+    """
+    Attendance of a jugador to the partidos of a temporada (the year of the fecha) as bitmaps,
+    kept up to date by the triggers on `asistencias` and `partidos` (see
+    `app.modules.asistencias.triggers`).
+
+    Bit `i` is the `i`-th partido of the temporada ordered by fecha (and id): `presentes` has
+    the partidos the jugador attended and `registradas` the ones with an asistencia.
+    """
+
+    __tablename__ = "asistencias_temporada"
+
+    jugador_id: Mapped[UUID] = mapped_column(
+        ForeignKey("jugadores.id", ondelete="CASCADE"), primary_key=True
+    )
+    temporada: Mapped[int] = mapped_column(primary_key=True)
+    presentes: Mapped[str] = mapped_column(BIT(varying=True))
+    registradas: Mapped[str] = mapped_column(BIT(varying=True))
@@ -1,9 +1,27 @@
-from sqlalchemy import func, select
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    cast,
+    delete,
+    distinct,
+    extract,
+    func,
+    select,
+    text,
+    tuple_,
+)
 from typing import List, Dict
 
 from app.core.config import settings
 from app.dependency_registry import registry
-from app.modules.asistencias.models import Asistencia
+from app.modules.asistencias import triggers
+from app.modules.asistencias.models import Asistencia, AsistenciaTemporada
+from app.modules.asistencias.schemas import AsistenciaResponse
+from app.modules.partidos.models import Partido
 from app.repositories.sql_repository import SQLAlchemyRepository
 
 
@@ -13,6 +31,7 @@ class AsistenciaRepository:
 
 class AsistenciaSQLRepository(SQLAlchemyRepository[Asistencia]):
     model: Asistencia = Asistencia
+    response_models = (AsistenciaResponse,)
 
     def get_by_partido(self, partido_id: int) -> List[Asistencia]:
         """Get all asistencias for a specific partido
@@ -32,19 +51,125 @@ class AsistenciaSQLRepository(SQLAlchemyRepository[Asistencia]):
         """
         return self.get_all(base_query=select(self.model).where(self.model.jugador_id == jugador_id))
 
+    @SQLAlchemyRepository.read_only
     def get_resumen_jugadores(self) -> List[Dict]:
-        """Get a summary of asistencias by jugador
+        """Get a summary of asistencias by jugador, counting the bits of the bitmaps
         Returns:
             List[Dict]: List of dictionaries with jugador_id, total_partidos, and total_presentes
         """
+
+        def bit_count(bitmap):
+            return func.length(func.replace(cast(bitmap, String), '0', ''))
+
         return self.db_session.execute(
             select(
-                self.model.jugador_id,
-                func.count(self.model.id).label('total_partidos'),
-                func.sum(func.case((self.model.presente == True, 1), else_=0)).label('total_presentes')
-            ).group_by(self.model.jugador_id)
+                AsistenciaTemporada.jugador_id,
+                func.sum(bit_count(AsistenciaTemporada.registradas)).label('total_partidos'),
+                func.sum(bit_count(AsistenciaTemporada.presentes)).label('total_presentes'),
+            ).group_by(AsistenciaTemporada.jugador_id)
+        ).all()
+
+    @SQLAlchemyRepository.read_only
+    def get_bitmaps_temporada(
+        self, temporada: int, jugador_id: UUID | None = None
+    ) -> List[AsistenciaTemporada]:
+        """Get the attendance bitmaps of a temporada
+        Args:
+            temporada (int): The year of the temporada
+            jugador_id (UUID): Only the bitmaps of this jugador
+        Returns:
+            List[AsistenciaTemporada]: One per jugador with asistencias in the temporada
+        """
+        query = select(AsistenciaTemporada).where(AsistenciaTemporada.temporada == temporada)
+        if jugador_id:
+            query = query.where(AsistenciaTemporada.jugador_id == jugador_id)
+        return self.db_session.scalars(query).all()
+
+    @SQLAlchemyRepository.read_only
+    def get_partidos_temporada(self, temporada: int) -> List[Dict]:
+        """Get the partidos of a temporada in the order of the bits of the bitmaps
+        Args:
+            temporada (int): The year of the temporada
+        Returns:
+            List[Dict]: The id and fecha of every partido
+        """
+        return self.db_session.execute(
+            select(Partido.id, Partido.fecha)
+            .where(Partido.fecha >= datetime(temporada, 1, 1))
+            .where(Partido.fecha < datetime(temporada + 1, 1, 1))
+            .order_by(Partido.fecha, Partido.id)
         ).all()
 
+    def _temporadas(self):
+        """Every temporada with partidos, as an `int[]`"""
+        return func.array(
+            select(distinct(cast(extract('year', Partido.fecha), Integer))).scalar_subquery()
+        )
+
+    def verify_bitmaps(self) -> List[Dict]:
+        """Compare `asistencias_temporada` with the raw asistencias
+        Returns:
+            List[Dict]: The (jugador, temporada) pairs whose bitmaps don't match, with the
+                expected (`esperado`) and the stored (`actual`) ones. Empty when the table is in
+                sync
+        """
+        calcular = getattr(func, triggers.CALCULAR_FUNCTION)
+        expected = calcular(self._temporadas()).table_valued(
+            'jugador_id', 'temporada', 'presentes', 'registradas'
+        ).alias('esperado')
+        stored = AsistenciaTemporada.__table__
+        bitmaps = ('presentes', 'registradas')
+
+        rows = self.db_session.execute(
+            select(expected, stored)
+            .select_from(
+                expected.join(
+                    stored,
+                    and_(
+                        stored.c.jugador_id == expected.c.jugador_id,
+                        stored.c.temporada == expected.c.temporada,
+                    ),
+                    full=True,
+                )
+            )
+            .where(
+                tuple_(*(expected.c[key] for key in bitmaps)).is_distinct_from(
+                    tuple_(*(stored.c[key] for key in bitmaps))
+                )
+            )
+        ).all()
+
+        differences = []
+        for row in rows:
+            esperado, actual = row[: len(expected.c)], row[len(expected.c) :]
+            differences.append(
+                {
+                    'jugador_id': esperado[0] or actual[0],
+                    'temporada': esperado[1] or actual[1],
+                    'esperado': dict(zip(bitmaps, esperado[2:])) if esperado[0] else None,
+                    'actual': dict(zip(bitmaps, actual[2:])) if actual[0] else None,
+                }
+            )
+        return differences
+
+    def rebuild_bitmaps(self) -> int:
+        """Recompute `asistencias_temporada` from the raw asistencias
+        The writes on asistencias and partidos are blocked until the rebuild is committed, so
+        no change applied by the triggers is lost.
+        Returns:
+            int: The number of (jugador, temporada) bitmaps
+        """
+        self.db_session.execute(text('SET LOCAL statement_timeout = 0'))
+        self.db_session.execute(
+            text('LOCK TABLE asistencias, partidos IN SHARE ROW EXCLUSIVE MODE')
+        )
+        self.db_session.execute(delete(AsistenciaTemporada))
+        self.db_session.execute(
+            select(getattr(func, triggers.RECALCULAR_FUNCTION)(self._temporadas()))
+        )
+        total = self.db_session.scalar(select(func.count()).select_from(AsistenciaTemporada))
+        self.db_session.commit()
+        return total
 
 repositories = {
     "SQL": AsistenciaSQLRepository,
@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.core.server_timing import TimedRoute
+from fastapi_injector import Injected
 from sqlalchemy.orm import Session
 from typing import List
+from uuid import UUID
+from app.modules.asistencias.schemas import AsistenciasTemporadaResponse
 from app.modules.asistencias.service import AsistenciaService
 
-router = APIRouter(
-    prefix="/asistencias",
-    tags=["asistencias"]
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get(
+    "/temporadas/{temporada}",
+    response_description="Get the attendance of a season",
+    status_code=status.HTTP_200_OK,
+    summary="Get the attendance of a season",
+    description="Attendance bitmaps (base64) of every player over the ordered matches of the season, with their attendance rate and streaks, and how many players attended every match.",
 )
+def get_asistencias_temporada(
+    temporada: int,
+    jugador_id: UUID | None = None,
+    asistencia_service: AsistenciaService = Injected(AsistenciaService),
+) -> AsistenciasTemporadaResponse:
+    return asistencia_service.get_temporada(temporada, jugador_id=jugador_id)
+
 
 # @router.get("/", response_model=List[AsistenciaSchema])
 # def get_asistencias(db: Session = Depends(get_db)):
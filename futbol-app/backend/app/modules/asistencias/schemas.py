@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class AsistenciaBase(BaseModel):
@@ -30,4 +30,30 @@ class AsistenciaJugador(BaseModel):
     total_presentes: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class PartidoTemporada(BaseModel):
+    partido_id: UUID
+    fecha: datetime
+    presentes: int
+
+class AsistenciaJugadorTemporada(BaseModel):
+    jugador_id: UUID
+    presentes: str
+    registradas: str
+    total_partidos: int
+    total_presentes: int
+    porcentaje_asistencia: float
+    racha_maxima: int
+    racha_actual: int
+
+class AsistenciasTemporadaResponse(BaseModel):
+    """
+    `presentes` and `registradas` of every jugador are the bitmaps of the partidos (in the
+    order of `partidos`) in base64: 8 partidos per byte, the first one in the most significant
+    bit of the first byte.
+    """
+
+    temporada: int
+    partidos: List[PartidoTemporada]
+    jugadores: List[AsistenciaJugadorTemporada]
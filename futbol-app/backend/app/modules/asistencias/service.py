@@ -3,8 +3,15 @@ from uuid import UUID
 
 from injector import Inject
 
+from app.modules.asistencias import bitmaps
 from app.modules.asistencias.repository import AsistenciaRepository
-from app.modules.asistencias.schemas import AsistenciaCreate, AsistenciaUpdate
+from app.modules.asistencias.schemas import (
+    AsistenciaCreate,
+    AsistenciaJugadorTemporada,
+    AsistenciasTemporadaResponse,
+    AsistenciaUpdate,
+    PartidoTemporada,
+)
 from app.services.base_crud_service import BaseService
 from app.modules.asistencias.models import Asistencia
 
@@ -20,4 +27,55 @@ class AsistenciaService(BaseService):
         return self.repo.get_by_jugador(jugador_id)
 
     def get_resumen_jugadores(self) -> List[Dict]:
-        return self.repo.get_resumen_jugadores() 
\ No newline at end of file
+        return self.repo.get_resumen_jugadores() 
+
+    def verify_bitmaps(self) -> List[Dict]:
+        """Get the players and seasons whose stored attendance bitmaps don't match."""
+        return self.repo.verify_bitmaps()
+
+    def rebuild_bitmaps(self) -> int:
+        """Recompute the attendance bitmaps of every player and season."""
+        return self.repo.rebuild_bitmaps()
+
+    def get_temporada(
+        self, temporada: int, jugador_id: UUID | None = None
+    ) -> AsistenciasTemporadaResponse:
+        """
+        Attendance of every player (or only `jugador_id`) to the matches of a season, with the
+        rates and streaks computed from the bitmaps and the players present in every match.
+        """
+        partidos = self.repo.get_partidos_temporada(temporada)
+        temporada_bitmaps = self.repo.get_bitmaps_temporada(temporada, jugador_id=jugador_id)
+
+        jugadores = []
+        for bitmap in temporada_bitmaps:
+            presentes = bitmaps.to_int(bitmap.presentes)
+            registradas = bitmaps.to_int(bitmap.registradas)
+            total_partidos = bitmaps.count(registradas)
+            jugadores.append(
+                AsistenciaJugadorTemporada(
+                    jugador_id=bitmap.jugador_id,
+                    presentes=bitmaps.encode(bitmap.presentes),
+                    registradas=bitmaps.encode(bitmap.registradas),
+                    total_partidos=total_partidos,
+                    total_presentes=bitmaps.count(presentes),
+                    porcentaje_asistencia=(
+                        bitmaps.count(presentes) / total_partidos if total_partidos else 0.0
+                    ),
+                    racha_maxima=bitmaps.longest_run(presentes),
+                    # Ending at the last partido with an asistencia of the jugador
+                    racha_actual=bitmaps.run_ending_at(presentes, registradas.bit_length() - 1),
+                )
+            )
+
+        presentes_por_partido = bitmaps.column_sums(
+            [bitmap.presentes for bitmap in temporada_bitmaps], len(partidos)
+        )
+        return AsistenciasTemporadaResponse(
+            temporada=temporada,
+            partidos=[
+                PartidoTemporada(partido_id=partido.id, fecha=partido.fecha, presentes=presentes)
+                for partido, presentes in zip(partidos, presentes_por_partido)
+            ],
+            jugadores=jugadores,
+        )
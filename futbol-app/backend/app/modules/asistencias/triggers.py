@@ -0,0 +1,215 @@
+"""
+Triggers that keep `asistencias_temporada` (the attendance bitmaps) in sync.
+
+The bitmaps are recomputed (`recalcular_asistencias_temporada`, serialized per temporada) for
+the (jugador, temporada) pairs touched by a statement on `asistencias`, which is a scan of the
+partidos of those temporadas. A new partido, a deleted one or a new fecha moves the position of
+the following partidos, so a statement on `partidos` recomputes the bitmaps of every jugador in
+the temporadas it touched (an update only when it changes the fecha).
+"""
+
+from sqlalchemy import DDL, event
+
+from app.database.base import Base
+
+CALCULAR_FUNCTION = "calcular_asistencias_temporada"
+RECALCULAR_FUNCTION = "recalcular_asistencias_temporada"
+
+# The bitmaps of the (jugador, temporada) pairs with asistencias, from the raw data
+CREATE_CALCULAR_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {CALCULAR_FUNCTION}(
+    p_temporadas int[], p_jugadores uuid[] DEFAULT NULL
+) RETURNS TABLE (jugador_id uuid, temporada int, presentes varbit, registradas varbit)
+LANGUAGE sql STABLE AS $$
+    WITH partidos_temporada AS (
+        SELECT id, fecha, extract(year FROM fecha)::int AS temporada
+        FROM partidos
+        WHERE extract(year FROM fecha)::int = ANY(p_temporadas)
+    ),
+    asistencias_jugador AS (
+        -- One value per jugador and partido, even with repeated asistencias
+        SELECT a.jugador_id, a.partido_id, p.temporada, bool_or(a.presente) AS presente
+        FROM asistencias AS a
+        JOIN partidos_temporada AS p ON p.id = a.partido_id
+        WHERE p_jugadores IS NULL OR a.jugador_id = ANY(p_jugadores)
+        GROUP BY a.jugador_id, a.partido_id, p.temporada
+    ),
+    jugadores_temporada AS (
+        SELECT DISTINCT jugador_id, temporada FROM asistencias_jugador
+    )
+    SELECT
+        j.jugador_id,
+        j.temporada,
+        string_agg(
+            CASE WHEN a.presente THEN '1' ELSE '0' END, '' ORDER BY p.fecha, p.id
+        )::varbit,
+        string_agg(
+            CASE WHEN a.presente IS NULL THEN '0' ELSE '1' END, '' ORDER BY p.fecha, p.id
+        )::varbit
+    FROM jugadores_temporada AS j
+    JOIN partidos_temporada AS p ON p.temporada = j.temporada
+    LEFT JOIN asistencias_jugador AS a ON a.jugador_id = j.jugador_id AND a.partido_id = p.id
+    GROUP BY j.jugador_id, j.temporada;
+$$;
+"""
+
+# The advisory lock serializes the recomputations of a temporada: two transactions touching it
+# (two asistencias of the same jugador, an asistencia and a new partido) would otherwise compute
+# their bitmaps without the rows of the other one. The function is volatile, so the statements
+# after the lock see what the transaction that held it committed. The rows are upserted, and
+# the ones left without asistencias are deleted
+CREATE_RECALCULAR_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {RECALCULAR_FUNCTION}(
+    p_temporadas int[], p_jugadores uuid[] DEFAULT NULL
+) RETURNS void
+LANGUAGE sql AS $$
+    SELECT pg_advisory_xact_lock(hashtext('asistencias_temporada'), temporada)
+    FROM (SELECT DISTINCT unnest(p_temporadas) AS temporada ORDER BY 1) AS t;
+
+    WITH calculadas AS (
+        SELECT * FROM {CALCULAR_FUNCTION}(p_temporadas, p_jugadores)
+    ),
+    borradas AS (
+        DELETE FROM asistencias_temporada AS s
+        WHERE s.temporada = ANY(p_temporadas)
+            AND (p_jugadores IS NULL OR s.jugador_id = ANY(p_jugadores))
+            AND NOT EXISTS (
+                SELECT 1 FROM calculadas AS c
+                WHERE c.jugador_id = s.jugador_id AND c.temporada = s.temporada
+            )
+    )
+    INSERT INTO asistencias_temporada (jugador_id, temporada, presentes, registradas)
+    SELECT jugador_id, temporada, presentes, registradas FROM calculadas
+    ON CONFLICT (jugador_id, temporada) DO UPDATE SET
+        presentes = excluded.presentes,
+        registradas = excluded.registradas;
+$$;
+"""
+
+CREATE_ASISTENCIAS_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION actualizar_asistencias_temporada() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM {RECALCULAR_FUNCTION}(
+            ARRAY(
+                SELECT DISTINCT extract(year FROM p.fecha)::int
+                FROM filas_nuevas AS a JOIN partidos AS p ON p.id = a.partido_id
+            ),
+            ARRAY(SELECT DISTINCT jugador_id FROM filas_nuevas)
+        );
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM {RECALCULAR_FUNCTION}(
+            ARRAY(
+                SELECT DISTINCT extract(year FROM p.fecha)::int
+                FROM filas_anteriores AS a JOIN partidos AS p ON p.id = a.partido_id
+            ),
+            ARRAY(SELECT DISTINCT jugador_id FROM filas_anteriores)
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_PARTIDOS_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION actualizar_temporadas_partidos() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM {RECALCULAR_FUNCTION}(
+            ARRAY(SELECT DISTINCT extract(year FROM fecha)::int FROM filas_nuevas)
+        );
+    ELSE
+        PERFORM {RECALCULAR_FUNCTION}(
+            ARRAY(SELECT DISTINCT extract(year FROM fecha)::int FROM filas_anteriores)
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_FECHA_PARTIDO_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION actualizar_temporadas_fecha_partido() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM {RECALCULAR_FUNCTION}(
+        ARRAY[extract(year FROM OLD.fecha)::int, extract(year FROM NEW.fecha)::int]
+    );
+    RETURN NULL;
+END;
+$$;
+"""
+
+CREATE_FUNCTIONS_SQL = [
+    CREATE_CALCULAR_FUNCTION_SQL,
+    CREATE_RECALCULAR_FUNCTION_SQL,
+    CREATE_ASISTENCIAS_FUNCTION_SQL,
+    CREATE_PARTIDOS_FUNCTION_SQL,
+    CREATE_FECHA_PARTIDO_FUNCTION_SQL,
+]
+
+# name: (table, definition). A trigger with transition tables can only handle one event and
+# can't have a column list, so the change of fecha of a partido is a row level trigger
+_TRIGGERS = {
+    "asistencias_temporada_insert": (
+        "asistencias",
+        "AFTER INSERT ON asistencias REFERENCING NEW TABLE AS filas_nuevas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    ),
+    "asistencias_temporada_update": (
+        "asistencias",
+        "AFTER UPDATE ON asistencias "
+        "REFERENCING OLD TABLE AS filas_anteriores NEW TABLE AS filas_nuevas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    ),
+    "asistencias_temporada_delete": (
+        "asistencias",
+        "AFTER DELETE ON asistencias REFERENCING OLD TABLE AS filas_anteriores "
+        "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_asistencias_temporada()",
+    ),
+    "partidos_temporada_insert": (
+        "partidos",
+        "AFTER INSERT ON partidos REFERENCING NEW TABLE AS filas_nuevas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_temporadas_partidos()",
+    ),
+    "partidos_temporada_delete": (
+        "partidos",
+        "AFTER DELETE ON partidos REFERENCING OLD TABLE AS filas_anteriores "
+        "FOR EACH STATEMENT EXECUTE FUNCTION actualizar_temporadas_partidos()",
+    ),
+    "partidos_temporada_fecha": (
+        "partidos",
+        "AFTER UPDATE OF fecha ON partidos "
+        "FOR EACH ROW WHEN (OLD.fecha IS DISTINCT FROM NEW.fecha) "
+        "EXECUTE FUNCTION actualizar_temporadas_fecha_partido()",
+    ),
+}
+
+CREATE_TRIGGERS_SQL = [
+    f"CREATE TRIGGER {name} {definition}" for name, (_, definition) in _TRIGGERS.items()
+]
+
+DROP_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {name} ON {table}" for name, (table, _) in _TRIGGERS.items()
+]
+
+DROP_FUNCTIONS_SQL = [
+    "DROP FUNCTION IF EXISTS actualizar_temporadas_fecha_partido()",
+    "DROP FUNCTION IF EXISTS actualizar_temporadas_partidos()",
+    "DROP FUNCTION IF EXISTS actualizar_asistencias_temporada()",
+    f"DROP FUNCTION IF EXISTS {RECALCULAR_FUNCTION}(int[], uuid[])",
+    f"DROP FUNCTION IF EXISTS {CALCULAR_FUNCTION}(int[], uuid[])",
+]
+
+
+# The migrations install the triggers, this covers the databases created with `create_all`
+for statement in [*CREATE_FUNCTIONS_SQL, *DROP_TRIGGERS_SQL, *CREATE_TRIGGERS_SQL]:
+    event.listen(
+        Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
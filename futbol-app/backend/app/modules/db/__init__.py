@@ -1,2 +1,10 @@
 from .pydantic_fields import PydanticGraph
-from .statement_generator import StatementGenerator, select_from_pydantic
+from .statement_generator import (
+    StatementGenerator,
+    joined_collection_from_pydantic,
+    required_attributes_from_pydantic,
+    returning_columns_from_pydantic,
+    select_from_pydantic,
+    select_from_pydantic_cache_info,
+    warm_up_select_from_pydantic,
+)
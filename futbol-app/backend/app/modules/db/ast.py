@@ -46,8 +46,11 @@ class RelationshipLoadNode(ASTNode):
         model: type[DeclarativeBase],
         children: Optional[List[ASTNode]],
         relationship: str,
+        strategy: Optional[str] = None,
     ):
         self.relationship = relationship
+        # None lets the code generator pick the strategy from the relationship direction
+        self.strategy = strategy
         super().__init__(model, children)
 
     @property
@@ -70,3 +73,16 @@ class InheritedLoadNode(RelationshipLoadNode):
     def mapper(self) -> Type[DeclarativeBase]:
         """Get the related model class for a relationship."""
         return self.model
+
+
+class LazyLoadNode(ASTNode):
+    """Represents an eager relationship (by model config) that the schema doesn't need."""
+
+    def __init__(
+        self,
+        model: type[DeclarativeBase],
+        children: Optional[List["ASTNode"]],
+        relationship: str,
+    ):
+        self.relationship = relationship
+        super().__init__(model, children)
@@ -1,10 +1,16 @@
 from sqlalchemy import exc
 from sqlalchemy.inspection import inspect
-from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload, subqueryload
 
 from app.modules.db.sqlalchemy import safe_getattr
 
-from .ast import ASTNode, InheritedLoadNode, LoadOnlyNode, RelationshipLoadNode
+from .ast import ASTNode, InheritedLoadNode, LazyLoadNode, LoadOnlyNode, RelationshipLoadNode
+
+LOADERS = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "subquery": subqueryload,
+}
 
 
 class QueryOptionGenerator:
@@ -30,7 +36,7 @@ class QueryOptionGenerator:
     def visit_RelationshipLoadNode(self, node: RelationshipLoadNode):
         relationship = safe_getattr(node.model, node.relationship)
 
-        loader = joinedload(relationship)
+        loader = LOADERS[self._select_strategy(node, relationship)](relationship)
         if node.children:
             child_loaders = [self.visit(child) for child in node.children]
             loader = loader.options(*child_loaders)
@@ -40,6 +46,20 @@ class QueryOptionGenerator:
     def visit_InheritedLoadNode(self, node: InheritedLoadNode):
         return load_only(safe_getattr(node.model, node.relationship))
 
+    def visit_LazyLoadNode(self, node: LazyLoadNode):
+        return lazyload(safe_getattr(node.model, node.relationship))
+
+    def _select_strategy(self, node: RelationshipLoadNode, relationship) -> str:
+        """
+        Collections are loaded with a second `SELECT ... WHERE parent_id IN (...)`, joining them
+        would repeat the parent row for each child (and break the LIMIT of the pages).
+        Many-to-one (and one-to-one) relationships add at most one row, so they are joined.
+        """
+        if node.strategy:
+            return node.strategy
+
+        return "selectin" if relationship.property.uselist else "joined"
+
     def _argument_error(self, e: exc.ArgumentError, node: LoadOnlyNode):
         """
         Sometimes we get an "ArgumentError" from sqlalchemy because we added a non-column field
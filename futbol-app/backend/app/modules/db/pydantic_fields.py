@@ -6,6 +6,11 @@ from pydantic.fields import FieldInfo
 
 SELECT_STRATEGY_KEY = "_select_strategy"
 
+# Values of `SELECT_STRATEGY_KEY`: "lazy" skips the field, the others force the loader used for
+# the relationship (by default collections use "selectin" and many-to-one "joined")
+LAZY_STRATEGY = "lazy"
+SELECT_STRATEGIES = ("joined", "selectin", "subquery")
+
 
 def pydantic_field_name(name: str, field: FieldInfo):
     if field.alias:
@@ -20,31 +25,60 @@ def pydantic_field_name(name: str, field: FieldInfo):
     return name
 
 
+def field_select_strategy(field: FieldInfo) -> Optional[str]:
+    if isinstance(field.json_schema_extra, dict):
+        strategy = field.json_schema_extra.get(SELECT_STRATEGY_KEY)
+        if strategy is not None and strategy != LAZY_STRATEGY and strategy not in SELECT_STRATEGIES:
+            raise ValueError(
+                f"Unknown {SELECT_STRATEGY_KEY} `{strategy}`, "
+                f"use one of {(LAZY_STRATEGY, *SELECT_STRATEGIES)}"
+            )
+        return strategy
+    return None
+
+
 def should_ignore_field(field: FieldInfo) -> bool:
-    if field.json_schema_extra:
-        return field.json_schema_extra.get(SELECT_STRATEGY_KEY) == "lazy"
-    return False
+    return field_select_strategy(field) == LAZY_STRATEGY
 
 
-# TODO: We're not dealing with Recursive models
-def pydantic_model_fields(model: type[BaseModel], prefix="") -> Iterator[str]:
+def _pydantic_model(ann: Any) -> Optional[type[BaseModel]]:
+    if get_origin(ann):
+        # NOTE: we're checking **every** type that's not a atomic: dict/list/union/generic etc.
+        # NOTE: update this so we only check the types we're interested in Union/list/set/tuple.
+        for arg in get_args(ann):
+            if pydantic_model := _pydantic_model(arg):
+                return pydantic_model
+
+    if isinstance(ann, type) and issubclass(ann, BaseModel):
+        return ann
+
+    return None
+
+
+def pydantic_select_strategies(model: type[BaseModel], prefix="") -> Iterator[tuple[str, str]]:
     """
-    Returns flat names for all fields in a Pydantic model.
+    Returns the (flat name, strategy) of the nested models with a forced select strategy.
     """
+    queue = deque([(prefix, model)])
 
-    def _pydantic_model(ann: Any) -> Optional[type[BaseModel]]:
-        if get_origin(ann):
-            # NOTE: we're checking **every** type that's not a atomic: dict/list/union/generic etc.
-            # NOTE: update this so we only check the types we're interested in Union/list/set/tuple.
-            for arg in get_args(ann):
-                if pydantic_model := _pydantic_model(arg):
-                    return pydantic_model
+    while queue:
+        prefix, model = queue.popleft()
+        for name, field in model.model_fields.items():
+            if should_ignore_field(field):
+                continue
 
-        if isinstance(ann, type) and issubclass(ann, BaseModel):
-            return ann
+            if pydantic_model := _pydantic_model(field.annotation):
+                field_name = f"{prefix}{pydantic_field_name(name, field)}"
+                if strategy := field_select_strategy(field):
+                    yield field_name, strategy
+                queue.append((f"{field_name}.", pydantic_model))
 
-        return None
 
+# TODO: We're not dealing with Recursive models
+def pydantic_model_fields(model: type[BaseModel], prefix="") -> Iterator[str]:
+    """
+    Returns flat names for all fields in a Pydantic model.
+    """
     queue = deque([(prefix, model)])
 
     while queue:
@@ -70,9 +104,16 @@ class PydanticGraph:
     of a Pydantic model.
     """
 
-    def __init__(self, columns: list[str], relationships: dict[str, "PydanticGraph"]):
+    def __init__(
+        self,
+        columns: list[str],
+        relationships: dict[str, "PydanticGraph"],
+        strategy: Optional[str] = None,
+    ):
         self.columns: list[str] = columns
         self.relationships: dict[str, "PydanticGraph"] = relationships
+        # Select strategy forced by the schema for the relationship this graph represents
+        self.strategy: Optional[str] = strategy
 
     def add_node(self, node: str):
         if "." in node:
@@ -84,11 +125,25 @@ class PydanticGraph:
         else:
             self.columns.append(node)
 
+    def set_strategy(self, node: str, strategy: str):
+        relationship, _, sub_node = node.partition(".")
+        if relationship not in self.relationships:
+            return
+
+        if sub_node:
+            self.relationships[relationship].set_strategy(sub_node, strategy)
+        else:
+            self.relationships[relationship].strategy = strategy
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, PydanticGraph):
             return False
 
-        return self.columns == other.columns and self.relationships == other.relationships
+        return (
+            self.columns == other.columns
+            and self.relationships == other.relationships
+            and self.strategy == other.strategy
+        )
 
     @classmethod
     def from_model(cls, fields: type[BaseModel]) -> "PydanticGraph":
@@ -97,4 +152,6 @@ class PydanticGraph:
         graph = cls([], {})
         for field in model_fields:
             graph.add_node(field)
+        for field, strategy in pydantic_select_strategies(fields):
+            graph.set_strategy(field, strategy)
         return graph
@@ -1,22 +1,28 @@
 import logging
-from typing import List, Type
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Type
 
 from pydantic import BaseModel
 from sqlalchemy import inspect
 from sqlalchemy.orm import (
+    ColumnProperty,
     DeclarativeBase,
     InstrumentedAttribute,
+    Mapper,
     RelationshipProperty,
 )
 
 from app.modules.db.sqlalchemy import safe_getattr
 
-from .ast import ASTNode, InheritedLoadNode, LoadOnlyNode, RelationshipLoadNode
+from .ast import ASTNode, InheritedLoadNode, LazyLoadNode, LoadOnlyNode, RelationshipLoadNode
 from .code_generator import QueryOptionGenerator
 from .pydantic_fields import PydanticGraph
 
 logger = logging.getLogger(__name__)
 
+# Strategies that load the relationship with the parent even if nobody accesses it
+EAGER_LAZY_VALUES = ("joined", "selectin", "subquery", "immediate")
+
 
 class StatementGenerator:
     """Generates SQLAlchemy select statements based on Pydantic models."""
@@ -47,11 +53,31 @@ class StatementGenerator:
 
         for rel_node in relationships:
             sub_graph = graph.relationships[rel_node.relationship]
+            rel_node.strategy = sub_graph.strategy
             rel_node.children = self._build_child_nodes(rel_node.mapper, sub_graph)
 
             nodes.append(rel_node)
         return nodes
 
+    def _build_lazy_nodes(
+        self, model: Type[DeclarativeBase], children: List[ASTNode]
+    ) -> List[ASTNode]:
+        """
+        Relationships configured as eager in the model (e.g. `lazy="joined"`) are loaded with
+        every query unless we say otherwise, the ones the schema doesn't use are made lazy.
+        """
+        used = {
+            child.relationship
+            for child in children
+            if isinstance(child, RelationshipLoadNode) and child.model is model
+        }
+
+        return [
+            LazyLoadNode(model, [], relationship.key)
+            for relationship in inspect(model).relationships
+            if relationship.key not in used and relationship.lazy in EAGER_LAZY_VALUES
+        ]
+
     def _build_child_nodes(
         self, model: Type[DeclarativeBase], graph: PydanticGraph
     ) -> List[ASTNode]:
@@ -64,7 +90,8 @@ class StatementGenerator:
         if relationships:
             children.extend(relationships)
 
-        return children + self._build_relationship_nodes(model, graph)
+        children += self._build_relationship_nodes(model, graph)
+        return children + self._build_lazy_nodes(model, children)
 
     def _get_orm_relation(
         self, model: Type[DeclarativeBase], relationship_name: str
@@ -125,7 +152,124 @@ class StatementGenerator:
         return scalars, relationships
 
 
-def select_from_pydantic(model: Type[DeclarativeBase], schema: BaseModel):
+@lru_cache(maxsize=None)
+def _compile_select_options(model: Type[DeclarativeBase], schema: Type[BaseModel]) -> tuple:
     graph = PydanticGraph.from_model(schema)
     generator = StatementGenerator(graph, model)
-    return generator.generate_query()
+    return tuple(generator.generate_query())
+
+
+def select_from_pydantic(model: Type[DeclarativeBase], schema: BaseModel):
+    """
+    Get the loader options to select only what the schema needs from the model.
+
+    The options only depend on the (model, schema) pair, so they are compiled once per process
+    and reused by every statement afterwards.
+    """
+    return list(_compile_select_options(model, schema))
+
+
+def _loader_strategies(options: Iterable) -> Dict[tuple, str]:
+    """The `lazy` strategy set by the loader options for each path of relationships"""
+    strategies = {}
+    for option in options:
+        for element in getattr(option, "context", ()):
+            strategy = dict(element.strategy or ())
+            if "lazy" in strategy:
+                strategies[tuple(element.path.path[1::2])] = strategy["lazy"]
+    return strategies
+
+
+def _find_joined_collection(
+    mapper: Mapper, strategies: Dict[tuple, str], path: tuple = ()
+) -> str | None:
+    for relationship in mapper.relationships:
+        if relationship in path:
+            continue
+
+        relationship_path = (*path, relationship)
+        if strategies.get(relationship_path, relationship.lazy) != "joined":
+            continue
+        if relationship.uselist:
+            return ".".join(prop.key for prop in relationship_path)
+        # A joined many-to-one adds its own joined relationships to the same rows
+        if found := _find_joined_collection(relationship.mapper, strategies, relationship_path):
+            return found
+    return None
+
+
+@lru_cache(maxsize=None)
+def joined_collection_from_pydantic(
+    model: Type[DeclarativeBase], schema: Type[BaseModel] | None = None
+) -> str | None:
+    """
+    Get the first collection joined (`joinedload` or `lazy="joined"` in the model) in the
+    statements of the schema, which repeat the model rows once per item. None if there isn't.
+
+    It only depends on the (model, schema) pair, so it's worked out once from the compiled
+    options (`select_from_pydantic`), without schema from the model relationships.
+    """
+    options = _compile_select_options(model, schema) if schema is not None else ()
+    return _find_joined_collection(inspect(model), _loader_strategies(options))
+
+
+@lru_cache(maxsize=None)
+def returning_columns_from_pydantic(
+    model: Type[DeclarativeBase], schema: Type[BaseModel]
+) -> tuple[InstrumentedAttribute, ...] | None:
+    """
+    Get the model columns needed to build the schema, to be used in a RETURNING clause.
+
+    Returns None when the schema needs something that is not a plain column of the model
+    (relationships, properties...), in that case the ORM instance has to be loaded.
+    """
+    graph = PydanticGraph.from_model(schema)
+    if graph.relationships:
+        return None
+
+    columns = []
+    for column in graph.columns:
+        attr = safe_getattr(model, column, default=None)
+        if not isinstance(attr, InstrumentedAttribute) or not isinstance(
+            attr.property, ColumnProperty
+        ):
+            return None
+        columns.append(attr)
+
+    return tuple(columns)
+
+
+@lru_cache(maxsize=None)
+def required_attributes_from_pydantic(
+    model: Type[DeclarativeBase], schema: Type[BaseModel] | None = None
+) -> frozenset[str]:
+    """
+    Get the attributes of the model (columns and relationships) that have to be loaded in an
+    instance to build the schema. Without schema all the columns are required.
+    """
+    mapper = inspect(model)
+    if schema is None:
+        return frozenset(mapper.column_attrs.keys())
+
+    graph = PydanticGraph.from_model(schema)
+    return frozenset(
+        key for key in (*graph.columns, *graph.relationships) if key in mapper.attrs.keys()
+    )
+
+
+def select_from_pydantic_cache_info():
+    """Hits, misses and size of the compiled options cache"""
+    return _compile_select_options.cache_info()
+
+
+def warm_up_select_from_pydantic(
+    pairs: Iterable[Tuple[Type[DeclarativeBase], Type[BaseModel]]],
+) -> None:
+    """Compile the options of the given (model, schema) pairs ahead of the first request"""
+    for model, schema in pairs:
+        try:
+            _compile_select_options(model, schema)
+        except AttributeError:
+            logger.exception(f"Could not compile select options for {model} and {schema}")
+
+    logger.info(f"Select from pydantic cache warmed up: {select_from_pydantic_cache_info()}")
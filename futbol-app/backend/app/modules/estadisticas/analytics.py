@@ -0,0 +1,198 @@
+"""
+Derived metrics of the estadisticas, computed with NumPy.
+
+The estadisticas are fetched in a single query as one array per column
+(`EstadisticaSQLRepository.get_columnas`), with the jugadores and partidos replaced by their
+position (`jugador_idx`, `partido_idx`), so every per jugador/partido total is a `np.bincount`
+and every rate is an element-wise operation, without a Python loop over the estadisticas.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# The columns of the estadisticas loaded as arrays, besides the jugador and partido positions
+ANALYTICS_COLUMNS = (
+    "goles",
+    "asistencias",
+    "tarjetas_amarillas",
+    "tarjetas_rojas",
+    "minutos_jugados",
+    "titular",
+)
+
+
+@dataclass
+class EstadisticasArrays:
+    jugador_ids: List[str]
+    partido_ids: List[str]
+    jugador_idx: np.ndarray
+    partido_idx: np.ndarray
+    goles: np.ndarray
+    asistencias: np.ndarray
+    tarjetas_amarillas: np.ndarray
+    tarjetas_rojas: np.ndarray
+    minutos_jugados: np.ndarray
+    titular: np.ndarray
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence | None]) -> "EstadisticasArrays":
+        """
+        Build the arrays from the columns of `get_columnas`: the unique `jugador_ids` and
+        `partido_ids`, the position of the jugador and partido of every estadistica in them
+        (`jugador_idx`, `partido_idx`) and the `ANALYTICS_COLUMNS`. A missing (NULL) column is
+        empty.
+
+        The ids are kept as text, they are parsed when the metrics are validated.
+        """
+        return cls(
+            jugador_ids=list(columns["jugador_ids"] or ()),
+            partido_ids=list(columns["partido_ids"] or ()),
+            jugador_idx=_array(columns["jugador_idx"]),
+            partido_idx=_array(columns["partido_idx"]),
+            **{
+                name: _array(columns[name], bool if name == "titular" else np.int64)
+                for name in ANALYTICS_COLUMNS
+            },
+        )
+
+    @property
+    def tarjetas(self) -> np.ndarray:
+        return self.tarjetas_amarillas + self.tarjetas_rojas
+
+
+def _array(values: Sequence | None, dtype=np.int64) -> np.ndarray:
+    values = values or ()
+    return np.fromiter(values, dtype=dtype, count=len(values))
+
+
+def per_90(values: np.ndarray, minutos: np.ndarray) -> np.ndarray:
+    """`values` every 90 minutes, 0 when there are no minutes"""
+    return np.divide(
+        values * 90.0, minutos, out=np.zeros(len(values), dtype=float), where=minutos > 0
+    )
+
+
+def ratio(values: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """`values / totals`, 0 when the total is 0"""
+    return np.divide(values, totals, out=np.zeros(len(values), dtype=float), where=totals > 0)
+
+
+def z_scores(values: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+    """
+    Standard score of every value against the values selected by `mask` (the whole squad by
+    default). The ones outside the mask and the ones of a squad without spread get 0.
+    """
+    mask = np.ones(len(values), dtype=bool) if mask is None else mask
+    scores = np.zeros(len(values), dtype=float)
+    if not mask.any():
+        return scores
+
+    std = values[mask].std()
+    if std > 0:
+        scores[mask] = (values[mask] - values[mask].mean()) / std
+    return scores
+
+
+def metricas_jugadores(datos: EstadisticasArrays) -> List[Dict]:
+    """
+    Totals and derived metrics of every jugador.
+
+    `participacion_goles` is the share of the goles of the partidos the jugador played in
+    (counting the goles of the estadisticas) that the jugador scored or assisted, and the `z_*`
+    metrics compare the per 90 rates with the rest of the squad (only the jugadores with
+    minutes).
+    """
+    n_jugadores = len(datos.jugador_ids)
+
+    def por_jugador(values: np.ndarray) -> np.ndarray:
+        return np.bincount(datos.jugador_idx, weights=values, minlength=n_jugadores).astype(
+            np.int64
+        )
+
+    partidos = np.bincount(datos.jugador_idx, minlength=n_jugadores)
+    titularidades = por_jugador(datos.titular)
+    goles = por_jugador(datos.goles)
+    asistencias = por_jugador(datos.asistencias)
+    amarillas = por_jugador(datos.tarjetas_amarillas)
+    rojas = por_jugador(datos.tarjetas_rojas)
+    minutos = por_jugador(datos.minutos_jugados)
+    participaciones = goles + asistencias
+
+    # Goles of every partido, added to each estadistica of the partido and then to the jugador
+    goles_partido = np.bincount(
+        datos.partido_idx, weights=datos.goles, minlength=len(datos.partido_ids)
+    )
+    goles_equipo = por_jugador(goles_partido[datos.partido_idx])
+
+    goles_por_90 = per_90(goles, minutos)
+    asistencias_por_90 = per_90(asistencias, minutos)
+    participaciones_por_90 = per_90(participaciones, minutos)
+    con_minutos = minutos > 0
+
+    metricas = {
+        "jugador_id": datos.jugador_ids,
+        "partidos": partidos,
+        "titularidades": titularidades,
+        "minutos_jugados": minutos,
+        "goles": goles,
+        "asistencias": asistencias,
+        "tarjetas_amarillas": amarillas,
+        "tarjetas_rojas": rojas,
+        "minutos_por_partido": ratio(minutos, partidos),
+        "goles_por_90": goles_por_90,
+        "asistencias_por_90": asistencias_por_90,
+        "participaciones_por_90": participaciones_por_90,
+        "tarjetas_por_90": per_90(amarillas + rojas, minutos),
+        "participacion_goles": ratio(participaciones, goles_equipo),
+        "z_goles_por_90": z_scores(goles_por_90, con_minutos),
+        "z_asistencias_por_90": z_scores(asistencias_por_90, con_minutos),
+        "z_participaciones_por_90": z_scores(participaciones_por_90, con_minutos),
+    }
+    return _records(metricas, n_jugadores)
+
+
+def metricas_partidos(datos: EstadisticasArrays) -> List[Dict]:
+    """
+    Totals and derived metrics of every partido. `participacion_maxima` is the biggest share of
+    the goles of the partido scored or assisted by a single jugador.
+    """
+    n_partidos = len(datos.partido_ids)
+
+    def por_partido(values: np.ndarray) -> np.ndarray:
+        return np.bincount(datos.partido_idx, weights=values, minlength=n_partidos).astype(
+            np.int64
+        )
+
+    goles = por_partido(datos.goles)
+    asistencias = por_partido(datos.asistencias)
+    minutos = por_partido(datos.minutos_jugados)
+
+    participacion = ratio(datos.goles + datos.asistencias, goles[datos.partido_idx])
+    participacion_maxima = np.zeros(n_partidos, dtype=float)
+    np.maximum.at(participacion_maxima, datos.partido_idx, participacion)
+
+    metricas = {
+        "partido_id": datos.partido_ids,
+        "jugadores": np.bincount(datos.partido_idx, minlength=n_partidos),
+        "titulares": por_partido(datos.titular),
+        "minutos_jugados": minutos,
+        "goles": goles,
+        "asistencias": asistencias,
+        "tarjetas_amarillas": por_partido(datos.tarjetas_amarillas),
+        "tarjetas_rojas": por_partido(datos.tarjetas_rojas),
+        "goles_por_90": per_90(goles, minutos),
+        "tarjetas_por_90": per_90(por_partido(datos.tarjetas), minutos),
+        "participacion_maxima": participacion_maxima,
+    }
+    return _records(metricas, n_partidos)
+
+
+def _records(metricas: Dict[str, Sequence], size: int) -> List[Dict]:
+    """Columns to rows, with the NumPy scalars converted to Python ones"""
+    columns = {
+        name: values.tolist() if isinstance(values, np.ndarray) else list(values)
+        for name, values in metricas.items()
+    }
+    return [{name: values[i] for name, values in columns.items()} for i in range(size)]
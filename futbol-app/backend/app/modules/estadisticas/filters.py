@@ -35,9 +35,12 @@ class EstadisticaFilter(Filter):
     asistencias_min: int | None = None
     asistencias_max: int | None = None
 
-    class Config:
+    class Constants(Filter.Constants):
         model = Estadistica
 
+    def filter(self, query):
+        return self.apply(query)
+
     def apply(self, query):
         if self.jugador_id:
             query = query.filter(Estadistica.jugador_id == self.jugador_id)
@@ -1,13 +1,45 @@
 from __future__ import annotations
 import uuid
+from datetime import datetime
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import FetchedValue, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database.base import Base
 from app.database.mixins import TimestampMixin
 
 class Estadistica(TimestampMixin, Base):
     __tablename__ = "estadisticas"
+    __table_args__ = (
+        # Covers the totals of a range of partidos (leaderboard with filters) with index only scans
+        Index(
+            "ix_estadisticas_partido_id",
+            "partido_id",
+            postgresql_include=[
+                "jugador_id",
+                "goles",
+                "asistencias",
+                "tarjetas_amarillas",
+                "tarjetas_rojas",
+                "minutos_jugados",
+                "titular",
+            ],
+        ),
+        # History of a jugador in order (series, form, streaks) with index only scans
+        Index(
+            "ix_estadisticas_jugador_id_fecha",
+            "jugador_id",
+            "fecha",
+            "partido_id",
+            postgresql_include=[
+                "goles",
+                "asistencias",
+                "tarjetas_amarillas",
+                "tarjetas_rojas",
+                "minutos_jugados",
+                "titular",
+            ],
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     jugador_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("jugadores.id", ondelete="CASCADE"))
@@ -18,7 +50,50 @@ class Estadistica(TimestampMixin, Base):
     tarjetas_rojas: Mapped[int] = mapped_column(default=0)
     minutos_jugados: Mapped[int] = mapped_column(default=0)
     titular: Mapped[bool] = mapped_column(default=False)
+    # Copy of the fecha of the partido, set by the triggers (see `triggers.py`)
+    fecha: Mapped[datetime | None] = mapped_column(
+        server_default=FetchedValue(), server_onupdate=FetchedValue()
+    )
 
     # Relaciones
     jugador: Mapped["Jugador"] = relationship("Jugador", backref="estadisticas", lazy="joined")
-    partido: Mapped["Partido"] = relationship("Partido", backref="estadisticas", lazy="joined") 
\ No newline at end of file
+    partido: Mapped["Partido"] = relationship("Partido", backref="estadisticas", lazy="joined") 
+
+class ResumenJugador(Base):
+    """
+    Totals of the estadisticas of every jugador, kept up to date by the triggers on
+    `estadisticas` (see `app.modules.estadisticas.triggers`). Only the jugadores with
+    estadisticas have a row.
+    """
+
+    __tablename__ = "resumen_jugadores"
+
+    jugador_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("jugadores.id", ondelete="CASCADE"), primary_key=True
+    )
+    partidos: Mapped[int] = mapped_column(default=0)
+    titularidades: Mapped[int] = mapped_column(default=0)
+    goles: Mapped[int] = mapped_column(default=0)
+    asistencias: Mapped[int] = mapped_column(default=0)
+    tarjetas_amarillas: Mapped[int] = mapped_column(default=0)
+    tarjetas_rojas: Mapped[int] = mapped_column(default=0)
+    minutos_jugados: Mapped[int] = mapped_column(default=0)
+
+
+# One index per ranking of the leaderboard, a top N is a (backward) scan of the first N entries.
+# The `jugador_id` breaks the ties so the order is stable
+for _column in (
+    ResumenJugador.partidos,
+    ResumenJugador.goles,
+    ResumenJugador.asistencias,
+    ResumenJugador.tarjetas_amarillas,
+    ResumenJugador.tarjetas_rojas,
+    ResumenJugador.minutos_jugados,
+):
+    Index(f"ix_resumen_jugadores_{_column.key}", _column, ResumenJugador.jugador_id)
+
+Index(
+    "ix_resumen_jugadores_tarjetas",
+    ResumenJugador.tarjetas_amarillas + ResumenJugador.tarjetas_rojas,
+    ResumenJugador.jugador_id,
+)
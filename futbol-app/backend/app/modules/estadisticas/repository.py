@@ -1,47 +1,391 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict, Optional
-from app.modules.estadisticas.models import Estadistica
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import (
+    Numeric,
+    Select,
+    String,
+    asc,
+    cast,
+    delete,
+    desc,
+    distinct,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from typing import List, Dict
+
+from app.core.config import settings
+from app.dependency_registry import registry
+from app.modules.estadisticas import triggers  # noqa: F401
+from app.modules.estadisticas.analytics import ANALYTICS_COLUMNS
+from app.modules.estadisticas.models import Estadistica, ResumenJugador
+from app.modules.estadisticas.schemas import EstadisticaResponse, Orden, OrdenarResumenPor
+from app.modules.jugadores.models import Jugador
+from app.modules.partidos.models import Partido
+from app.modules.partidos.schemas import TipoPartido
+from app.repositories.sql_repository import SQLAlchemyRepository
+
 
 class EstadisticaRepository:
-    def __init__(self, db: Session):
-        self.db = db
+    """Base repository interface for Estadistica"""
 
-    def get_all(self) -> List[Estadistica]:
-        return self.db.query(Estadistica).all()
 
-    def get_by_id(self, estadistica_id: int) -> Optional[Estadistica]:
-        return self.db.query(Estadistica).filter(Estadistica.id == estadistica_id).first()
+class EstadisticaSQLRepository(SQLAlchemyRepository[Estadistica]):
+    model: Estadistica = Estadistica
+    response_models = (EstadisticaResponse,)
 
     def get_by_partido(self, partido_id: int) -> List[Estadistica]:
-        return self.db.query(Estadistica).filter(Estadistica.partido_id == partido_id).all()
+        """Get all estadisticas for a specific partido
+        Args:
+            partido_id (int): The ID of the partido
+        Returns:
+            List[Estadistica]: List of estadisticas for the partido
+        """
+        return self.get_all(base_query=select(self.model).where(self.model.partido_id == partido_id))
 
     def get_by_jugador(self, jugador_id: int) -> List[Estadistica]:
-        return self.db.query(Estadistica).filter(Estadistica.jugador_id == jugador_id).all()
-
-    def create(self, estadistica: Estadistica) -> Estadistica:
-        self.db.add(estadistica)
-        self.db.commit()
-        self.db.refresh(estadistica)
-        return estadistica
-
-    def update(self, estadistica: Estadistica) -> Estadistica:
-        self.db.commit()
-        self.db.refresh(estadistica)
-        return estadistica
-
-    def delete(self, estadistica: Estadistica) -> None:
-        self.db.delete(estadistica)
-        self.db.commit()
-
-    def get_resumen_jugadores(self) -> List[Dict]:
-        return self.db.query(
-            Estadistica.jugador_id,
-            func.count(Estadistica.id).label('total_partidos'),
-            func.sum(Estadistica.goles).label('total_goles'),
-            func.sum(Estadistica.asistencias).label('total_asistencias'),
-            func.sum(Estadistica.tarjetas_amarillas).label('total_amarillas'),
-            func.sum(Estadistica.tarjetas_rojas).label('total_rojas'),
-            func.sum(Estadistica.minutos_jugados).label('minutos_totales'),
-            func.avg(Estadistica.minutos_jugados).label('promedio_minutos')
-        ).group_by(Estadistica.jugador_id).all() 
\ No newline at end of file
+        """Get all estadisticas for a specific jugador
+        Args:
+            jugador_id (int): The ID of the jugador
+        Returns:
+            List[Estadistica]: List of estadisticas for the jugador
+        """
+        return self.get_all(base_query=select(self.model).where(self.model.jugador_id == jugador_id))
+
+    @SQLAlchemyRepository.read_only
+    def get_resumen_jugadores(
+        self,
+        ordenar_por: OrdenarResumenPor | None = None,
+        orden: Orden = Orden.DESC,
+        limite: int | None = None,
+        fecha_desde: datetime | None = None,
+        fecha_hasta: datetime | None = None,
+        tipo: TipoPartido | None = None,
+    ) -> List[Dict]:
+        """Get a summary of estadisticas by jugador
+        Without filters the totals come from `resumen_jugadores`, and a ranking is an index scan
+        of its first `limite` entries. With a range of dates or a tipo of partido they are
+        aggregated from the estadisticas of the matching partidos.
+        Args:
+            ordenar_por (OrdenarResumenPor): The total to rank the jugadores by
+            orden (Orden): The direction of the ranking
+            limite (int): How many jugadores to return (the top N)
+            fecha_desde (datetime): Only count the partidos played since this date
+            fecha_hasta (datetime): Only count the partidos played until this date
+            tipo (TipoPartido): Only count the partidos of this tipo
+        Returns:
+            List[Dict]: List of dictionaries with the totals of every jugador
+        """
+        if fecha_desde or fecha_hasta or tipo:
+            query = self._filter_partidos(
+                self._resumen_from_estadisticas(), fecha_desde, fecha_hasta, tipo
+            )
+            totals = query.subquery("resumen")
+        else:
+            totals = ResumenJugador.__table__
+
+        query = select(
+            totals.c.jugador_id,
+            Jugador.nombre,
+            Jugador.apellido,
+            totals.c.partidos.label('total_partidos'),
+            totals.c.goles.label('total_goles'),
+            totals.c.asistencias.label('total_asistencias'),
+            totals.c.tarjetas_amarillas.label('total_amarillas'),
+            totals.c.tarjetas_rojas.label('total_rojas'),
+            totals.c.minutos_jugados.label('minutos_totales'),
+            (cast(totals.c.minutos_jugados, Numeric) / totals.c.partidos).label('promedio_minutos'),
+        ).join(Jugador, Jugador.id == totals.c.jugador_id)
+
+        if ordenar_por:
+            ranking = {
+                OrdenarResumenPor.PARTIDOS: totals.c.partidos,
+                OrdenarResumenPor.GOLES: totals.c.goles,
+                OrdenarResumenPor.ASISTENCIAS: totals.c.asistencias,
+                OrdenarResumenPor.AMARILLAS: totals.c.tarjetas_amarillas,
+                OrdenarResumenPor.ROJAS: totals.c.tarjetas_rojas,
+                # Same expression as `ix_resumen_jugadores_tarjetas`
+                OrdenarResumenPor.TARJETAS: totals.c.tarjetas_amarillas + totals.c.tarjetas_rojas,
+                OrdenarResumenPor.MINUTOS: totals.c.minutos_jugados,
+            }[ordenar_por]
+            direction = desc if orden == Orden.DESC else asc
+            query = query.order_by(direction(ranking), direction(totals.c.jugador_id))
+
+        return self.db_session.execute(query.limit(limite)).all()
+
+    def _filter_partidos(
+        self,
+        query: Select,
+        fecha_desde: datetime | None = None,
+        fecha_hasta: datetime | None = None,
+        tipo: TipoPartido | None = None,
+    ) -> Select:
+        """Keep only the estadisticas of the partidos in the range of dates and of the tipo"""
+        if not (fecha_desde or fecha_hasta or tipo):
+            return query
+
+        query = query.join(Partido, Partido.id == self.model.partido_id)
+        if fecha_desde:
+            query = query.where(Partido.fecha >= fecha_desde)
+        if fecha_hasta:
+            query = query.where(Partido.fecha <= fecha_hasta)
+        if tipo:
+            query = query.where(Partido.tipo == tipo)
+        return query
+
+    @SQLAlchemyRepository.read_only
+    def get_columnas(
+        self,
+        fecha_desde: datetime | None = None,
+        fecha_hasta: datetime | None = None,
+        tipo: TipoPartido | None = None,
+    ) -> Dict[str, list | None]:
+        """Get the estadisticas as one array per column, in a single row, for the analytics
+        The jugadores and partidos come as their position (`jugador_idx`, `partido_idx`) in the
+        sorted `jugador_ids` and `partido_ids`, so they don't have to be indexed in Python.
+        Args:
+            fecha_desde (datetime): Only the partidos played since this date
+            fecha_hasta (datetime): Only the partidos played until this date
+            tipo (TipoPartido): Only the partidos of this tipo
+        Returns:
+            Dict[str, list | None]: The arrays by name, None when there are no estadisticas
+        """
+        query = select(
+            (func.dense_rank().over(order_by=self.model.jugador_id) - 1).label('jugador_idx'),
+            (func.dense_rank().over(order_by=self.model.partido_id) - 1).label('partido_idx'),
+            self.model.jugador_id,
+            self.model.partido_id,
+            *(getattr(self.model, column) for column in ANALYTICS_COLUMNS),
+        )
+        ranked = self._filter_partidos(query, fecha_desde, fecha_hasta, tipo).subquery()
+
+        def unique_ids(column):
+            # Sorted like the dense_rank, as text so the driver doesn't have to parse a uuid[]
+            return cast(
+                func.array_agg(aggregate_order_by(distinct(column), column)), ARRAY(String)
+            )
+
+        # Every array_agg consumes the rows in the same order, so the arrays are aligned
+        return self.db_session.execute(
+            select(
+                unique_ids(ranked.c.jugador_id).label('jugador_ids'),
+                unique_ids(ranked.c.partido_id).label('partido_ids'),
+                func.array_agg(ranked.c.jugador_idx).label('jugador_idx'),
+                func.array_agg(ranked.c.partido_idx).label('partido_idx'),
+                *(func.array_agg(ranked.c[column]).label(column) for column in ANALYTICS_COLUMNS),
+            )
+        ).one()._asdict()
+
+    def _historial(
+        self,
+        jugador_id: UUID,
+        fecha_desde: datetime | None = None,
+        fecha_hasta: datetime | None = None,
+        tipo: TipoPartido | None = None,
+    ) -> Select:
+        """The estadisticas of a jugador, read from `ix_estadisticas_jugador_id_fecha`
+        Only filtering by tipo needs to join the partidos.
+        """
+        query = select(
+            self.model.partido_id,
+            self.model.fecha,
+            self.model.goles,
+            self.model.asistencias,
+            self.model.minutos_jugados,
+        ).where(self.model.jugador_id == jugador_id)
+        if fecha_desde:
+            query = query.where(self.model.fecha >= fecha_desde)
+        if fecha_hasta:
+            query = query.where(self.model.fecha <= fecha_hasta)
+        if tipo:
+            query = query.join(Partido, Partido.id == self.model.partido_id).where(
+                Partido.tipo == tipo
+            )
+        return query
+
+    @SQLAlchemyRepository.read_only
+    def get_serie_jugador(self, jugador_id: UUID, ventana: int = 5, **filters) -> List[Dict]:
+        """Get the estadisticas of a jugador in order, with their rolling totals
+        Args:
+            jugador_id (UUID): The ID of the jugador
+            ventana (int): How many partidos (the current and the previous ones) the rolling
+                totals and averages include
+            **filters: `fecha_desde`, `fecha_hasta` and `tipo` of the partidos
+        Returns:
+            List[Dict]: One row per partido, by fecha
+        """
+        historial = self._historial(jugador_id, **filters).subquery()
+        orden = (historial.c.fecha, historial.c.partido_id)
+        # Every window has the same order, so PostgreSQL sorts the rows only once
+        en_ventana = dict(order_by=orden, rows=(-(ventana - 1), 0))
+
+        return self.db_session.execute(
+            select(
+                historial,
+                func.count().over(**en_ventana).label('partidos_ventana'),
+                func.sum(historial.c.goles).over(**en_ventana).label('goles_ventana'),
+                func.sum(historial.c.asistencias).over(**en_ventana).label('asistencias_ventana'),
+                func.sum(historial.c.minutos_jugados).over(**en_ventana).label('minutos_ventana'),
+                func.avg(historial.c.goles).over(**en_ventana).label('promedio_goles_ventana'),
+                func.avg(historial.c.minutos_jugados)
+                .over(**en_ventana)
+                .label('promedio_minutos_ventana'),
+                func.sum(historial.c.goles)
+                .over(order_by=orden, rows=(None, 0))
+                .label('goles_acumulados'),
+            ).order_by(*orden)
+        ).all()
+
+    @SQLAlchemyRepository.read_only
+    def get_forma_jugador(self, jugador_id: UUID, ultimos: int = 5, **filters) -> Dict:
+        """Get the totals of the last partidos of a jugador
+        Only the last `ultimos` entries of the index are read.
+        Args:
+            jugador_id (UUID): The ID of the jugador
+            ultimos (int): How many partidos
+            **filters: `fecha_desde`, `fecha_hasta` and `tipo` of the partidos
+        Returns:
+            Dict: The totals and averages and the range of dates of those partidos
+        """
+        ultimos_partidos = (
+            self._historial(jugador_id, **filters)
+            .order_by(self.model.fecha.desc(), self.model.partido_id.desc())
+            .limit(ultimos)
+            .subquery()
+        )
+        return self.db_session.execute(
+            select(
+                func.count().label('partidos'),
+                func.coalesce(func.sum(ultimos_partidos.c.goles), 0).label('goles'),
+                func.coalesce(func.sum(ultimos_partidos.c.asistencias), 0).label('asistencias'),
+                func.coalesce(func.sum(ultimos_partidos.c.minutos_jugados), 0).label(
+                    'minutos_jugados'
+                ),
+                func.coalesce(func.avg(ultimos_partidos.c.goles), 0).label('promedio_goles'),
+                func.coalesce(func.avg(ultimos_partidos.c.minutos_jugados), 0).label(
+                    'promedio_minutos'
+                ),
+                func.min(ultimos_partidos.c.fecha).label('desde'),
+                func.max(ultimos_partidos.c.fecha).label('hasta'),
+            )
+        ).one()
+
+    @SQLAlchemyRepository.read_only
+    def get_rachas_jugador(self, jugador_id: UUID, **filters) -> List[Dict]:
+        """Get the scoring streaks of a jugador (consecutive partidos played with goles)
+        The streaks are the groups of consecutive scoring partidos ("gaps and islands"): the
+        row number among all the partidos minus the row number among the partidos with the same
+        result (scored or not) is constant inside a streak.
+        Args:
+            jugador_id (UUID): The ID of the jugador
+            **filters: `fecha_desde`, `fecha_hasta` and `tipo` of the partidos
+        Returns:
+            List[Dict]: Every streak with its length (`partidos`), its range of dates and if it
+                includes the last partido (`actual`)
+        """
+        historial = self._historial(jugador_id, **filters).subquery()
+        orden = (historial.c.fecha, historial.c.partido_id)
+        anoto = historial.c.goles > 0
+
+        numerados = select(
+            historial.c.fecha,
+            anoto.label('anoto'),
+            (
+                func.row_number().over(order_by=orden)
+                - func.row_number().over(partition_by=anoto, order_by=orden)
+            ).label('grupo'),
+            func.row_number()
+            .over(order_by=(historial.c.fecha.desc(), historial.c.partido_id.desc()))
+            .label('desde_el_ultimo'),
+        ).subquery()
+
+        return self.db_session.execute(
+            select(
+                func.count().label('partidos'),
+                func.min(numerados.c.fecha).label('desde'),
+                func.max(numerados.c.fecha).label('hasta'),
+                (func.min(numerados.c.desde_el_ultimo) == 1).label('actual'),
+            )
+            .where(numerados.c.anoto)
+            .group_by(numerados.c.grupo)
+        ).all()
+
+    def _resumen_from_estadisticas(self):
+        """The totals of every jugador computed from the raw estadisticas"""
+        return select(
+            self.model.jugador_id,
+            func.count(self.model.id).label('partidos'),
+            func.count(self.model.id).filter(self.model.titular).label('titularidades'),
+            func.sum(self.model.goles).label('goles'),
+            func.sum(self.model.asistencias).label('asistencias'),
+            func.sum(self.model.tarjetas_amarillas).label('tarjetas_amarillas'),
+            func.sum(self.model.tarjetas_rojas).label('tarjetas_rojas'),
+            func.sum(self.model.minutos_jugados).label('minutos_jugados'),
+        ).group_by(self.model.jugador_id)
+
+    def verify_resumen_jugadores(self) -> List[Dict]:
+        """Compare `resumen_jugadores` with the raw estadisticas
+        Returns:
+            List[Dict]: The jugadores whose totals don't match, with the expected (`esperado`)
+                and the stored (`actual`) values. Empty when the table is in sync
+        """
+        expected = self._resumen_from_estadisticas().subquery()
+        stored = ResumenJugador.__table__
+        totals = [column.key for column in stored.c if column.key != 'jugador_id']
+
+        rows = self.db_session.execute(
+            select(expected, stored)
+            .select_from(
+                expected.join(stored, stored.c.jugador_id == expected.c.jugador_id, full=True)
+            )
+            .where(
+                tuple_(*(expected.c[key] for key in totals)).is_distinct_from(
+                    tuple_(*(stored.c[key] for key in totals))
+                )
+            )
+        ).all()
+
+        differences = []
+        for row in rows:
+            esperado, actual = row[: len(expected.c)], row[len(expected.c) :]
+            differences.append(
+                {
+                    'jugador_id': esperado[0] or actual[0],
+                    'esperado': dict(zip(expected.c.keys(), esperado)) if esperado[0] else None,
+                    'actual': dict(zip(stored.c.keys(), actual)) if actual[0] else None,
+                }
+            )
+        return differences
+
+    def rebuild_resumen_jugadores(self) -> int:
+        """Recompute `resumen_jugadores` from the raw estadisticas
+        The writes on estadisticas are blocked until the rebuild is committed, so no delta
+        applied by the triggers is lost.
+        Returns:
+            int: The number of jugadores in the summary
+        """
+        resumen = self._resumen_from_estadisticas()
+        self.db_session.execute(text('SET LOCAL statement_timeout = 0'))
+        self.db_session.execute(text('LOCK TABLE estadisticas IN SHARE ROW EXCLUSIVE MODE'))
+        self.db_session.execute(delete(ResumenJugador))
+        result = self.db_session.execute(
+            insert(ResumenJugador).from_select(
+                [column.key for column in resumen.selected_columns], resumen
+            )
+        )
+        self.db_session.commit()
+        return result.rowcount
+
+repositories = {
+    "SQL": EstadisticaSQLRepository,
+}
+
+registry.register(
+    EstadisticaRepository,
+    to=repositories[settings.REPOSITORY_NAME],
+)
@@ -1,33 +1,192 @@
 """Module with the routers related to the estadisticas service"""
 
 from copy import deepcopy
+from datetime import datetime
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, status
+from app.core.server_timing import TimedRoute
+from fastapi_filter import FilterDepends
+from fastapi_injector import Injected
 
+from app.core.streaming import StreamFormat, stream_response
+from app.modules.estadisticas.filters import EstadisticaFilter
+from app.modules.estadisticas.schemas import (
+    EstadisticaResponse,
+    FormaJugadorResponse,
+    MetricasJugador,
+    MetricasPartido,
+    Orden,
+    OrdenarResumenPor,
+    RachasJugadorResponse,
+    ResumenJugadorResponse,
+    SerieJugadorResponse,
+)
+from app.modules.estadisticas.service import EstadisticaService
+from app.modules.partidos.schemas import TipoPartido
+from app.repositories.custom_pagination import CountPage, CountParams
 
+router = APIRouter(route_class=TimedRoute)
 
-router = APIRouter(prefix="/estadisticas", tags=["estadisticas"])
 
+@router.get(
+    "/export",
+    response_description="Stream all the statistics",
+    status_code=status.HTTP_200_OK,
+    summary="Export all statistics",
+    description="Streams every statistic matching the filters as NDJSON (one statistic per line) or CSV, without pagination.",
+)
+def export_estadisticas(
+    estadistica_filter: EstadisticaFilter = FilterDepends(EstadisticaFilter),
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+    stream_format: StreamFormat = StreamFormat.NDJSON,
+):
+    estadisticas = estadistica_service.stream_all(
+        entity_filter=estadistica_filter,
+        response_model=EstadisticaResponse,
+    )
+    return stream_response(estadisticas, EstadisticaResponse, stream_format, filename="estadisticas")
 
-# @router.get(
-#     "",
-#     response_description="Get all statistics",
-#     status_code=status.HTTP_200_OK,
-#     summary="Get all statistics",
-#     description="Retrieves all statistics with pagination and filtering support.",
-# )
-# def get_estadisticas(
-#     estadistica_filter: EstadisticaFilter = FilterDepends(EstadisticaFilter),
-#     pagination_params: Params = Depends(),
-#     estadistica_service: EstadisticaService = Injected(EstadisticaService),
-# ) -> Page[EstadisticaResponse]:
-#     return estadistica_service.get_all(
-#         pagination_params=pagination_params,
-#         entity_filter=estadistica_filter,
-#         response_model=EstadisticaResponse,
-#     )
+
+@router.get(
+    "/resumen",
+    response_description="Get the players leaderboard",
+    status_code=status.HTTP_200_OK,
+    summary="Get the players leaderboard",
+    description="Returns the top `limite` players ranked by the selected total. Filter by a range of dates or a `tipo` of match to rank only those matches.",
+)
+def get_resumen_estadisticas(
+    ordenar_por: OrdenarResumenPor = OrdenarResumenPor.GOLES,
+    orden: Orden = Orden.DESC,
+    limite: int = Query(10, ge=1, le=100),
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> List[ResumenJugadorResponse]:
+    return estadistica_service.get_resumen_jugadores(
+        ordenar_por=ordenar_por,
+        orden=orden,
+        limite=limite,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo=tipo,
+    )
+
+
+@router.get(
+    "/metricas/jugadores",
+    response_description="Get the metrics of every player",
+    status_code=status.HTTP_200_OK,
+    summary="Get the players metrics",
+    description="Per 90 rates, goal involvement share and z-scores against the squad of every player, optionally only for a range of dates or a `tipo` of match.",
+)
+def get_metricas_jugadores(
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> List[MetricasJugador]:
+    return estadistica_service.get_metricas_jugadores(
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, tipo=tipo
+    )
+
+
+@router.get(
+    "/metricas/partidos",
+    response_description="Get the metrics of every match",
+    status_code=status.HTTP_200_OK,
+    summary="Get the matches metrics",
+    description="Totals, per 90 rates and the biggest goal involvement share of a single player of every match, optionally only for a range of dates or a `tipo` of match.",
+)
+def get_metricas_partidos(
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> List[MetricasPartido]:
+    return estadistica_service.get_metricas_partidos(
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, tipo=tipo
+    )
+
+
+@router.get(
+    "/jugadores/{jugador_id}/serie",
+    response_description="Get the statistics of a player over time",
+    status_code=status.HTTP_200_OK,
+    summary="Get the time series of a player",
+    description="Statistics of every match of the player by date, with the totals and averages of the last `ventana` matches and the running total of goals.",
+)
+def get_serie_jugador(
+    jugador_id: UUID,
+    ventana: int = Query(5, ge=1, le=100),
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> List[SerieJugadorResponse]:
+    return estadistica_service.get_serie_jugador(
+        jugador_id, ventana=ventana, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, tipo=tipo
+    )
+
+
+@router.get(
+    "/jugadores/{jugador_id}/forma",
+    response_description="Get the form of a player",
+    status_code=status.HTTP_200_OK,
+    summary="Get the form of a player",
+    description="Totals and averages of the last `ultimos` matches of the player.",
+)
+def get_forma_jugador(
+    jugador_id: UUID,
+    ultimos: int = Query(5, ge=1, le=100),
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> FormaJugadorResponse:
+    return estadistica_service.get_forma_jugador(
+        jugador_id, ultimos=ultimos, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, tipo=tipo
+    )
+
+
+@router.get(
+    "/jugadores/{jugador_id}/rachas",
+    response_description="Get the scoring streaks of a player",
+    status_code=status.HTTP_200_OK,
+    summary="Get the scoring streaks of a player",
+    description="Longest and current streak of consecutive matches played by the player with at least one goal.",
+)
+def get_rachas_jugador(
+    jugador_id: UUID,
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    tipo: TipoPartido | None = None,
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> RachasJugadorResponse:
+    return estadistica_service.get_rachas_jugador(
+        jugador_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, tipo=tipo
+    )
+
+
+@router.get(
+    "",
+    response_description="Get all statistics",
+    status_code=status.HTTP_200_OK,
+    summary="Get all statistics",
+    description="Retrieves all statistics with pagination and filtering support. Use `count=estimate`, `count=cached` or `count=none` to avoid the exact count on big scans.",
+)
+def get_estadisticas(
+    estadistica_filter: EstadisticaFilter = FilterDepends(EstadisticaFilter),
+    pagination_params: CountParams = Depends(),
+    estadistica_service: EstadisticaService = Injected(EstadisticaService),
+) -> CountPage[EstadisticaResponse]:
+    return estadistica_service.get_all(
+        pagination_params=pagination_params,
+        entity_filter=estadistica_filter,
+        response_model=EstadisticaResponse,
+    )
 
 
 # @router.get(
@@ -1,4 +1,6 @@
 from datetime import datetime
+from decimal import Decimal
+from enum import Enum
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -45,4 +47,97 @@ class EstadisticaJugador(BaseModel):
     titular: bool = False
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class OrdenarResumenPor(str, Enum):
+    PARTIDOS = "partidos"
+    GOLES = "goles"
+    ASISTENCIAS = "asistencias"
+    AMARILLAS = "amarillas"
+    ROJAS = "rojas"
+    TARJETAS = "tarjetas"
+    MINUTOS = "minutos"
+
+class Orden(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+class ResumenJugadorResponse(BaseModel):
+    jugador_id: UUID
+    nombre: str
+    apellido: str
+    total_partidos: int
+    total_goles: int
+    total_asistencias: int
+    total_amarillas: int
+    total_rojas: int
+    minutos_totales: int
+    promedio_minutos: Decimal
+
+    class Config:
+        from_attributes = True
+
+class MetricasJugador(BaseModel):
+    jugador_id: UUID
+    partidos: int
+    titularidades: int
+    minutos_jugados: int
+    goles: int
+    asistencias: int
+    tarjetas_amarillas: int
+    tarjetas_rojas: int
+    minutos_por_partido: float
+    goles_por_90: float
+    asistencias_por_90: float
+    participaciones_por_90: float
+    tarjetas_por_90: float
+    participacion_goles: float
+    z_goles_por_90: float
+    z_asistencias_por_90: float
+    z_participaciones_por_90: float
+
+class MetricasPartido(BaseModel):
+    partido_id: UUID
+    jugadores: int
+    titulares: int
+    minutos_jugados: int
+    goles: int
+    asistencias: int
+    tarjetas_amarillas: int
+    tarjetas_rojas: int
+    goles_por_90: float
+    tarjetas_por_90: float
+    participacion_maxima: float
+
+class SerieJugadorResponse(BaseModel):
+    partido_id: UUID
+    fecha: datetime
+    goles: int
+    asistencias: int
+    minutos_jugados: int
+    partidos_ventana: int
+    goles_ventana: int
+    asistencias_ventana: int
+    minutos_ventana: int
+    promedio_goles_ventana: float
+    promedio_minutos_ventana: float
+    goles_acumulados: int
+
+class FormaJugadorResponse(BaseModel):
+    partidos: int
+    goles: int
+    asistencias: int
+    minutos_jugados: int
+    promedio_goles: float
+    promedio_minutos: float
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None
+
+class RachaResponse(BaseModel):
+    partidos: int
+    desde: datetime
+    hasta: datetime
+
+class RachasJugadorResponse(BaseModel):
+    racha_maxima: Optional[RachaResponse] = None
+    racha_actual: Optional[RachaResponse] = None
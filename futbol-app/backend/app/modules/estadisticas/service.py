@@ -1,39 +1,94 @@
 """Module with the service related to the estadisticas service"""
 
-from typing import List, Type
+from typing import Dict, List
 from uuid import UUID
 
-from fastapi_pagination import Params
-from injector import inject
-from sqlalchemy import select
+from injector import Inject
+from sqlalchemy import delete
 
-from app.core.base.service import BaseService
+from app.modules.estadisticas.analytics import (
+    EstadisticasArrays,
+    metricas_jugadores,
+    metricas_partidos,
+)
 from app.modules.estadisticas.models import Estadistica
 from app.modules.estadisticas.repository import EstadisticaRepository
-from app.modules.estadisticas.schemas import EstadisticaCreate, EstadisticaUpdate
+from app.modules.estadisticas.schemas import (
+    EstadisticaCreate,
+    MetricasJugador,
+    MetricasPartido,
+    RachaResponse,
+    RachasJugadorResponse,
+)
+from app.services.base_crud_service import BaseService
 
 
-class EstadisticaService(BaseService[Estadistica, EstadisticaCreate, EstadisticaUpdate]):
-    @inject
-    def __init__(self, repository: EstadisticaRepository):
-        super().__init__(repository)
+class EstadisticaService(BaseService):
+    def __init__(self, repo: Inject[EstadisticaRepository]) -> None:
+        super().__init__(repo)
 
     def get_by_jugador(self, jugador_id: UUID) -> List[Estadistica]:
         """Get all statistics for a specific player."""
-        return self.repository.get_by_jugador(jugador_id)
+        return self.repo.get_by_jugador(jugador_id)
 
     def get_by_partido(self, partido_id: UUID) -> List[Estadistica]:
         """Get all statistics for a specific match."""
-        return self.repository.get_by_partido(partido_id)
+        return self.repo.get_by_partido(partido_id)
 
     def create_bulk(self, estadisticas: List[EstadisticaCreate]) -> List[Estadistica]:
         """Create multiple statistics."""
-        return self.repository.create_bulk(estadisticas)
+        return self.repo.bulk_create(estadisticas)
 
     def delete_by_jugador(self, jugador_id: UUID) -> None:
         """Delete all statistics for a specific player."""
-        self.repository.delete_by_jugador(jugador_id)
+        self.repo.delete_many(delete(Estadistica).where(Estadistica.jugador_id == jugador_id))
 
     def delete_by_partido(self, partido_id: UUID) -> None:
         """Delete all statistics for a specific match."""
-        self.repository.delete_by_partido(partido_id) 
\ No newline at end of file
+        self.repo.delete_many(delete(Estadistica).where(Estadistica.partido_id == partido_id))
+
+    def get_resumen_jugadores(self, **kwargs) -> List[Dict]:
+        """Get the totals of every player, optionally ranked."""
+        return self.repo.get_resumen_jugadores(**kwargs)
+
+    def verify_resumen_jugadores(self) -> List[Dict]:
+        """Get the players whose stored totals don't match their statistics."""
+        return self.repo.verify_resumen_jugadores()
+
+    def rebuild_resumen_jugadores(self) -> int:
+        """Recompute the totals of every player from their statistics."""
+        return self.repo.rebuild_resumen_jugadores()
+
+    def get_metricas_jugadores(self, **filters) -> List[MetricasJugador]:
+        """Get the derived metrics (per 90 rates, z-scores...) of every player."""
+        datos = EstadisticasArrays.from_columns(self.repo.get_columnas(**filters))
+        return [MetricasJugador(**metricas) for metricas in metricas_jugadores(datos)]
+
+    def get_metricas_partidos(self, **filters) -> List[MetricasPartido]:
+        """Get the derived metrics of every match."""
+        datos = EstadisticasArrays.from_columns(self.repo.get_columnas(**filters))
+        return [MetricasPartido(**metricas) for metricas in metricas_partidos(datos)]
+
+    def get_serie_jugador(self, jugador_id: UUID, ventana: int = 5, **filters) -> List[Dict]:
+        """Get the statistics of a player by date, with their rolling totals."""
+        return self.repo.get_serie_jugador(jugador_id, ventana=ventana, **filters)
+
+    def get_forma_jugador(self, jugador_id: UUID, ultimos: int = 5, **filters) -> Dict:
+        """Get the totals of the last matches of a player."""
+        return self.repo.get_forma_jugador(jugador_id, ultimos=ultimos, **filters)
+
+    def get_rachas_jugador(self, jugador_id: UUID, **filters) -> RachasJugadorResponse:
+        """Get the longest and the current scoring streak of a player."""
+        rachas = self.repo.get_rachas_jugador(jugador_id, **filters)
+        if not rachas:
+            return RachasJugadorResponse()
+
+        # On a tie the latest streak is the longest one
+        maxima = max(rachas, key=lambda racha: (racha.partidos, racha.hasta))
+        actual = next((racha for racha in rachas if racha.actual), None)
+        return RachasJugadorResponse(
+            racha_maxima=RachaResponse.model_validate(maxima, from_attributes=True),
+            racha_actual=(
+                RachaResponse.model_validate(actual, from_attributes=True) if actual else None
+            ),
+        )
@@ -0,0 +1,152 @@
+"""
+Triggers that keep the data derived from `estadisticas` in sync.
+
+The `resumen_jugadores` ones are statement level triggers with transition tables, so a bulk
+insert (COPY, INSERT ... SELECT, upserts) or a cascade delete applies one aggregated delta per
+jugador instead of one upsert per row. An UPDATE subtracts the old rows and adds the new ones,
+and the jugadores left without estadisticas are removed so the table matches a
+`GROUP BY jugador_id` of the raw data.
+
+The `fecha` ones copy the fecha of the partido to its estadisticas, so the history of a jugador
+is an index only scan of `(jugador_id, fecha)` without joining `partidos`.
+"""
+
+from sqlalchemy import DDL, event
+
+from app.database.base import Base
+
+RESUMEN_FUNCTION = "actualizar_resumen_jugadores"
+
+# Delta of the rows of a transition table, grouped by jugador
+_DELTA = """
+    SELECT
+        jugador_id,
+        count(*) AS partidos,
+        count(*) FILTER (WHERE titular) AS titularidades,
+        sum(goles) AS goles,
+        sum(asistencias) AS asistencias,
+        sum(tarjetas_amarillas) AS tarjetas_amarillas,
+        sum(tarjetas_rojas) AS tarjetas_rojas,
+        sum(minutos_jugados) AS minutos_jugados
+    FROM {table}
+    GROUP BY jugador_id
+"""
+
+CREATE_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {RESUMEN_FUNCTION}() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE resumen_jugadores AS r SET
+            partidos = r.partidos - d.partidos,
+            titularidades = r.titularidades - d.titularidades,
+            goles = r.goles - d.goles,
+            asistencias = r.asistencias - d.asistencias,
+            tarjetas_amarillas = r.tarjetas_amarillas - d.tarjetas_amarillas,
+            tarjetas_rojas = r.tarjetas_rojas - d.tarjetas_rojas,
+            minutos_jugados = r.minutos_jugados - d.minutos_jugados
+        FROM ({_DELTA.format(table="filas_anteriores")}) AS d
+        WHERE r.jugador_id = d.jugador_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumen_jugadores AS r (
+            jugador_id, partidos, titularidades, goles, asistencias,
+            tarjetas_amarillas, tarjetas_rojas, minutos_jugados
+        )
+        {_DELTA.format(table="filas_nuevas")}
+        ON CONFLICT (jugador_id) DO UPDATE SET
+            partidos = r.partidos + excluded.partidos,
+            titularidades = r.titularidades + excluded.titularidades,
+            goles = r.goles + excluded.goles,
+            asistencias = r.asistencias + excluded.asistencias,
+            tarjetas_amarillas = r.tarjetas_amarillas + excluded.tarjetas_amarillas,
+            tarjetas_rojas = r.tarjetas_rojas + excluded.tarjetas_rojas,
+            minutos_jugados = r.minutos_jugados + excluded.minutos_jugados;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM resumen_jugadores
+        WHERE partidos = 0 AND jugador_id IN (SELECT jugador_id FROM filas_anteriores);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+"""
+
+# A trigger with transition tables can only handle one event
+_TRIGGERS = {
+    "resumen_jugadores_insert": (
+        "AFTER INSERT ON estadisticas REFERENCING NEW TABLE AS filas_nuevas"
+    ),
+    "resumen_jugadores_update": (
+        "AFTER UPDATE ON estadisticas "
+        "REFERENCING OLD TABLE AS filas_anteriores NEW TABLE AS filas_nuevas"
+    ),
+    "resumen_jugadores_delete": (
+        "AFTER DELETE ON estadisticas REFERENCING OLD TABLE AS filas_anteriores"
+    ),
+}
+
+CREATE_TRIGGERS_SQL = [
+    f"CREATE TRIGGER {name} {when} FOR EACH STATEMENT EXECUTE FUNCTION {RESUMEN_FUNCTION}()"
+    for name, when in _TRIGGERS.items()
+]
+
+DROP_TRIGGERS_SQL = [f"DROP TRIGGER IF EXISTS {name} ON estadisticas" for name in _TRIGGERS]
+
+DROP_FUNCTION_SQL = f"DROP FUNCTION IF EXISTS {RESUMEN_FUNCTION}()"
+
+CREATE_FECHA_FUNCTIONS_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION copiar_fecha_partido() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.fecha := (SELECT fecha FROM partidos WHERE id = NEW.partido_id);
+        RETURN NEW;
+    END;
+    $$;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION propagar_fecha_partido() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE estadisticas SET fecha = NEW.fecha WHERE partido_id = NEW.id;
+        RETURN NULL;
+    END;
+    $$;
+    """,
+]
+
+CREATE_FECHA_TRIGGERS_SQL = [
+    "CREATE TRIGGER estadisticas_fecha BEFORE INSERT OR UPDATE OF partido_id ON estadisticas "
+    "FOR EACH ROW EXECUTE FUNCTION copiar_fecha_partido()",
+    "CREATE TRIGGER partidos_fecha AFTER UPDATE OF fecha ON partidos "
+    "FOR EACH ROW WHEN (OLD.fecha IS DISTINCT FROM NEW.fecha) "
+    "EXECUTE FUNCTION propagar_fecha_partido()",
+]
+
+DROP_FECHA_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS estadisticas_fecha ON estadisticas",
+    "DROP TRIGGER IF EXISTS partidos_fecha ON partidos",
+]
+
+DROP_FECHA_FUNCTIONS_SQL = [
+    "DROP FUNCTION IF EXISTS copiar_fecha_partido()",
+    "DROP FUNCTION IF EXISTS propagar_fecha_partido()",
+]
+
+
+# The migrations install the triggers, this covers the databases created with `create_all`
+for statement in [
+    CREATE_FUNCTION_SQL,
+    *DROP_TRIGGERS_SQL,
+    *CREATE_TRIGGERS_SQL,
+    *CREATE_FECHA_FUNCTIONS_SQL,
+    *DROP_FECHA_TRIGGERS_SQL,
+    *CREATE_FECHA_TRIGGERS_SQL,
+]:
+    event.listen(
+        Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
@@ -4,6 +4,8 @@ from typing import List, Optional
 from app.core.config import settings
 from app.dependency_registry import registry
 from app.modules.jugadores.models import Jugador
+from app.modules.jugadores.schemas import JugadorResponse
+from app.repositories.async_sql_repository import AsyncSQLAlchemyRepository
 from app.repositories.sql_repository import SQLAlchemyRepository
 
 
@@ -13,6 +15,7 @@ class JugadorRepository:
 
 class JugadorSQLRepository(SQLAlchemyRepository[Jugador]):
     model: Jugador = Jugador
+    response_models = (JugadorResponse,)
 
     def get_by_numero(self, numero: int) -> Optional[Jugador]:
         """Get a jugador by its number
@@ -31,11 +34,29 @@ class JugadorSQLRepository(SQLAlchemyRepository[Jugador]):
         return self.get_all(base_query=select(self.model).where(self.model.activo == True))
 
 
+class JugadorAsyncRepository:
+    """Base async repository interface for Jugador"""
+
+
+class JugadorAsyncSQLRepository(AsyncSQLAlchemyRepository[Jugador]):
+    model: Jugador = Jugador
+    response_models = (JugadorResponse,)
+
+
 repositories = {
     "SQL": JugadorSQLRepository,
 }
 
+async_repositories = {
+    "SQL": JugadorAsyncSQLRepository,
+}
+
 registry.register(
     JugadorRepository,
     to=repositories[settings.REPOSITORY_NAME],
+)
+
+registry.register(
+    JugadorAsyncRepository,
+    to=async_repositories[settings.REPOSITORY_NAME],
 ) 
\ No newline at end of file
@@ -1,17 +1,20 @@
 from fastapi import APIRouter, status, Body, Depends, HTTPException
+from app.core.server_timing import TimedRoute
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.modules.jugadores.schemas import JugadorCreate, JugadorResponse
-from app.modules.jugadores.service import JugadorService
+from app.modules.jugadores.service import JugadorAsyncService, JugadorService
 from fastapi_injector import Injected
 from app.modules.jugadores.filters import JugadorFilters
 from fastapi_filter import FilterDepends
-from fastapi_pagination import Page, Params
+from fastapi_pagination.cursor import CursorPage, CursorParams
 from app.core.permissions.auth import AuthenticatedUser
+from app.core.streaming import StreamFormat, stream_response
+from app.repositories.custom_pagination import CountPage, CountParams
 from fastapi import BackgroundTasks
 from app.modules.jugadores.schemas import JugadorUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -23,31 +26,69 @@ def create_player(
     player: JugadorCreate = Body(...),
     player_service: JugadorService = Injected(JugadorService),
 ) -> JugadorResponse:
-    return player_service.create(player)
+    return player_service.create(player, response_model=JugadorResponse)
 
 @router.get(
     "",
     response_description="Get all the created entities",
     status_code=status.HTTP_200_OK,
 )
-def get_all_players(
+async def get_all_players(
+    player_filter: JugadorFilters = FilterDepends(JugadorFilters),
+    player_service: JugadorAsyncService = Injected(JugadorAsyncService),
+    pagination_params: CountParams = Depends(),
+) -> CountPage[JugadorResponse]:
+    return await player_service.get_all(
+        entity_filter=player_filter,
+        pagination_params=pagination_params,
+        response_model=JugadorResponse,
+    )
+
+@router.get(
+    "/cursor",
+    response_description="Get the created entities using cursor pagination",
+    status_code=status.HTTP_200_OK,
+    summary="Get all players with cursor pagination",
+    description="Keyset paginated version of the players list. Use the `next_page` and `previous_page` cursors of the response to move between pages.",
+)
+def get_all_players_with_cursor(
     player_filter: JugadorFilters = FilterDepends(JugadorFilters),
     player_service: JugadorService = Injected(JugadorService),
-    pagination_params: Params = Depends(),
-) -> Page[JugadorResponse]:
+    pagination_params: CursorParams = Depends(),
+) -> CursorPage[JugadorResponse]:
     return player_service.get_all(
-        player_filter=player_filter,
+        entity_filter=player_filter,
         pagination_params=pagination_params,
         response_model=JugadorResponse,
     )
 
+@router.get(
+    "/export",
+    response_description="Stream all the players",
+    status_code=status.HTTP_200_OK,
+    summary="Export all players",
+    description="Streams every player matching the filters as NDJSON (one player per line) or CSV, without pagination.",
+)
+def export_players(
+    player_filter: JugadorFilters = FilterDepends(JugadorFilters),
+    player_service: JugadorService = Injected(JugadorService),
+    stream_format: StreamFormat = StreamFormat.NDJSON,
+):
+    players = player_service.stream_all(
+        entity_filter=player_filter,
+        response_model=JugadorResponse,
+    )
+    return stream_response(players, JugadorResponse, stream_format, filename="jugadores")
+
 @router.get(
     "/{player_id}",
     response_description="Get a player by id",
     status_code=status.HTTP_200_OK,
 )
-def get_player_by_id(player_id: UUID, player_service: JugadorService = Injected(JugadorService)):
-    player = player_service.get_by_id(player_id)
+async def get_player_by_id(
+    player_id: UUID, player_service: JugadorAsyncService = Injected(JugadorAsyncService)
+) -> JugadorResponse:
+    player = await player_service.get_by_id(player_id, response_model=JugadorResponse)
     if not player:
         raise HTTPException(status_code=404, detail="Jugador no encontrado")
     return player
@@ -57,11 +98,11 @@ def get_player_by_id(player_id: UUID, player_service: JugadorService = Injected(
     summary="Get your player profile",
     status_code=status.HTTP_200_OK,
 )
-def get_your_player_profile(
+async def get_your_player_profile(
     player_id: UUID = Depends(AuthenticatedUser.current_user_id),
-    player_service: JugadorService = Injected(JugadorService),
+    player_service: JugadorAsyncService = Injected(JugadorAsyncService),
 ) -> JugadorResponse:
-    return get_player_by_id(player_id, player_service)
+    return await get_player_by_id(player_id, player_service)
 
 
 @router.patch(
@@ -4,9 +4,9 @@ from uuid import UUID
 from injector import Inject
 
 from app.modules.jugadores.models import Jugador
-from app.modules.jugadores.repository import JugadorRepository
+from app.modules.jugadores.repository import JugadorAsyncRepository, JugadorRepository
 from app.modules.jugadores.schemas import JugadorCreate, JugadorUpdate
-from app.services.base_crud_service import BaseService
+from app.services.base_crud_service import AsyncBaseService, BaseService
 
 
 class JugadorService(BaseService):
@@ -18,3 +18,8 @@ class JugadorService(BaseService):
 
     def get_activos(self) -> List[Jugador]:
         return self.repo.get_activos()
+
+
+class JugadorAsyncService(AsyncBaseService):
+    def __init__(self, repo: Inject[JugadorAsyncRepository]) -> None:
+        super().__init__(repo)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List
 from uuid import UUID, uuid4
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database.base import Base
@@ -11,6 +11,10 @@ from app.database.mixins import TimestampMixin
 
 class Partido(TimestampMixin, Base):
     __tablename__ = "partidos"
+    __table_args__ = (
+        Index("ix_partidos_fecha", "fecha"),
+        Index("ix_partidos_tipo_fecha", "tipo", "fecha"),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     fecha: Mapped[datetime] = mapped_column()
@@ -5,6 +5,7 @@ from datetime import datetime
 from app.core.config import settings
 from app.dependency_registry import registry
 from app.modules.partidos.models import Partido
+from app.modules.partidos.schemas import PartidoResponse
 from app.repositories.sql_repository import SQLAlchemyRepository
 
 
@@ -14,6 +15,7 @@ class PartidoRepository:
 
 class PartidoSQLRepository(SQLAlchemyRepository[Partido]):
     model: Partido = Partido
+    response_models = (PartidoResponse,)
 
     def get_by_fecha(self, fecha: datetime) -> List[Partido]:
         """Get all partidos for a specific date
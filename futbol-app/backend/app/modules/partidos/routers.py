@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from app.core.server_timing import TimedRoute
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 # @router.get("/", response_model=List[Partido])
 # def get_partidos(
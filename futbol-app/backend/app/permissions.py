@@ -3,7 +3,6 @@ from abc import ABC, abstractmethod
 from fastapi import HTTPException, Request, Security, status
 from fastapi.security import APIKeyHeader
 from fastapi_injector import Injected
-from sqlalchemy import text
 
 from app.context import get_request_context
 from app.core.config import settings
@@ -91,9 +90,8 @@ class PermissionsDependency:
 def DisableRLS(db: DatabaseResource = Injected(DatabaseResource)):
     req_ctx = get_request_context()
     req_ctx.authenticated = False
-    db.session.execute(
-        text("SET LOCAL ROLE :role;").bindparams(role=settings.DB_ADMIN_ROLE),
-    )
+    # Only runs something when the transaction already started with the authenticated role
+    db.apply_session_config()
 
 
 def check_internal_api_key(
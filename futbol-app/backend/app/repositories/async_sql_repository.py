@@ -0,0 +1,354 @@
+import logging
+import uuid
+from functools import wraps
+from typing import Dict, List, Type, TypeVar
+
+import sqlalchemy
+from fastapi_filter.base.filter import BaseFilterModel
+from fastapi_pagination import Page, Params
+from fastapi_pagination.cursor import CursorPage, CursorParams
+from injector import Inject
+from pydantic import BaseModel
+from sqlalchemy import Selectable, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import load_only, selectinload
+
+from app.core.server_timing import phase, timed
+from app.database.base import AsyncDatabaseResource, Base
+from app.modules.db import returning_columns_from_pydantic, select_from_pydantic
+from app.repositories.base_repository import AsyncBaseRepository
+from app.repositories.clauses import OnConflictClause, do_default_on_conflict
+from app.repositories.custom_pagination import (
+    cte_pagination,
+    keyset_pagination,
+    offset_pagination,
+    use_cte_pagination,
+)
+from app.repositories.exceptions import DuplicateError, NotFoundError, ReferencedError
+from app.repositories.reference_loader import ReferenceLoader
+from app.repositories.sql_repository import SQLAlchemyRepository
+
+T = TypeVar("T", bound=Base)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSQLAlchemyRepository(AsyncBaseRepository[T]):
+    """
+    asyncio counterpart of `SQLAlchemyRepository`, running on an `AsyncSession` (asyncpg).
+
+    The ORM instances are returned with their attributes loaded (`expire_on_commit=False`) but
+    relationships can't be lazy loaded outside the session, so pass a `response_model` (its
+    relationships are eager loaded) when the result is going to be serialized.
+    """
+
+    model: Type[T]
+    response_models: tuple[Type[BaseModel], ...] = ()
+
+    # These helpers don't touch the session, they are shared with the sync repository
+    _add_updates_metadata = SQLAlchemyRepository._add_updates_metadata
+    _add_instance_updates_metadata = SQLAlchemyRepository._add_instance_updates_metadata
+    _defer_m2m_references = SQLAlchemyRepository._defer_m2m_references
+
+    def __init__(self, db: Inject[AsyncDatabaseResource]) -> None:
+        self.db = db
+        self.db_session = db.session
+
+    def _generate_select_from_pydantic(
+        self, pydantic_model: BaseModel, query: Selectable | None = None
+    ) -> select:
+        options = select_from_pydantic(self.model, pydantic_model)
+
+        return (
+            query.options(*options) if query is not None else select(self.model).options(*options)
+        )
+
+    def _base_query(self, **kwargs):
+        return select(self.model)
+
+    def _filtered_query(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        base_query: Selectable | None = None,
+        response_model: BaseModel | None = None,
+        **kwargs,
+    ) -> Selectable:
+        query = base_query if base_query is not None else self._base_query(**kwargs)
+        if response_model:
+            query = self._generate_select_from_pydantic(response_model, query)
+        if entity_filter:
+            query = entity_filter.filter(query)
+            try:
+                query = entity_filter.sort(query)
+            except AttributeError:
+                pass
+        return query
+
+    def read_only(func):
+        """Let the reads of the method go to a read replica (if there's any)"""
+
+        @wraps(func)
+        async def replica_wrapper(self, *args, **kwargs):
+            with self.db.replica(), phase("repository"):
+                return await func(self, *args, **kwargs)
+
+        return replica_wrapper
+
+    def handle_commit_errors(func):
+        @wraps(func)
+        async def exception_wrapper(self, *args, **kwargs):
+            try:
+                with phase("repository"):
+                    return await func(self, *args, **kwargs)
+            except sqlalchemy.exc.IntegrityError as e:
+                await self.db_session.rollback()
+                # asyncpg's exception is the cause of the DBAPI adapted one
+                pg_error = e.orig.__cause__
+                detail = getattr(pg_error, "detail", None) or ""
+                match getattr(e.orig, "sqlstate", None):
+                    case "23505":  # unique_violation
+                        raise DuplicateError.from_constraint_name(
+                            getattr(pg_error, "constraint_name", None), self.model
+                        ) from e
+                    case "23503":  # foreign_key_violation
+                        if "is still referenced from table" in detail:
+                            raise ReferencedError(
+                                detail=f"{self.model._display_name()} is being referenced by another table"
+                            ) from e
+                        raise ReferencedError(detail=detail or str(pg_error)) from e
+                    case _:
+                        raise e
+
+        return exception_wrapper
+
+    @timed("repository")
+    async def get(
+        self,
+        entity_id: uuid.UUID,
+        raise_error: bool | None = True,
+        filter_field: str = "id",
+        response_model: BaseModel = None,
+    ) -> T | None:
+        if not (filter_model_field := getattr(self.model, filter_field, None)):
+            raise AttributeError(
+                f"Field '{filter_field}' not found in {self.model._display_name()}"
+            )
+        query = select(self.model)
+        if response_model:
+            query = self._generate_select_from_pydantic(response_model)
+
+        result = await self.db_session.execute(query.where(filter_model_field == entity_id))
+        item = result.unique().scalar()
+
+        if item is None and raise_error:
+            raise NotFoundError(detail=f"{self.model._display_name()} {entity_id} not found")
+        return item
+
+    @read_only
+    async def get_all(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        pagination_params: Params | CursorParams | None = None,
+        base_query: Selectable | None = None,
+        return_scalars: bool = True,
+        response_model: BaseModel | None = None,
+        pagination_kwargs: Dict | None = None,
+        pre_filter_with_cte: bool | None = None,
+        **kwargs,
+    ) -> Page[T] | CursorPage[T] | List[T]:
+        query = self._filtered_query(entity_filter, base_query, response_model, **kwargs)
+
+        if isinstance(pagination_params, CursorParams):
+            # The pagination helpers are plain ORM code, they run on the sync facade of the
+            # session and every query is still awaited on asyncpg
+            return await self.db_session().run_sync(
+                lambda session: keyset_pagination(
+                    model=self.model,
+                    session=session,
+                    query=query,
+                    pagination_params=pagination_params,
+                    **(pagination_kwargs or {}),
+                )
+            )
+
+        if pagination_params and use_cte_pagination(
+            self.model, query, pre_filter_with_cte, response_model
+        ):
+            pre_filter_query = self._filtered_query(entity_filter, base_query, **kwargs).options(
+                load_only(self.model.id)
+            )
+            return await self.db_session().run_sync(
+                lambda session: cte_pagination(
+                    model=self.model,
+                    session=session,
+                    query=query,
+                    pre_filter_query=pre_filter_query,
+                    count_query=select(func.count()).select_from(pre_filter_query.subquery()),
+                    pagination_params=pagination_params,
+                    **(pagination_kwargs or {}),
+                )
+            )
+
+        if pagination_params:
+            return await self.db_session().run_sync(
+                lambda session: offset_pagination(
+                    session, query, pagination_params, **(pagination_kwargs or {})
+                )
+            )
+
+        result = await self.db_session.execute(query)
+        if return_scalars:
+            return result.unique().scalars().all()
+
+        return result.all()
+
+    async def _convert_m2m_relationships(self, values: Dict) -> Dict:
+        def _load_references(session):
+            loader = ReferenceLoader(session)
+            self._defer_m2m_references(values, loader)
+            loader.load()
+
+        await self.db_session().run_sync(_load_references)
+        return values
+
+    @handle_commit_errors
+    async def save(
+        self, entity: BaseModel, response_model: BaseModel | None = None, **extra_fields
+    ) -> T | BaseModel:
+        values = {**entity.model_dump(), **extra_fields}
+        if response_model and (returned := await self._save_returning(values, response_model)):
+            return returned
+
+        new_entity = self.model(**await self._convert_m2m_relationships(values))
+
+        self.db_session.add(new_entity)
+        await self.db_session.commit()
+        await self.db_session.refresh(new_entity)
+        return new_entity
+
+    async def _save_returning(self, values: Dict, response_model: BaseModel) -> BaseModel | None:
+        """Async version of `SQLAlchemyRepository._save_returning`"""
+        columns = returning_columns_from_pydantic(self.model, response_model)
+        relationships = self.model.__mapper__.relationships
+        if columns is None or any(key in relationships for key in values):
+            return None
+
+        result = await self.db_session.execute(
+            insert(self.model).values(values).returning(*columns)
+        )
+        row = result.one()
+        await self.db_session.commit()
+        return response_model.model_validate(row._asdict())
+
+    @handle_commit_errors
+    async def update(
+        self,
+        entity_id: uuid.UUID,
+        updated_entity: BaseModel,
+        response_model: BaseModel | None = None,
+    ) -> T | BaseModel:
+        update_values = (
+            updated_entity.model_dump(exclude_unset=True)
+            if isinstance(updated_entity, BaseModel)
+            else dict(updated_entity)
+        )
+        relationships = self.model.__mapper__.relationships
+        updated_relationships = [key for key in update_values if key in relationships]
+        if update_values and not updated_relationships:
+            return await self._update_columns(entity_id, update_values, response_model)
+
+        # The relationships have to be loaded before they are replaced, lazy loads can't be
+        # awaited from a setattr
+        result = await self.db_session.execute(
+            select(self.model)
+            .where(self.model.id == entity_id)
+            .options(*(selectinload(getattr(self.model, key)) for key in updated_relationships))
+        )
+        instance = result.unique().scalar()
+        if instance is None:
+            raise NotFoundError(detail=f"{self.model._display_name()} {entity_id} not found")
+
+        await self._convert_m2m_relationships(update_values)
+        self._add_instance_updates_metadata(instance, update_values)
+        for key, value in update_values.items():
+            if not hasattr(instance, key):
+                raise AttributeError(
+                    f"Attribute {key} not found in {self.model._display_name()}"
+                )
+            setattr(instance, key, value)
+
+        await self.db_session.commit()
+        return instance
+
+    async def _update_columns(
+        self, entity_id: uuid.UUID, update_values: Dict, response_model: BaseModel | None = None
+    ) -> T | BaseModel:
+        """Async version of `SQLAlchemyRepository._update_columns`"""
+        self._add_updates_metadata(update_values)
+        stmt = (
+            update(self.model)
+            .where(self.model.id == entity_id)
+            .values(update_values)
+            .execution_options(synchronize_session="fetch")
+        )
+
+        if response_model and (
+            columns := returning_columns_from_pydantic(self.model, response_model)
+        ):
+            row = (await self.db_session.execute(stmt.returning(*columns))).one_or_none()
+            item = response_model.model_validate(row._asdict()) if row else None
+        else:
+            result = await self.db_session.scalars(stmt.returning(self.model))
+            item = result.unique().one_or_none()
+
+        if item is None:
+            await self.db_session.rollback()
+            raise NotFoundError(detail=f"{self.model._display_name()} {entity_id} not found")
+
+        await self.db_session.commit()
+        return item
+
+    @handle_commit_errors
+    async def delete(self, entity_id: uuid.UUID) -> None:
+        await self.db_session.execute(delete(self.model).where(self.model.id == entity_id))
+        await self.db_session.commit()
+
+    @handle_commit_errors
+    async def delete_many(self, delete_filter_query: Selectable) -> None:
+        await self.db_session.execute(delete_filter_query)
+        await self.db_session.commit()
+
+    @handle_commit_errors
+    async def save_many(self, entity_list: List[BaseModel]) -> List[T]:
+        new_entities = [self.model(**entity.model_dump()) for entity in entity_list]
+        self.db_session.add_all(new_entities)
+        await self.db_session.commit()
+
+        return new_entities
+
+    @handle_commit_errors
+    async def bulk_create(
+        self,
+        entities: list[T],
+        on_conflict: OnConflictClause = do_default_on_conflict,
+    ) -> List[T]:
+        entities_dict = [
+            entity.model_dump() if isinstance(entity, BaseModel) else entity for entity in entities
+        ]
+        if not entities_dict:
+            logger.warning("No entities to bulk create")
+            return []
+
+        stmt = on_conflict(insert(self.model).values(entities_dict))
+        result = await self.db_session.scalars(stmt.returning(self.model))
+        persisted = result.unique().all()
+
+        await self.db_session.commit()
+        return persisted
+
+    @read_only
+    async def count(self, entity_filter: BaseFilterModel | None = None) -> int:
+        query = self._base_query()
+        if entity_filter:
+            query = entity_filter.filter(query)
+        return await self.db_session.scalar(select(func.count()).select_from(query))
@@ -48,3 +48,40 @@ class BaseRepository(abc.ABC, Generic[T]):
     @abc.abstractmethod
     def count(self, entity_filter: BaseFilterModel | None = None) -> int:
         raise NotImplementedError
+
+
+class AsyncBaseRepository(abc.ABC, Generic[T]):
+    @abc.abstractmethod
+    async def get(
+        self,
+        entity_id: uuid.UUID,
+        raise_error: bool | None = True,
+        response_model: BaseModel = None,
+    ) -> T | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_all(
+        self, entity_filter: BaseFilterModel | None = None, pagination_params: Params | None = None
+    ) -> List[T] | Page[T]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def save(self, entity: BaseModel) -> T:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def update(self, entity_id: uuid.UUID, entity: BaseModel) -> T:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def delete(self, entity_id: uuid.UUID) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def save_many(self, entity_list: List[BaseModel]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def count(self, entity_filter: BaseFilterModel | None = None) -> int:
+        raise NotImplementedError
@@ -0,0 +1,178 @@
+"""Helpers to bulk load rows with PostgreSQL `COPY ... FROM STDIN`"""
+
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, List
+
+from sqlalchemy import Column, MetaData, Table
+
+COPY_BATCH_SIZE = 5000
+STAGING_TABLE_PREFIX = "__staging_"
+
+
+@dataclass
+class BulkLoadStats:
+    rows: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.rows / self.elapsed_seconds
+
+
+def _csv_value(value: Any) -> str:
+    """
+    Format a value for `COPY ... WITH (FORMAT csv)`.
+
+    Every non null value is quoted, so an unquoted empty field is a NULL and `""` is an
+    empty string.
+    """
+    if value is None:
+        return ""
+
+    if isinstance(value, Enum):
+        value = value.value
+
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    elif not isinstance(value, str):
+        value = str(value)
+
+    return '"' + value.replace('"', '""') + '"'
+
+
+def csv_line(row: dict, columns: List[str]) -> str:
+    return ",".join(_csv_value(row.get(column)) for column in columns) + "\n"
+
+
+def column_defaults(table: Table, columns: List[str], row: dict) -> dict:
+    """
+    COPY doesn't run the python side defaults (like `default=uuid4`), so we apply them here.
+    """
+    for column in columns:
+        if column in row:
+            continue
+
+        default = table.c[column].default
+        if default is None:
+            continue
+
+        if default.is_callable:
+            row[column] = default.arg(None)
+        elif default.is_scalar:
+            row[column] = default.arg
+    return row
+
+
+def copy_columns(table: Table, first_row: dict) -> List[str]:
+    """
+    Columns to COPY: the ones we got values for and the ones with python side defaults.
+
+    They come from the first row, the rest must have the same keys (see `same_keys`).
+    """
+    unknown = set(first_row.keys()) - set(table.c.keys())
+    if unknown:
+        raise AttributeError(f"Columns {unknown} not found in table {table.name}")
+
+    return [
+        column.name
+        for column in table.c
+        if column.name in first_row or column.default is not None
+    ]
+
+
+def same_keys(table: Table, rows: Iterable[dict], keys: Iterable[str]) -> Iterator[dict]:
+    """
+    Check lazily that every row has the given keys (the ones of the first row), a missing one
+    would be loaded as NULL and an extra one would be silently dropped.
+    """
+    keys = set(keys)
+    for index, row in enumerate(rows):
+        if row.keys() != keys:
+            raise AttributeError(
+                f"Row {index} to load into table {table.name} has the columns {set(row)} "
+                f"instead of {keys}, all the rows must have the same columns"
+            )
+        yield row
+
+
+def batched_csv(
+    rows: Iterable[dict], table: Table, columns: List[str], batch_size: int
+) -> Iterator[tuple[io.StringIO, int]]:
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write(csv_line(column_defaults(table, columns, row), columns))
+        count += 1
+
+        if count >= batch_size:
+            buffer.seek(0)
+            yield buffer, count
+            buffer = io.StringIO()
+            count = 0
+
+    if count:
+        buffer.seek(0)
+        yield buffer, count
+
+
+def copy_rows(
+    dbapi_connection,
+    table_name: str,
+    table: Table,
+    columns: List[str],
+    rows: Iterable[dict],
+    batch_size: int = COPY_BATCH_SIZE,
+) -> BulkLoadStats:
+    """
+    Stream the rows to `table_name` with one `COPY ... FROM STDIN` per batch.
+
+    Args:
+        dbapi_connection: The psycopg2 connection of the current transaction.
+        table_name (str): The table to COPY into (the target or the staging table).
+        table (Table): The target table, used to get the column defaults.
+        columns (List[str]): The columns to load.
+        rows (Iterable[dict]): The rows to load, consumed lazily.
+        batch_size (int): How many rows are sent in each COPY.
+
+    Returns:
+        BulkLoadStats: How many rows were loaded and how long it took.
+    """
+    quoted_columns = ", ".join(f'"{column}"' for column in columns)
+    copy_sql = f'COPY "{table_name}" ({quoted_columns}) FROM STDIN WITH (FORMAT csv)'
+
+    stats = BulkLoadStats()
+    start_time = time.perf_counter()
+    with dbapi_connection.cursor() as cursor:
+        for buffer, count in batched_csv(rows, table, columns, batch_size):
+            cursor.copy_expert(copy_sql, buffer)
+            stats.rows += count
+
+    stats.elapsed_seconds = time.perf_counter() - start_time
+    return stats
+
+
+def staging_table(table: Table, columns: List[str]) -> Table:
+    """
+    Temporary table with the same columns of `table`, the rows are copied there and then
+    inserted into `table` with an `INSERT ... SELECT` so the ON CONFLICT clauses can be applied.
+    """
+    name = f"{STAGING_TABLE_PREFIX}{table.name}_{uuid.uuid4().hex[:8]}"
+    return Table(
+        name,
+        MetaData(),
+        *(Column(column, table.c[column].type) for column in columns),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
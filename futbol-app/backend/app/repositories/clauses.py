@@ -1,4 +1,4 @@
-from typing import Callable
+from typing import Callable, Sequence
 
 from sqlalchemy import Insert
 
@@ -15,3 +15,33 @@ def do_update_on_conflict(insert: Insert, **kwargs) -> Insert:
 
 def do_default_on_conflict(insert: Insert) -> Insert:
     return insert
+
+
+def do_upsert_on_conflict(
+    index_elements: Sequence[str], update_columns: Sequence[str]
+) -> OnConflictClause:
+    """
+    ON CONFLICT (index_elements) DO UPDATE the `update_columns` with the proposed values.
+
+    ON CONFLICT doesn't run the python side `onupdate` of the columns, so they're added here.
+    If there's nothing to update the conflict columns are set to themselves, that way the
+    existing rows are still returned by a RETURNING clause (DO NOTHING would skip them).
+    """
+
+    def on_conflict(insert: Insert) -> Insert:
+        set_ = {column: insert.excluded[column] for column in update_columns}
+
+        for column in insert.table.c:
+            if column.onupdate is None or column.name in set_:
+                continue
+            if column.onupdate.is_callable:
+                set_[column.name] = column.onupdate.arg(None)
+            elif column.onupdate.is_scalar:
+                set_[column.name] = column.onupdate.arg
+
+        if not set_:
+            set_ = {column: insert.excluded[column] for column in index_elements}
+
+        return do_update_on_conflict(insert, index_elements=index_elements, set_=set_)
+
+    return on_conflict
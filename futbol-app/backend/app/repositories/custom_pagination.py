@@ -1,19 +1,316 @@
-from typing import Any, Optional, Type
+import json
+import logging
+import threading
+import time as time_module
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Generic, Iterator, List, Optional, Tuple, Type, TypeVar
 
-from fastapi_pagination import Params, create_page
+from fastapi import Query
+from fastapi_pagination import Page, Params, create_page
 from fastapi_pagination.api import apply_items_transformer
-from fastapi_pagination.bases import AbstractPage, AbstractParams
+from fastapi_pagination.bases import AbstractPage, AbstractParams, RawParams
+from fastapi_pagination.cursor import CursorParams
 from fastapi_pagination.ext.sqlalchemy import (
     SyncConn,
     UnwrapMode,
     _maybe_unique,
     _unwrap_items,
+    create_count_query,
+    create_paginate_query,
 )
 from fastapi_pagination.types import AdditionalData, ItemsTransformer
-from sqlalchemy import Selectable
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    ForeignKey,
+    Integer,
+    Join,
+    MetaData,
+    Selectable,
+    Table,
+    and_,
+    func,
+    inspect,
+    or_,
+    select,
+)
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute, RelationshipProperty, Session, noload
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
 
+from app.context import get_request_context
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.database.base import Base
+from app.exceptions import BadRequestError
+from app.modules.db import joined_collection_from_pydantic
+
+KEYSET_COLUMN_PREFIX = "__keyset_"
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"  # SELECT count(*) over the filtered query
+    NONE = "none"  # No total, the client moves with page/size until a page comes short
+    ESTIMATE = "estimate"  # Rows estimated by the planner (EXPLAIN), no scan
+    CACHED = "cached"  # Exact count, reused for the same filters for a while
+
+
+class CountParams(Params):
+    """`Params` that let the client choose how the total is computed"""
+
+    count: CountMode = Query(
+        CountMode.EXACT,
+        description="How to compute `total`: exact, estimate (planner estimate), "
+        "cached (exact, reused for a while) or none",
+    )
+
+    def to_raw_params(self) -> RawParams:
+        raw_params = super().to_raw_params()
+        raw_params.include_total = self.count == CountMode.EXACT
+        return raw_params
+
+
+class CountPage(Page[T], Generic[T]):
+    """`Page` that tells how its `total` was computed, use it with `CountParams`"""
+
+    total_mode: CountMode = CountMode.EXACT
+
+    __params_type__ = CountParams
+
+
+class explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement, the binds are processed as usual"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Selectable):
+        self.statement = statement
+
+
+@compiles(explain, "postgresql")
+def _compile_explain(element: explain, compiler, **kwargs) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kwargs)
+
+
+class CountCache:
+    """Exact counts by statement (SQL + params) and user, expired after `ttl` seconds"""
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._counts: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is None:
+                return None
+
+            expires_at, total = cached
+            if expires_at < time_module.monotonic():
+                del self._counts[key]
+                return None
+
+            self._counts.move_to_end(key)
+            return total
+
+    def set(self, key: tuple, total: int) -> None:
+        with self._lock:
+            self._counts[key] = (time_module.monotonic() + self.ttl, total)
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+count_cache = CountCache(
+    ttl=settings.PAGINATION_COUNT_CACHE_TTL_SECONDS,
+    maxsize=settings.PAGINATION_COUNT_CACHE_SIZE,
+)
+
+
+def _count_cache_key(conn: SyncConn, count_query: Selectable) -> tuple:
+    compiled = count_query.compile(dialect=conn.get_bind().dialect)
+    params = tuple(sorted((key, repr(value)) for key, value in compiled.params.items()))
+    # With access control the rows a user can see depend on its claims
+    return str(compiled), params, get_request_context().user_id
+
+
+def _estimated_total(conn: SyncConn, rows_query: Selectable) -> int:
+    statement = rows_query.order_by(None)
+    if hasattr(statement, "options"):
+        statement = statement.options(noload("*"))
+
+    plan = conn.execute(explain(statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def resolve_total(
+    conn: SyncConn,
+    count_query: Selectable,
+    rows_query: Optional[Selectable],
+    params: AbstractParams,
+) -> tuple[Optional[int], CountMode]:
+    """
+    Compute the total of a page as requested by the `CountParams` (exact for other params).
+
+    Returns the total and how it was actually computed, the estimate falls back to an exact
+    count when it can't be done (the database is not postgres or there's no rows query).
+    """
+    mode = getattr(params, "count", CountMode.EXACT)
+    metrics.increment(f"db.pagination.count.{mode.value}")
+
+    if mode == CountMode.NONE:
+        return None, mode
+
+    if mode == CountMode.ESTIMATE and rows_query is not None:
+        try:
+            return _estimated_total(conn, rows_query), mode
+        except CompileError:
+            logger.debug("EXPLAIN is not supported by the dialect, counting the rows")
+            mode = CountMode.EXACT
+
+    if mode == CountMode.CACHED:
+        key = _count_cache_key(conn, count_query)
+        if (total := count_cache.get(key)) is not None:
+            metrics.increment("db.pagination.count.cache.hit")
+            return total, mode
+
+        metrics.increment("db.pagination.count.cache.miss")
+        total = conn.scalar(count_query)
+        count_cache.set(key, total)
+        return total, mode
+
+    return conn.scalar(count_query), CountMode.EXACT
+
+
+def _is_collection_join(model: Type[Base], target: Any, onclause: Any) -> bool:
+    for element in (target, onclause):
+        if isinstance(element, InstrumentedAttribute) and isinstance(
+            element.property, RelationshipProperty
+        ):
+            return element.property.uselist
+
+    # Explicit join to a table/entity: it's the "many" side if it has a FK to the model
+    table = target
+    if not isinstance(target, Table):
+        table = getattr(inspect(target, False), "local_table", None)
+    return table is not None and any(
+        fk.references(model.__table__) for fk in getattr(table, "foreign_keys", ())
+    )
+
+
+def _setup_joins_layout_ok() -> bool:
+    """
+    Check that `Select._setup_joins` (private) still starts its items with (target, onclause),
+    the layout `collection_join_reason` reads to avoid building the FROM clause per request
+    """
+    metadata = MetaData()
+    parent = Table("parent", metadata, Column("id", Integer, primary_key=True))
+    child = Table(
+        "child",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("parent_id", ForeignKey("parent.id")),
+    )
+    onclause = child.c.parent_id == parent.c.id
+    try:
+        target, join_onclause, *_ = select(parent).join(child, onclause)._setup_joins[0]
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return False
+    return target is child and join_onclause is onclause
+
+
+SETUP_JOINS_LAYOUT_OK = _setup_joins_layout_ok()
+if not SETUP_JOINS_LAYOUT_OK:
+    logger.warning(
+        "Unexpected Select._setup_joins layout in this SQLAlchemy version, the joins of the "
+        "paginated queries are found with get_final_froms() (slower)"
+    )
+
+
+def _join_targets(model: Type[Base], query: Selectable) -> Iterator[tuple[Any, Any]]:
+    """The (target, onclause) of every join of the query"""
+    if SETUP_JOINS_LAYOUT_OK:
+        for target, onclause, *_ in query._setup_joins:
+            yield target, onclause
+        return
+
+    # Public API: the joined tables of the FROM clause, without the entity so the eager loads
+    # are not part of it
+    pending = list(query.with_only_columns(*inspect(model).primary_key).get_final_froms())
+    while pending:
+        from_clause = pending.pop()
+        if isinstance(from_clause, Join):
+            pending.append(from_clause.left)
+            if isinstance(from_clause.right, Join):
+                pending.append(from_clause.right)
+            else:
+                yield from_clause.right, None
+
+
+def collection_join_reason(
+    model: Type[Base], query: Selectable, response_model: Optional[Type[BaseModel]] = None
+) -> Optional[str]:
+    """
+    Tell why the query can return more than one row per `model` entity, None if it can't.
+
+    A collection can be joined by the loader options of the `response_model` (or a
+    `lazy="joined"` collection in the model), which is cached per (model, response_model), or
+    by a join of the filters. In both cases LIMIT/OFFSET would count joined rows. Other loader
+    options added to the query are not inspected, force the plan when they join a collection.
+    """
+    for target, onclause in _join_targets(model, query):
+        if _is_collection_join(model, target, onclause):
+            return f"join to {target}"
+
+    if collection := joined_collection_from_pydantic(model, response_model):
+        return f"joined eager load of {collection}"
+    return None
+
+
+def use_cte_pagination(
+    model: Type[Base],
+    query: Selectable,
+    pre_filter_with_cte: Optional[bool] = None,
+    response_model: Optional[Type[BaseModel]] = None,
+) -> bool:
+    """
+    Decide between `cte_pagination` and the plain `paginate`.
+
+    `pre_filter_with_cte` forces the decision, when it's None the CTE is used only if the
+    query joins a collection (see `collection_join_reason`).
+    """
+    if pre_filter_with_cte is not None:
+        metrics.increment(f"db.pagination.{'cte' if pre_filter_with_cte else 'plain'}.forced")
+        return pre_filter_with_cte
+
+    if reason := collection_join_reason(model, query, response_model):
+        logger.debug(f"Paginating {model.__name__} with a CTE pre-filter: {reason}")
+        metrics.increment("db.pagination.cte.auto")
+        return True
+
+    logger.debug(f"Paginating {model.__name__} with LIMIT/OFFSET, no collection joins")
+    metrics.increment("db.pagination.plain.auto")
+    return False
 
 
 def execute_cte_pagination(
@@ -25,19 +322,44 @@ def execute_cte_pagination(
     additional_data: Optional[AdditionalData] = None,
     unique: bool = True,
     unwrap_mode: Optional[UnwrapMode] = None,
+    rows_query: Optional[Selectable] = None,
 ) -> AbstractPage[Any]:
     items = _maybe_unique(conn.execute(query), unique)
     items = _unwrap_items(items, query, unwrap_mode)
     items = apply_items_transformer(items, transformer)
 
+    total, total_mode = resolve_total(conn, count_query, rows_query, params)
+    if isinstance(params, CountParams):
+        additional_data = {**(additional_data or {}), "total_mode": total_mode}
+
     return create_page(
         items,
-        total=conn.scalar(count_query),
+        total=total,
         params=params,
         **(additional_data or {}),
     )
 
 
+def offset_pagination(
+    session: Session,
+    query: Selectable,
+    pagination_params: Params,
+    **kwargs,
+) -> AbstractPage[Any]:
+    """
+    Paginate a query with LIMIT/OFFSET, like `fastapi_pagination.ext.sqlalchemy.paginate`
+    but computing the total as requested by `CountParams` (see `resolve_total`).
+    """
+    return execute_cte_pagination(
+        conn=session,
+        query=create_paginate_query(query, pagination_params),
+        count_query=create_count_query(query),
+        params=pagination_params,
+        rows_query=query,
+        **kwargs,
+    )
+
+
 def cte_pagination(
     model: Type[Base],
     session: Session,
@@ -61,8 +383,8 @@ def cte_pagination(
         AbstractPage[Any]: The paginated items.
     """
     raw_params = pagination_params.to_raw_params().as_limit_offset()
-    pre_filter_query = pre_filter_query.limit(raw_params.limit).offset(raw_params.offset)
-    cte_query = pre_filter_query.cte("__pre_filter_ids_cte")
+    page_ids_query = pre_filter_query.limit(raw_params.limit).offset(raw_params.offset)
+    cte_query = page_ids_query.cte("__pre_filter_ids_cte")
 
     response_query = query.join(cte_query, model.id == cte_query.c.id)
     return execute_cte_pagination(
@@ -70,5 +392,167 @@ def cte_pagination(
         query=response_query,
         count_query=count_query,
         params=pagination_params,
+        rows_query=pre_filter_query,
         **kwargs,
     )
+
+
+def _order_by_keys(model: Type[Base], query: Selectable) -> List[Tuple[ColumnElement, bool]]:
+    """
+    Extract the (column, descending) pairs from the ORDER BY of a query.
+
+    The primary key is always appended as the last key (if it's not already there) so the
+    ordering is total and the cursor identifies a single row.
+    """
+    keys = []
+    for clause in query._order_by_clauses:
+        descending = False
+        element = clause
+        # Unwrap the `.desc()`, `.asc()`, `.nulls_last()`... modifiers until we get the column
+        while getattr(element, "modifier", None) is not None:
+            if element.modifier is operators.desc_op:
+                descending = True
+            element = element.element
+        keys.append((element, descending))
+
+    if not any(column.compare(model.id.expression) for column, _ in keys):
+        keys.append((model.id.expression, False))
+    return keys
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _decode_cursor_value(column: ColumnElement, value: Any) -> Any:
+    if value is None:
+        return None
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+def _keyset_predicate(keys: List[Tuple[ColumnElement, bool]], values: List[Any]) -> ColumnElement:
+    """
+    Build the "row comes after the cursor" predicate for a (possibly mixed direction) ordering:
+
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR (k1 = v1 AND k2 = v2 AND k3 > v3) ...
+
+    `>` is swapped by `<` for the descending keys.
+    """
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        equals = [keys[i][0] == values[i] for i in range(index)]
+        comparison = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*equals, comparison))
+    return or_(*clauses)
+
+
+def keyset_pagination(
+    model: Type[Base],
+    session: Session,
+    query: Selectable,
+    pagination_params: CursorParams,
+    include_total: bool = False,
+    unique: bool = True,
+    transformer: Optional[ItemsTransformer] = None,
+    additional_data: Optional[AdditionalData] = None,
+) -> AbstractPage[Any]:
+    """
+    Paginate a query using keyset (cursor) pagination.
+
+    Instead of skipping `offset` rows, every page is fetched with a `WHERE` on the ORDER BY
+    keys of the last (or first) row of the previous page, so the cost of a page doesn't depend
+    on how deep it is. The cursors are opaque for the client: they encode the keys of the
+    boundary row and the direction to follow.
+
+    Sort keys with NULL values are not supported, so only non nullable columns should be used
+    for the ordering.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        query (Selectable): The (filtered and sorted) query to get the items.
+        pagination_params (CursorParams): The cursor and the page size.
+        include_total (bool): Whether to run the `count(*)` query to fill the total.
+
+    Returns:
+        AbstractPage[Any]: The paginated items with the next/previous cursors.
+    """
+    raw_params = pagination_params.to_raw_params()
+    keys = _order_by_keys(model, query)
+
+    backwards = False
+    page_query = query
+    if raw_params.cursor:
+        try:
+            cursor = json.loads(raw_params.cursor)
+            backwards = cursor["backwards"]
+            values = [
+                _decode_cursor_value(column, value)
+                for (column, _), value in zip(keys, cursor["values"], strict=True)
+            ]
+        except (ValueError, KeyError, TypeError):
+            raise BadRequestError(detail="Invalid cursor value") from None
+
+    # To go backwards we walk the ordering in reverse and flip the page afterwards
+    walk_keys = [(column, descending != backwards) for column, descending in keys]
+    if raw_params.cursor:
+        page_query = page_query.where(_keyset_predicate(walk_keys, values))
+
+    page_query = page_query.order_by(None).order_by(
+        *(column.desc() if descending else column.asc() for column, descending in walk_keys)
+    )
+
+    key_columns = [
+        column.label(f"{KEYSET_COLUMN_PREFIX}{index}") for index, (column, _) in enumerate(keys)
+    ]
+    page_query = page_query.add_columns(*key_columns).limit(raw_params.size + 1)
+
+    result = session.execute(page_query)
+    rows = list(result.unique() if unique else result)
+
+    has_more = len(rows) > raw_params.size
+    rows = rows[: raw_params.size]
+    if backwards:
+        rows.reverse()
+
+    def _cursor(row, backwards: bool) -> str:
+        values = [_encode_cursor_value(value) for value in row[-len(keys) :]]
+        return json.dumps({"values": values, "backwards": backwards})
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = _cursor(rows[-1], backwards=False)
+        if raw_params.cursor and (has_more or not backwards):
+            previous_cursor = _cursor(rows[0], backwards=True)
+
+    items = [row[0] for row in rows]
+    items = apply_items_transformer(items, transformer)
+
+    total = None
+    if include_total:
+        total = session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    return create_page(
+        items,
+        params=pagination_params,
+        next_=next_cursor,
+        previous=previous_cursor,
+        total=total,
+        **(additional_data or {}),
+    )
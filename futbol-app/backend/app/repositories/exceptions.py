@@ -41,10 +41,14 @@ class DuplicateError(RepositoryError):
         We deal with psycopg2 and Postgres error strings here.
         """
         res = DUPLICATE_ERROR_TEMPLATE.match(db_string)
-        if not res:
+        return DuplicateError.from_constraint_name(res.group("key") if res else None, model)
+
+    @staticmethod
+    def from_constraint_name(key: str | None, model: BaseRepository) -> "DuplicateError":
+        """Create a DuplicateError from the name of the violated unique constraint"""
+        if not key:
             return DuplicateError(detail=f"Duplicate item found in {model._display_name()}")
 
-        key = res.group("key")
         field = key.removeprefix(model.__tablename__).removesuffix("_idx").strip("_")
 
         return DuplicateError(
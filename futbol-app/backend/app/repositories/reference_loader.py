@@ -0,0 +1,102 @@
+"""Batch the resolution of UUID references to related entities"""
+
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Type
+
+from sqlalchemy import select
+from sqlalchemy.orm import DeclarativeBase, RelationshipProperty, Session, lazyload, load_only
+from sqlalchemy.orm.util import identity_key
+
+from app.core.metrics import metrics
+from app.repositories.exceptions import ReferencedError
+
+
+class ReferenceLoader:
+    """
+    Collects the UUIDs given for relationship lists (M2M) and resolves all of them at once.
+
+    The references are deferred (`defer`) while the entities are built and `load` resolves them
+    with the identity map of the session first and one `IN (...)` query per related model for
+    the rest, loading only the ids (the entities are just attached to the relationship).
+    Every missing id is reported in a single `ReferencedError`.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._pending: Dict[Type[DeclarativeBase], Set[uuid.UUID]] = defaultdict(set)
+        self._references: List[Tuple[RelationshipProperty, list, Callable[[list], Any]]] = []
+
+    def defer(
+        self,
+        relationship: RelationshipProperty,
+        values: Iterable[Any],
+        assign: Callable[[list], Any],
+    ) -> None:
+        """
+        Register a relationship list, `assign` is called by `load` with the UUIDs replaced by
+        their entities (the other values and the order are kept).
+        """
+        values = list(values)
+        related_model = relationship.mapper.class_
+        self._pending[related_model].update(val for val in values if isinstance(val, uuid.UUID))
+        self._references.append((relationship, values, assign))
+
+    def _resolve(self) -> Dict[Tuple[Type[DeclarativeBase], uuid.UUID], Any]:
+        resolved = {}
+        for related_model, ids in self._pending.items():
+            missing_in_session = set()
+            for entity_id in ids:
+                entity = self.session.identity_map.get(identity_key(related_model, entity_id))
+                if entity is None:
+                    missing_in_session.add(entity_id)
+                else:
+                    resolved[(related_model, entity_id)] = entity
+
+            metrics.increment("db.references.identity_map", len(ids) - len(missing_in_session))
+            if not missing_in_session:
+                continue
+
+            query = (
+                select(related_model)
+                .where(related_model.id.in_(missing_in_session))
+                .options(load_only(related_model.id), lazyload("*"))
+            )
+            for entity in self.session.scalars(query):
+                resolved[(related_model, entity.id)] = entity
+            metrics.increment("db.references.queries")
+
+        return resolved
+
+    def load(self) -> None:
+        if not self._references:
+            return
+
+        resolved = self._resolve()
+
+        missing = defaultdict(set)
+        for relationship, values, _ in self._references:
+            related_model = relationship.mapper.class_
+            for val in values:
+                if isinstance(val, uuid.UUID) and (related_model, val) not in resolved:
+                    missing[relationship.key].add(val)
+
+        # Throw errors for all the UUIDs that were not found
+        if missing:
+            detail = "; ".join(
+                f"{key} with UUIDs {missing_uuids} not found"
+                for key, missing_uuids in missing.items()
+            )
+            raise ReferencedError(detail=f"Foreign key violation: {detail}")
+
+        for relationship, values, assign in self._references:
+            related_model = relationship.mapper.class_
+            assign(
+                [
+                    resolved[(related_model, val)] if isinstance(val, uuid.UUID) else val
+                    for val in values
+                ]
+            )
+
+        self._pending.clear()
+        self._references.clear()
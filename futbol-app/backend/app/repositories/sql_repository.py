@@ -1,29 +1,53 @@
 import logging
 import uuid
 from datetime import UTC, datetime
-from functools import wraps
-from typing import Dict, List, Type, TypeVar
+from functools import partial, wraps
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Sequence, Type, TypeVar
 
 import psycopg2
 import sqlalchemy
 from fastapi_filter.base.filter import BaseFilterModel
 from fastapi_pagination import Page, Params
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi_pagination.cursor import CursorPage, CursorParams
 from injector import Inject
 from pydantic import BaseModel
-from sqlalchemy import Selectable, delete, func, select, update
+from sqlalchemy import Selectable, cast, column, delete, func, inspect, select, update, values
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.orm import load_only
+from sqlalchemy.orm import lazyload, load_only
+from sqlalchemy.orm.util import identity_key
 
+from app.core.metrics import metrics
+from app.core.server_timing import phase, timed
 from app.database.base import Base, DatabaseResource
-from app.modules.db import select_from_pydantic
+from app.modules.db import (
+    required_attributes_from_pydantic,
+    returning_columns_from_pydantic,
+    select_from_pydantic,
+    warm_up_select_from_pydantic,
+)
 from app.repositories.base_repository import BaseRepository
+from app.repositories.bulk_load import (
+    COPY_BATCH_SIZE,
+    BulkLoadStats,
+    copy_columns,
+    copy_rows,
+    same_keys,
+    staging_table,
+)
 from app.repositories.clauses import (
     OnConflictClause,
     do_default_on_conflict,
+    do_upsert_on_conflict,
+)
+from app.repositories.custom_pagination import (
+    cte_pagination,
+    keyset_pagination,
+    offset_pagination,
+    use_cte_pagination,
 )
-from app.repositories.custom_pagination import cte_pagination
 from app.repositories.exceptions import DuplicateError, NotFoundError, ReferencedError
+from app.repositories.reference_loader import ReferenceLoader
 
 T = TypeVar("T", bound=Base)
 
@@ -32,8 +56,12 @@ logger = logging.getLogger(__name__)
 
 class SQLAlchemyRepository(BaseRepository[T]):
     model: Type[T]
+    # Schemas used as `response_model` with this repository, their select options are
+    # compiled at startup (see `warm_up_response_models`)
+    response_models: tuple[Type[BaseModel], ...] = ()
 
     def __init__(self, db: Inject[DatabaseResource]) -> None:
+        self.db = db
         self.db_session = db.session
 
     def _generate_select_from_pydantic(
@@ -48,7 +76,7 @@ class SQLAlchemyRepository(BaseRepository[T]):
     def _base_query(self, **kwargs):
         return select(self.model)
 
-    def __add_updates_metadata(self, updated_values: Dict) -> BaseModel:
+    def _add_updates_metadata(self, updated_values: Dict) -> BaseModel:
         # This method might be deprecated in favor of the _add_instance_updates_metadata method
         # But it's still worth keeping it for now because it works with SQL statements without ORM
         if update_expression := getattr(self.model, "updates_metadata", None):
@@ -61,11 +89,22 @@ class SQLAlchemyRepository(BaseRepository[T]):
             updated_values.update({"updates_metadata": update_expression})
             return updated_values
 
+    def read_only(func):
+        """Let the reads of the method go to a read replica (if there's any)"""
+
+        @wraps(func)
+        def replica_wrapper(self, *args, **kwargs):
+            with self.db.replica(), phase("repository"):
+                return func(self, *args, **kwargs)
+
+        return replica_wrapper
+
     def handle_commit_errors(func):
         @wraps(func)
         def exception_wrapper(self, *args, **kwargs):
             try:
-                return func(self, *args, **kwargs)
+                with phase("repository"):
+                    return func(self, *args, **kwargs)
             except sqlalchemy.exc.IntegrityError as e:
                 self.db_session.rollback()
                 match e.orig:
@@ -88,6 +127,7 @@ class SQLAlchemyRepository(BaseRepository[T]):
 
         return exception_wrapper
 
+    @timed("repository")
     def get(
         self,
         entity_id: uuid.UUID,
@@ -99,6 +139,9 @@ class SQLAlchemyRepository(BaseRepository[T]):
             raise AttributeError(
                 f"Field '{filter_field}' not found in {self.model._display_name()}"
             )
+        if filter_field == "id" and (item := self._from_identity_map(entity_id, response_model)):
+            return item
+
         query = select(self.model)
         if response_model:
             query = self._generate_select_from_pydantic(response_model)
@@ -109,6 +152,58 @@ class SQLAlchemyRepository(BaseRepository[T]):
             raise NotFoundError(detail=f"{self.model._display_name()} {entity_id} not found")
         return item
 
+    @timed("repository")
+    def get_many(
+        self,
+        entity_ids: Iterable[uuid.UUID],
+        raise_error: bool | None = True,
+        response_model: BaseModel = None,
+    ) -> List[T]:
+        """
+        Get the entities with the given ids, in the same order (repeated ids are returned once).
+
+        The ones already loaded in the session are reused and only the missing ones are
+        fetched, with a single `IN (...)` query.
+        """
+        entity_ids = list(dict.fromkeys(entity_ids))
+        found = {}
+        missing = []
+        for entity_id in entity_ids:
+            if item := self._from_identity_map(entity_id, response_model):
+                found[entity_id] = item
+            else:
+                missing.append(entity_id)
+
+        if missing:
+            query = select(self.model)
+            if response_model:
+                query = self._generate_select_from_pydantic(response_model)
+
+            for item in self.db_session.scalars(query.where(self.model.id.in_(missing))).unique():
+                found[item.id] = item
+
+        if raise_error and len(found) != len(entity_ids):
+            not_found = [entity_id for entity_id in entity_ids if entity_id not in found]
+            raise NotFoundError(detail=f"{self.model._display_name()} {not_found} not found")
+
+        return [found[entity_id] for entity_id in entity_ids if entity_id in found]
+
+    def _from_identity_map(
+        self, entity_id: uuid.UUID, response_model: BaseModel | None = None
+    ) -> T | None:
+        """
+        Get the entity from the session identity map (no query), only if everything the
+        `response_model` needs (every column without it) is loaded and not expired.
+        """
+        item = self.db_session.identity_map.get(identity_key(self.model, entity_id))
+        required = required_attributes_from_pydantic(self.model, response_model)
+        if item is None or required & inspect(item).unloaded:
+            metrics.increment(f"db.identity_map.{self.model.__tablename__}.miss")
+            return None
+
+        metrics.increment(f"db.identity_map.{self.model.__tablename__}.hit")
+        return item
+
     def get_all_with_cte(
         self,
         entity_filter: BaseFilterModel | None = None,
@@ -148,19 +243,57 @@ class SQLAlchemyRepository(BaseRepository[T]):
             **(pagination_kwargs or {}),
         )
 
+    def get_all_with_keyset(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        pagination_params: CursorParams | None = None,
+        base_query: Selectable | None = None,
+        response_model: BaseModel | None = None,
+        pagination_kwargs: Dict | None = None,
+        **kwargs,
+    ) -> CursorPage[T]:
+        if not pagination_params:
+            raise ValueError("Cursor params are required to use get_all_with_keyset method")
+
+        query = base_query if base_query is not None else self._base_query(**kwargs)
+        if response_model:
+            query = self._generate_select_from_pydantic(response_model, query)
+        if entity_filter:
+            query = entity_filter.filter(query)
+            try:
+                query = entity_filter.sort(query)
+            except AttributeError:
+                pass
+
+        return keyset_pagination(
+            model=self.model,
+            session=self.db_session,
+            query=query,
+            pagination_params=pagination_params,
+            **(pagination_kwargs or {}),
+        )
+
+    @read_only
     def get_all(
         self,
         entity_filter: BaseFilterModel | None = None,
-        pagination_params: Params | None = None,
+        pagination_params: Params | CursorParams | None = None,
         base_query: Selectable | None = None,
         return_scalars: bool = True,
         response_model: BaseModel | None = None,
         pagination_kwargs: Dict | None = None,
-        pre_filter_with_cte: bool = False,
+        pre_filter_with_cte: bool | None = None,
         **kwargs,
-    ) -> Page[T] | List[T]:
-        if pre_filter_with_cte:
-            return self.get_all_with_cte(
+    ) -> Page[T] | CursorPage[T] | List[T]:
+        """
+        Get the entities, paginated if `pagination_params` are given.
+
+        `CursorParams` use keyset pagination. Otherwise, when the query joins a collection
+        (eager loads or filter joins) the ids are pre-filtered in a CTE so the LIMIT applies to
+        entities and not to joined rows, `pre_filter_with_cte` forces one plan or the other.
+        """
+        if isinstance(pagination_params, CursorParams):
+            return self.get_all_with_keyset(
                 entity_filter,
                 pagination_params,
                 base_query,
@@ -179,11 +312,23 @@ class SQLAlchemyRepository(BaseRepository[T]):
             except AttributeError:
                 pass
 
+        if pagination_params and use_cte_pagination(
+            self.model, query, pre_filter_with_cte, response_model
+        ):
+            return self.get_all_with_cte(
+                entity_filter,
+                pagination_params,
+                base_query,
+                response_model,
+                pagination_kwargs,
+                **kwargs,
+            )
+
         if pagination_params:
-            return paginate(
+            return offset_pagination(
                 self.db_session,
                 query,
-                params=pagination_params,
+                pagination_params,
                 **(pagination_kwargs or {}),
             )
 
@@ -192,64 +337,188 @@ class SQLAlchemyRepository(BaseRepository[T]):
 
         return self.db_session.execute(query).all()
 
+    def stream_all(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        base_query: Selectable | None = None,
+        response_model: BaseModel | None = None,
+        batch_size: int = 1000,
+        **kwargs,
+    ) -> Iterator[T] | Iterator[BaseModel]:
+        """
+        Iterate over all the entities using a server side cursor.
+
+        The rows are fetched `batch_size` at a time and, if a `response_model` is given, converted
+        one batch at a time, so the whole result set is never in memory.
+
+        Relationships that are not part of the `response_model` are not loaded (`lazy="joined"`
+        collections can't be fetched in batches). Collections needed by the `response_model` have
+        to use a non joined strategy.
+        """
+        query = base_query if base_query is not None else self._base_query(**kwargs)
+        query = query.options(lazyload("*"))
+        if response_model:
+            query = self._generate_select_from_pydantic(response_model, query)
+        if entity_filter:
+            query = entity_filter.filter(query)
+            try:
+                query = entity_filter.sort(query)
+            except AttributeError:
+                pass
+
+        with self.db.replica():
+            result = self.db_session.execute(query.execution_options(yield_per=batch_size))
+            for partition in result.scalars().partitions():
+                if response_model:
+                    yield from [response_model.model_validate(item) for item in partition]
+                else:
+                    yield from partition
+
     def _convert_m2m_relationships(self, entity):
+        loader = ReferenceLoader(self.db_session)
         for rel in self.model.__mapper__.relationships:
             attr_val = getattr(entity, rel.key, None)
             if isinstance(attr_val, list) and any(isinstance(val, uuid.UUID) for val in attr_val):
-                values = self._uuid_to_entity(attr_val, rel)
-                setattr(entity, rel.key, values)
+                loader.defer(rel, attr_val, partial(setattr, entity, rel.key))
+        loader.load()
+
+    def _defer_m2m_references(self, values: Dict, loader: ReferenceLoader) -> Dict:
+        """
+        Defer the conversion of the UUIDs given for relationship lists in `values`, they are
+        replaced by the related entities when `loader.load()` is called.
+        """
+        relationships = self.model.__mapper__.relationships
+        for key, value in values.items():
+            if key in relationships and isinstance(value, list):
+                loader.defer(relationships[key], value, partial(values.__setitem__, key))
+        return values
 
     def _uuid_to_entity(self, attr_val, relationship):
         values = []
-        uuids = set()
-
-        for val in attr_val:
-            if isinstance(val, uuid.UUID):
-                uuids.add(val)
-            else:
-                values.append(val)
-
-        if uuids:
-            related_model = relationship.mapper.class_
-            converted = (
-                self.db_session.query(related_model).filter(related_model.id.in_(uuids)).all()
-            )
-
-            # Throw errors for the UUIDs that were not found
-            if len(uuids) != len(converted):
-                missing_uuids = set(uuids) - {val.id for val in converted}
-                raise ReferencedError(
-                    detail=f"Foreign key violation: {relationship.key} with UUIDs {missing_uuids} not found"
-                )
-
-            values.extend(converted)
+        loader = ReferenceLoader(self.db_session)
+        loader.defer(relationship, attr_val, values.extend)
+        loader.load()
         return values
 
     @handle_commit_errors
-    def save(self, entity: BaseModel, **extra_fields) -> BaseModel:
-        new_entity = self.model(**{**entity.model_dump(), **extra_fields})
-        self._convert_m2m_relationships(new_entity)
+    def save(
+        self, entity: BaseModel, response_model: BaseModel | None = None, **extra_fields
+    ) -> BaseModel:
+        values = {**entity.model_dump(), **extra_fields}
+        if response_model and (returned := self._save_returning(values, response_model)):
+            return returned
+
+        loader = ReferenceLoader(self.db_session)
+        self._defer_m2m_references(values, loader)
+        loader.load()
+
+        new_entity = self.model(**values)
 
         self.db_session.add(new_entity)
         self.db_session.commit()
         self.db_session.refresh(new_entity)
         return new_entity
 
+    def _save_returning(self, values: Dict, response_model: BaseModel) -> BaseModel | None:
+        """
+        Create the entity with a single `INSERT ... RETURNING` of the columns the
+        `response_model` needs, instead of add + commit + refresh.
+
+        Returns None (so the ORM path is used) when relationships are involved, either in the
+        values (M2M UUIDs) or in the `response_model`.
+        """
+        columns = returning_columns_from_pydantic(self.model, response_model)
+        relationships = self.model.__mapper__.relationships
+        if columns is None or any(key in relationships for key in values):
+            return None
+
+        row = self.db_session.execute(
+            insert(self.model).values(values).returning(*columns)
+        ).one()
+        self.db_session.commit()
+        return response_model.model_validate(row._asdict())
+
     @handle_commit_errors
-    def upsert(self, entity: BaseModel, **extra_fields) -> T:
-        new_entity = (
-            self.model(**{**entity.model_dump(), **extra_fields})
-            if not isinstance(entity, self.model)
-            else entity
-        )
+    def upsert(
+        self,
+        entity: BaseModel,
+        conflict_target: Sequence[str] = ("id",),
+        response_model: BaseModel | None = None,
+        **extra_fields,
+    ) -> T | BaseModel:
+        if isinstance(entity, self.model):
+            # ORM instances keep using merge, they might carry relationships
+            persisted_entity = self.db_session.merge(entity)
+            self.db_session.commit()
+            self.db_session.refresh(persisted_entity)
+            return persisted_entity
+
+        return self.upsert_many(
+            [entity], conflict_target=conflict_target, response_model=response_model, **extra_fields
+        )[0]
 
-        persisted_entity = self.db_session.merge(new_entity)
+    @handle_commit_errors
+    def upsert_many(
+        self,
+        entities: List[BaseModel | Dict],
+        conflict_target: Sequence[str] = ("id",),
+        response_model: BaseModel | None = None,
+        **extra_fields,
+    ) -> List[T] | List[BaseModel]:
+        """
+        Insert or update the entities with a single `INSERT ... ON CONFLICT DO UPDATE ... RETURNING`.
+
+        Args:
+            entities (List[BaseModel | Dict]): The entities to upsert, all with the same fields.
+            conflict_target (Sequence[str]): The columns of the unique index used to detect
+                the existing rows, e.g. `("numero",)` for jugadores.
+            response_model (BaseModel): If it only needs plain columns, just those are returned
+                and converted to the schema. Otherwise the ORM instances are returned.
+
+        Returns:
+            The persisted rows, in the same order as the entities.
+
+        Note that an entity can't appear twice (same conflict target) in the same call.
+        """
+        rows = [
+            {**(entity.model_dump() if isinstance(entity, BaseModel) else entity), **extra_fields}
+            for entity in entities
+        ]
+        if not rows:
+            logger.warning("No entities to upsert")
+            return []
+
+        update_columns = [key for key in rows[0] if key not in conflict_target and key != "id"]
+        stmt = insert(self.model).values(rows)
+        stmt = do_upsert_on_conflict(conflict_target, update_columns)(stmt)
+
+        if response_model and (
+            columns := returning_columns_from_pydantic(self.model, response_model)
+        ):
+            persisted = self.db_session.execute(stmt.returning(*columns)).all()
+            self.db_session.commit()
+            return [response_model.model_validate(row._asdict()) for row in persisted]
+
+        persisted = self.db_session.scalars(stmt.returning(self.model)).unique().all()
         self.db_session.commit()
-        self.db_session.refresh(persisted_entity)
-        return persisted_entity
+        return persisted
 
     @handle_commit_errors
-    def update(self, entity_id: uuid.UUID, updated_entity: BaseModel) -> T:
+    def update(
+        self,
+        entity_id: uuid.UUID,
+        updated_entity: BaseModel,
+        response_model: BaseModel | None = None,
+    ) -> T | BaseModel:
+        update_values = (
+            updated_entity.model_dump(exclude_unset=True)
+            if isinstance(updated_entity, BaseModel)
+            else dict(updated_entity)
+        )
+        relationships = self.model.__mapper__.relationships
+        if update_values and not any(key in relationships for key in update_values):
+            return self._update_columns(entity_id, update_values, response_model)
+
         # Create a new instance of the model to update it
         instance = self.get(entity_id)
         self._convert_m2m_relationships(updated_entity)
@@ -257,6 +526,36 @@ class SQLAlchemyRepository(BaseRepository[T]):
         self.db_session.commit()
         return instance
 
+    def _update_columns(
+        self, entity_id: uuid.UUID, update_values: Dict, response_model: BaseModel | None = None
+    ) -> T | BaseModel:
+        """
+        Update only columns with a single `UPDATE ... WHERE id = :id RETURNING ...`, without
+        loading the instance (and its eager relationships) first.
+        """
+        self._add_updates_metadata(update_values)
+        stmt = (
+            update(self.model)
+            .where(self.model.id == entity_id)
+            .values(update_values)
+            .execution_options(synchronize_session="fetch")
+        )
+
+        if response_model and (
+            columns := returning_columns_from_pydantic(self.model, response_model)
+        ):
+            row = self.db_session.execute(stmt.returning(*columns)).one_or_none()
+            item = response_model.model_validate(row._asdict()) if row else None
+        else:
+            item = self.db_session.scalars(stmt.returning(self.model)).unique().one_or_none()
+
+        if item is None:
+            self.db_session.rollback()
+            raise NotFoundError(detail=f"{self.model._display_name()} {entity_id} not found")
+
+        self.db_session.commit()
+        return item
+
     def bulk_update(
         self,
         values: BaseModel,
@@ -273,6 +572,64 @@ class SQLAlchemyRepository(BaseRepository[T]):
         self.db_session.execute(stmt)
         self.db_session.commit()
 
+    @handle_commit_errors
+    def bulk_update_many(
+        self,
+        updates: Iterable[tuple[uuid.UUID, BaseModel | Dict]],
+        chunk_size: int = 500,
+    ) -> int:
+        """
+        Apply a different partial update to every row, in a single transaction.
+
+        The updates are grouped by the set of fields they change, and every group is sent in
+        chunks of `chunk_size` rows as one `UPDATE ... FROM (VALUES ...) WHERE id = v.id`.
+
+        Args:
+            updates: (id, values) pairs, the values are dumped with `exclude_unset=True`.
+            chunk_size (int): Max rows per statement.
+
+        Returns:
+            int: The number of updated rows.
+        """
+        groups: Dict[tuple, List[Dict]] = {}
+        for entity_id, values_ in updates:
+            update_values = (
+                values_.model_dump(exclude_unset=True)
+                if isinstance(values_, BaseModel)
+                else dict(values_)
+            )
+            if update_values:
+                groups.setdefault(tuple(sorted(update_values)), []).append(
+                    {"id": entity_id, **update_values}
+                )
+
+        if not groups:
+            logger.warning("No entities to bulk update")
+            return 0
+
+        table = self.model.__table__
+        updated = 0
+        for keys, rows in groups.items():
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start : start + chunk_size]
+                columns = ("id", *keys)
+                data = values(
+                    *(column(key, table.c[key].type) for key in columns),
+                    name="__bulk_update_values",
+                ).data([tuple(row[key] for key in columns) for row in chunk])
+
+                set_values = {key: cast(data.c[key], table.c[key].type) for key in keys}
+                self._add_updates_metadata(set_values)
+                stmt = (
+                    update(table)
+                    .where(table.c.id == cast(data.c.id, table.c.id.type))
+                    .values(set_values)
+                )
+                updated += self.db_session.execute(stmt).rowcount
+
+        self.db_session.commit()
+        return updated
+
     @handle_commit_errors
     def delete(self, entity_id: uuid.UUID) -> None:
         self.db_session.execute(delete(self.model).where(self.model.id == entity_id))
@@ -285,8 +642,25 @@ class SQLAlchemyRepository(BaseRepository[T]):
         self.db_session.commit()
 
     @handle_commit_errors
-    def save_many(self, entity_list: List[BaseModel]) -> List[T]:
-        new_entities = [self.model(**entity.model_dump()) for entity in entity_list]
+    def save_many(
+        self, entity_list: List[BaseModel], use_copy: bool = False
+    ) -> List[T] | BulkLoadStats:
+        """
+        Create the entities and return them. With `use_copy` they are loaded with `bulk_load`
+        and its `BulkLoadStats` are returned instead, call `bulk_load` directly for that.
+        """
+        if use_copy:
+            return self.bulk_load(entity_list)
+
+        # The references of all the entities are resolved together
+        loader = ReferenceLoader(self.db_session)
+        entities_values = [
+            self._defer_m2m_references(entity.model_dump(), loader) for entity in entity_list
+        ]
+        loader.load()
+
+        new_entities = [self.model(**values) for values in entities_values]
+
         self.db_session.add_all(new_entities)
         self.db_session.commit()
 
@@ -302,7 +676,16 @@ class SQLAlchemyRepository(BaseRepository[T]):
         self,
         entities: list[T],
         on_conflict: OnConflictClause = do_default_on_conflict,
-    ) -> None:
+        use_copy: bool = False,
+    ) -> List[T] | BulkLoadStats | None:
+        """
+        Insert the entities with a single `INSERT ... RETURNING` and return them. With
+        `use_copy` they are loaded with `bulk_load` and its `BulkLoadStats` are returned
+        instead, call `bulk_load` directly for that.
+        """
+        if use_copy:
+            return self.bulk_load(entities, on_conflict=on_conflict)
+
         entities_dict = [
             entity.model_dump() if isinstance(entity, BaseModel) else entity for entity in entities
         ]
@@ -321,6 +704,59 @@ class SQLAlchemyRepository(BaseRepository[T]):
         self.db_session.commit()
         return res.scalars().all()
 
+    @handle_commit_errors
+    def bulk_load(
+        self,
+        entities: Iterable[BaseModel | Dict],
+        on_conflict: OnConflictClause = do_default_on_conflict,
+        batch_size: int = COPY_BATCH_SIZE,
+    ) -> BulkLoadStats:
+        """
+        Load the entities with `COPY ... FROM STDIN`, streaming them in batches of `batch_size`.
+
+        Without an `on_conflict` clause the rows are copied straight into the table. Otherwise
+        they are copied into a temporary staging table and moved with a single
+        `INSERT ... SELECT ... ON CONFLICT` so the clause semantics are kept.
+
+        The rows are not returned, use `bulk_create` without `use_copy` if you need them.
+        """
+        table = self.model.__table__
+        rows = (
+            entity.model_dump() if isinstance(entity, BaseModel) else dict(entity)
+            for entity in entities
+        )
+        first_row = next(rows, None)
+        if first_row is None:
+            logger.warning("No entities to bulk load")
+            return BulkLoadStats()
+
+        columns = copy_columns(table, first_row)
+        rows = same_keys(table, chain([first_row], rows), first_row.keys())
+
+        connection = self.db_session.connection()
+        dbapi_connection = connection.connection.dbapi_connection
+        try:
+            if on_conflict is do_default_on_conflict:
+                stats = copy_rows(dbapi_connection, table.name, table, columns, rows, batch_size)
+            else:
+                staging = staging_table(table, columns)
+                staging.create(connection)
+                stats = copy_rows(dbapi_connection, staging.name, table, columns, rows, batch_size)
+
+                stmt = insert(self.model).from_select(columns, select(staging))
+                self.db_session.execute(on_conflict(stmt))
+        except psycopg2.IntegrityError as e:
+            # COPY runs on the raw connection, wrap the error as SQLAlchemy would
+            raise sqlalchemy.exc.IntegrityError("COPY", None, e) from e
+
+        self.db_session.commit()
+        logger.info(
+            f"Bulk loaded {stats.rows} rows into {table.name} in {stats.elapsed_seconds:.2f}s "
+            f"({stats.rows_per_second:.0f} rows/s)"
+        )
+        return stats
+
+    @read_only
     def count(self, entity_filter: BaseFilterModel | None = None) -> int:
         query = self._base_query()
         if entity_filter:
@@ -367,3 +803,16 @@ class SQLAlchemyRepository(BaseRepository[T]):
                     f"Attribute {key} not found in {self.model._display_name()}"
                 ) from e
         return instance
+
+
+def warm_up_response_models() -> None:
+    """Compile the select options of every repository `response_models` before serving requests"""
+    pairs = []
+    pending = [SQLAlchemyRepository]
+    while pending:
+        repository = pending.pop()
+        pending.extend(repository.__subclasses__())
+        if model := getattr(repository, "model", None):
+            pairs.extend((model, schema) for schema in repository.response_models)
+
+    warm_up_select_from_pydantic(pairs)
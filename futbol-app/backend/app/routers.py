@@ -1,7 +1,13 @@
 """Module for including all the app's routers"""
 
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.core.metrics import metrics
+from app.core.middlewares.axiom import axiom_shipper
+from app.database.base import close_async_session, route_reads_to_replica
+from app.modules.db import select_from_pydantic_cache_info
+from app.permissions import check_internal_api_key
 
 from app.modules.jugadores.routers import router as jugadores_router
 from app.modules.partidos.routers import router as partidos_router
@@ -12,7 +18,9 @@ logger = logging.getLogger(__name__)
 
 
 def get_app_router():
-    router = APIRouter()
+    router = APIRouter(
+        dependencies=[Depends(route_reads_to_replica), Depends(close_async_session)]
+    )
 
     # Jugadores
     router.include_router(
@@ -47,6 +55,18 @@ def get_app_router():
 
 def get_internal_app_router():
     router = APIRouter()
+
+    @router.get("/metrics", dependencies=[Depends(check_internal_api_key)])
+    def get_metrics():
+        return {
+            **metrics.snapshot(),
+            "axiom.queue.depth": axiom_shipper.depth(),
+            **{
+                f"select_from_pydantic.cache.{key}": value
+                for key, value in select_from_pydantic_cache_info()._asdict().items()
+            },
+        }
+
     return router
 
 
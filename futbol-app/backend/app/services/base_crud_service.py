@@ -1,13 +1,13 @@
 """Module with the Base service"""
 
 import uuid
-from typing import List
+from typing import Iterator, List
 
 from fastapi_filter.base.filter import BaseFilterModel
 from fastapi_pagination import Page, Params
 from pydantic import BaseModel
 
-from app.repositories.base_repository import BaseRepository, T
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository, T
 
 
 class BaseService:
@@ -25,6 +25,16 @@ class BaseService:
     ) -> T | None:
         return self.repo.get(entity_id, raise_error=raise_error, response_model=response_model)
 
+    def get_many(
+        self,
+        entity_ids: List[uuid.UUID],
+        raise_error: bool = True,
+        response_model: BaseModel = None,
+    ) -> List[T]:
+        return self.repo.get_many(
+            entity_ids, raise_error=raise_error, response_model=response_model
+        )
+
     def get_all(
         self,
         entity_filter: BaseFilterModel | None = None,
@@ -33,11 +43,70 @@ class BaseService:
     ) -> List[T] | Page[T]:
         return self.repo.get_all(entity_filter, pagination_params, **kwargs)
 
-    def create(self, entity: BaseModel, **extra_fields) -> T:
-        return self.repo.save(entity, **extra_fields)
+    def stream_all(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        **kwargs,
+    ) -> Iterator[T] | Iterator[BaseModel]:
+        return self.repo.stream_all(entity_filter, **kwargs)
+
+    def create(
+        self, entity: BaseModel, response_model: BaseModel = None, **extra_fields
+    ) -> T | BaseModel:
+        return self.repo.save(entity, response_model=response_model, **extra_fields)
+
+    def upsert(self, entity: BaseModel, **kwargs) -> T | BaseModel:
+        return self.repo.upsert(entity, **kwargs)
 
-    def update(self, entity_id: uuid.UUID, entity: BaseModel) -> T:
-        return self.repo.update(entity_id, entity)
+    def upsert_many(self, entities: List[BaseModel], **kwargs) -> List[T] | List[BaseModel]:
+        return self.repo.upsert_many(entities, **kwargs)
+
+    def update(
+        self, entity_id: uuid.UUID, entity: BaseModel, response_model: BaseModel = None
+    ) -> T | BaseModel:
+        return self.repo.update(entity_id, entity, response_model=response_model)
+
+    def bulk_update_many(self, updates: List[tuple[uuid.UUID, BaseModel]], **kwargs) -> int:
+        return self.repo.bulk_update_many(updates, **kwargs)
 
     def delete(self, entity_id: uuid.UUID) -> None:
         return self.repo.delete(entity_id)
+
+
+class AsyncBaseService:
+    """asyncio version of `BaseService`, to be used from `async def` endpoints.
+
+    Args:
+        repo (AsyncBaseRepository): Async repository of the entity
+    """
+
+    def __init__(self, repo: AsyncBaseRepository) -> None:
+        self.repo = repo
+
+    async def get_by_id(
+        self, entity_id: uuid.UUID, raise_error: bool = True, response_model: BaseModel = None
+    ) -> T | None:
+        return await self.repo.get(
+            entity_id, raise_error=raise_error, response_model=response_model
+        )
+
+    async def get_all(
+        self,
+        entity_filter: BaseFilterModel | None = None,
+        pagination_params: Params | None = None,
+        **kwargs,
+    ) -> List[T] | Page[T]:
+        return await self.repo.get_all(entity_filter, pagination_params, **kwargs)
+
+    async def create(
+        self, entity: BaseModel, response_model: BaseModel = None, **extra_fields
+    ) -> T | BaseModel:
+        return await self.repo.save(entity, response_model=response_model, **extra_fields)
+
+    async def update(
+        self, entity_id: uuid.UUID, entity: BaseModel, response_model: BaseModel = None
+    ) -> T | BaseModel:
+        return await self.repo.update(entity_id, entity, response_model=response_model)
+
+    async def delete(self, entity_id: uuid.UUID) -> None:
+        return await self.repo.delete(entity_id)
@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+from app.core.config import settings
+from app.dependencies import DependencyInjector
+from app.modules.asistencias.service import AsistenciaService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Verifica (y reconstruye) la tabla asistencias_temporada a partir de las asistencias."
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Reconstruye la tabla si hay diferencias con las asistencias.",
+    )
+    args = parser.parse_args()
+
+    dp_injector = DependencyInjector(db_url=settings.DB_URL, pool_size=1)
+    dp_injector.apply_bindings()
+    asistencia_service = dp_injector.get(AsistenciaService)
+
+    print("Verificando asistencias_temporada...")
+    diferencias = asistencia_service.verify_bitmaps()
+    for diferencia in diferencias:
+        print(
+            f"  {diferencia['jugador_id']} ({diferencia['temporada']}): "
+            f"esperado={diferencia['esperado']} actual={diferencia['actual']}"
+        )
+
+    if not diferencias:
+        print("¡La tabla está sincronizada!")
+    elif args.rebuild:
+        bitmaps = asistencia_service.rebuild_bitmaps()
+        print(f"Tabla reconstruida con {bitmaps} bitmaps.")
+    else:
+        print(f"{len(diferencias)} bitmaps con diferencias, ejecutar con --rebuild para corregirlos.")
+        sys.exit(1)
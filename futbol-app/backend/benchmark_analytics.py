@@ -0,0 +1,195 @@
+"""
+Benchmark de las métricas de jugadores: NumPy (app.modules.estadisticas.analytics) contra el
+cálculo fila por fila en Python.
+
+Por defecto usa estadísticas generadas en memoria y mide por separado la carga de las filas en
+los arrays y el cálculo. Con --db compara contra la base de datos: una query por jugador más el
+loop en Python, contra la query única del servicio.
+
+    python benchmark_analytics.py --jugadores 300 --partidos 2000
+    python benchmark_analytics.py --db
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.modules.estadisticas.analytics import (
+    ANALYTICS_COLUMNS,
+    EstadisticasArrays,
+    metricas_jugadores,
+)
+
+
+def generar_filas(n_jugadores: int, n_partidos: int, por_partido: int) -> list[tuple]:
+    jugadores = [uuid.uuid4() for _ in range(n_jugadores)]
+    filas = []
+    for _ in range(n_partidos):
+        partido_id = uuid.uuid4()
+        for jugador_id in random.sample(jugadores, min(por_partido, n_jugadores)):
+            filas.append(
+                (
+                    jugador_id,
+                    partido_id,
+                    random.choices([0, 1, 2, 3], weights=[80, 14, 5, 1])[0],
+                    random.choices([0, 1, 2], weights=[85, 12, 3])[0],
+                    int(random.random() < 0.12),
+                    int(random.random() < 0.01),
+                    random.randint(0, 90),
+                    random.random() < 0.7,
+                )
+            )
+    return filas
+
+
+def metricas_naive(filas_por_jugador: dict) -> list[dict]:
+    """El cálculo sin NumPy: un loop por jugador sobre sus estadísticas"""
+    goles_partido = {}
+    for filas in filas_por_jugador.values():
+        for fila in filas:
+            goles_partido[fila[1]] = goles_partido.get(fila[1], 0) + fila[2]
+
+    metricas = []
+    for jugador_id, filas in filas_por_jugador.items():
+        goles = sum(fila[2] for fila in filas)
+        asistencias = sum(fila[3] for fila in filas)
+        tarjetas = sum(fila[4] + fila[5] for fila in filas)
+        minutos = sum(fila[6] for fila in filas)
+        goles_equipo = sum(goles_partido[fila[1]] for fila in filas)
+        metricas.append(
+            {
+                "jugador_id": jugador_id,
+                "goles_por_90": goles * 90 / minutos if minutos else 0.0,
+                "asistencias_por_90": asistencias * 90 / minutos if minutos else 0.0,
+                "participaciones_por_90": (
+                    (goles + asistencias) * 90 / minutos if minutos else 0.0
+                ),
+                "tarjetas_por_90": tarjetas * 90 / minutos if minutos else 0.0,
+                "participacion_goles": (
+                    (goles + asistencias) / goles_equipo if goles_equipo else 0.0
+                ),
+                "minutos": minutos,
+            }
+        )
+
+    for nombre in ("goles_por_90", "asistencias_por_90", "participaciones_por_90"):
+        valores = [m[nombre] for m in metricas if m["minutos"]]
+        media = statistics.fmean(valores) if valores else 0.0
+        desvio = statistics.pstdev(valores) if len(valores) > 1 else 0.0
+        for m in metricas:
+            m[f"z_{nombre}"] = (m[nombre] - media) / desvio if desvio and m["minutos"] else 0.0
+    return metricas
+
+
+def medir(nombre: str, funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"  {nombre:<10} {min(tiempos) * 1000:10.2f} ms (mejor de {repeticiones})")
+    return resultado, min(tiempos)
+
+
+def columnas_de(filas: list[tuple]) -> dict:
+    """Las filas en el formato de `EstadisticaSQLRepository.get_columnas`"""
+    jugador_ids = sorted({fila[0] for fila in filas})
+    partido_ids = sorted({fila[1] for fila in filas})
+    jugador_idx = {jugador_id: i for i, jugador_id in enumerate(jugador_ids)}
+    partido_idx = {partido_id: i for i, partido_id in enumerate(partido_ids)}
+    columnas = dict(zip(ANALYTICS_COLUMNS, [list(columna) for columna in zip(*filas)][2:]))
+    return {
+        "jugador_ids": [str(jugador_id) for jugador_id in jugador_ids],
+        "partido_ids": [str(partido_id) for partido_id in partido_ids],
+        "jugador_idx": [jugador_idx[fila[0]] for fila in filas],
+        "partido_idx": [partido_idx[fila[1]] for fila in filas],
+        **columnas,
+    }
+
+
+def benchmark_memoria(args):
+    filas = generar_filas(args.jugadores, args.partidos, args.por_partido)
+    columnas = columnas_de(filas)
+    print(f"{len(filas)} estadísticas, {args.jugadores} jugadores, {args.partidos} partidos")
+
+    def naive():
+        por_jugador = {}
+        for fila in filas:
+            por_jugador.setdefault(fila[0], []).append(fila)
+        return metricas_naive(por_jugador)
+
+    esperado, t_naive = medir("python", naive, args.repeticiones)
+    datos, t_carga = medir(
+        "carga", lambda: EstadisticasArrays.from_columns(columnas), args.repeticiones
+    )
+    obtenido, t_calculo = medir("cálculo", lambda: metricas_jugadores(datos), args.repeticiones)
+    verificar(esperado, obtenido)
+    print(f"  speedup    {t_naive / (t_carga + t_calculo):10.1f}x")
+
+
+def benchmark_db(args):
+    from sqlalchemy import select
+
+    from app.core.config import settings
+    from app.dependencies import DependencyInjector
+    from app.modules.estadisticas.models import Estadistica
+    from app.modules.estadisticas.repository import EstadisticaRepository
+
+    dp_injector = DependencyInjector(db_url=settings.DB_URL, pool_size=1)
+    dp_injector.apply_bindings()
+    repo = dp_injector.get(EstadisticaRepository)
+    columnas = [
+        Estadistica.jugador_id,
+        Estadistica.partido_id,
+        *(getattr(Estadistica, columna) for columna in ANALYTICS_COLUMNS),
+    ]
+    jugador_ids = repo.db_session.scalars(select(Estadistica.jugador_id).distinct()).all()
+    print(f"{len(jugador_ids)} jugadores con estadísticas")
+
+    def naive():
+        por_jugador = {
+            jugador_id: repo.db_session.execute(
+                select(*columnas).where(Estadistica.jugador_id == jugador_id)
+            ).all()
+            for jugador_id in jugador_ids
+        }
+        return metricas_naive(por_jugador)
+
+    def numpy_():
+        return metricas_jugadores(EstadisticasArrays.from_columns(repo.get_columnas()))
+
+    esperado, t_naive = medir("python", naive, args.repeticiones)
+    obtenido, t_numpy = medir("numpy", numpy_, args.repeticiones)
+    verificar(esperado, obtenido)
+    print(f"  speedup    {t_naive / t_numpy:10.1f}x")
+
+
+def verificar(esperado: list[dict], obtenido: list[dict]):
+    """Los dos cálculos tienen que dar lo mismo"""
+    obtenido = {str(m["jugador_id"]): m for m in obtenido}
+    for m in esperado:
+        for nombre, valor in m.items():
+            if nombre in ("jugador_id", "minutos"):
+                continue
+            calculado = obtenido[str(m["jugador_id"])][nombre]
+            if abs(calculado - valor) > 1e-9:
+                raise AssertionError(f"{nombre} de {m['jugador_id']}: {valor} != {calculado}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las métricas de jugadores.")
+    parser.add_argument(
+        "--db", action="store_true", help="Usa las estadísticas de la base de datos."
+    )
+    parser.add_argument("--jugadores", type=int, default=300)
+    parser.add_argument("--partidos", type=int, default=2000)
+    parser.add_argument("--por-partido", type=int, default=16)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.db:
+        benchmark_db(args)
+    else:
+        benchmark_memoria(args)
@@ -0,0 +1,151 @@
+"""
+Benchmark del costo por request de AxiomMiddleware.
+
+Compara una app de FastAPI sin middleware, con el middleware anterior (BaseHTTPMiddleware que
+parsea el body con `request.json()`) y con el middleware ASGI actual. Los requests se llaman
+directamente sobre la interfaz ASGI y los eventos van a un shipper que los descarta, así que
+se mide solo el middleware y no la red ni Axiom.
+
+    python benchmark_middleware.py --requests 5000 --body-size 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.middlewares.axiom import AxiomMiddleware
+
+
+class ShipperNulo:
+    def __init__(self):
+        self.eventos = 0
+
+    def enqueue(self, event):
+        self.eventos += 1
+        return True
+
+
+class MiddlewareAnterior(BaseHTTPMiddleware):
+    """El AxiomMiddleware anterior, sin el envío a Axiom"""
+
+    def __init__(self, *args, shipper, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shipper = shipper
+
+    async def dispatch(self, request: Request, call_next):
+        body = {}
+        if request.headers.get("Content-Type") == "application/json":
+            body = await request.json()
+
+        start_time = time.time()
+        response = await call_next(request)
+        self.shipper.enqueue(
+            {
+                "host": request.client.host,
+                "method": request.method,
+                "path": request.url.path,
+                "url": str(request.url),
+                "request_duration": (time.time() - start_time) * 1000,
+                "body": body,
+                "status_code": response.status_code,
+            }
+        )
+        return response
+
+
+def crear_app(middleware=None, **kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/jugadores")
+    async def crear_jugador(jugador: dict):
+        return {"id": 1, **jugador}
+
+    if middleware:
+        app.add_middleware(middleware, **kwargs)
+    return app
+
+
+async def llamar(app, body: bytes):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/jugadores",
+        "raw_path": b"/jugadores",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    mensajes = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if mensajes:
+            return mensajes.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def medir(nombre: str, app, body: bytes, n: int, base: float | None = None) -> float:
+    for _ in range(100):  # Warm up
+        await llamar(app, body)
+
+    inicio = time.perf_counter()
+    for _ in range(n):
+        await llamar(app, body)
+    por_request = (time.perf_counter() - inicio) / n * 1e6
+
+    extra = f"  (+{por_request - base:.1f} µs)" if base is not None else ""
+    print(f"  {nombre:<22} {por_request:8.1f} µs/request{extra}")
+    return por_request
+
+
+async def main(args):
+    jugador = {"nombre": "n" * 20, "apellido": "a" * 20, "notas": "x" * args.body_size}
+    body = json.dumps(jugador).encode()
+    print(f"{args.requests} requests POST con un body de {len(body)} bytes")
+
+    base = await medir("sin middleware", crear_app(), body, args.requests)
+    await medir(
+        "BaseHTTPMiddleware",
+        crear_app(MiddlewareAnterior, shipper=ShipperNulo()),
+        body,
+        args.requests,
+        base,
+    )
+    await medir(
+        "ASGI",
+        crear_app(AxiomMiddleware, shipper=ShipperNulo()),
+        body,
+        args.requests,
+        base,
+    )
+    await medir(
+        "ASGI sin body",
+        crear_app(AxiomMiddleware, shipper=ShipperNulo(), body_sample_rate=0),
+        body,
+        args.requests,
+        base,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de AxiomMiddleware.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--body-size", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from app.core.config import settings
+from app.dependencies import DependencyInjector
+from app.modules.estadisticas.service import EstadisticaService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Verifica (y reconstruye) la tabla resumen_jugadores a partir de las estadísticas."
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Reconstruye la tabla si hay diferencias con las estadísticas.",
+    )
+    args = parser.parse_args()
+
+    dp_injector = DependencyInjector(db_url=settings.DB_URL, pool_size=1)
+    dp_injector.apply_bindings()
+    estadistica_service = dp_injector.get(EstadisticaService)
+
+    print("Verificando resumen_jugadores...")
+    diferencias = estadistica_service.verify_resumen_jugadores()
+    for diferencia in diferencias:
+        print(f"  {diferencia['jugador_id']}: esperado={diferencia['esperado']} actual={diferencia['actual']}")
+
+    if not diferencias:
+        print("¡La tabla está sincronizada!")
+    elif args.rebuild:
+        jugadores = estadistica_service.rebuild_resumen_jugadores()
+        print(f"Tabla reconstruida con {jugadores} jugadores.")
+    else:
+        print(f"{len(diferencias)} jugadores con diferencias, ejecutar con --rebuild para corregirlos.")
+        sys.exit(1)